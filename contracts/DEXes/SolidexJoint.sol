@@ -53,7 +53,7 @@ contract SolidexJoint is NoHedgeJoint {
     function _initalizeSolidexJoint(address _solidex, bool _stable) internal {
         solidex = ISolidex(_solidex);
         stable = _stable;
-        pair = IUniswapV2Pair(getPair());
+        _setPair(getPair());
         IERC20(address(pair)).approve(_solidex, type(uint256).max);
         IERC20(address(pair)).approve(address(router), type(uint256).max);
     }
@@ -390,7 +390,7 @@ contract SolidexJoint is NoHedgeJoint {
                 currentB,
                 startingA,
                 startingB,
-                10**uint256(IERC20Extended(tokenA).decimals())
+                10**uint256(decimalsA)
             );
         } else {
             _sellToken = tokenB;
@@ -400,7 +400,7 @@ contract SolidexJoint is NoHedgeJoint {
                 currentA,
                 startingB,
                 startingA,
-                10**uint256(IERC20Extended(tokenB).decimals())
+                10**uint256(decimalsB)
             );
         }
     }
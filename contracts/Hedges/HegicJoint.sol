@@ -24,7 +24,7 @@ abstract contract HegicJoint is Joint {
     uint256 public protectionRange;
     uint256 public period;
 
-    uint256 private minTimeToMaturity;
+    uint256 public minTimeToMaturity;
 
     bool public skipManipulatedCheck;
     bool public isHedgingEnabled;
@@ -223,10 +223,8 @@ abstract contract HegicJoint is Joint {
         if (oraclePrice == 0) {
             return false;
         }
-        uint256 tokenADecimals =
-            uint256(10)**uint256(IERC20Extended(tokenA).decimals());
-        uint256 tokenBDecimals =
-            uint256(10)**uint256(IERC20Extended(tokenB).decimals());
+        uint256 tokenADecimals = uint256(10)**uint256(decimalsA);
+        uint256 tokenBDecimals = uint256(10)**uint256(decimalsB);
 
         (uint256 reserveA, uint256 reserveB) = getReserves();
         uint256 currentPairPrice =
@@ -256,10 +254,8 @@ abstract contract HegicJoint is Joint {
             }
 
             // NOTE: the initial price is calculated using the added liquidity
-            uint256 tokenADecimals =
-                uint256(10)**uint256(IERC20Extended(tokenA).decimals());
-            uint256 tokenBDecimals =
-                uint256(10)**uint256(IERC20Extended(tokenB).decimals());
+            uint256 tokenADecimals = uint256(10)**uint256(decimalsA);
+            uint256 tokenBDecimals = uint256(10)**uint256(decimalsB);
             uint256 initPrice =
                 investedB
                     .mul(tokenADecimals)
@@ -57,6 +57,10 @@ abstract contract Joint is ySwapper {
 
     bool public dontInvestWant;
     bool public autoProtectionDisabled;
+    // set at initialization (see _setPair), share the slot of the flags above
+    bool internal tokenAIsToken0;
+    uint8 internal decimalsA;
+    uint8 internal decimalsB;
 
     uint256 public minAmountToSell;
     uint256 public maxPercentageLoss;
@@ -154,7 +158,9 @@ abstract contract Joint is ySwapper {
         tokenA = address(providerA.want());
         tokenB = address(providerB.want());
         require(tokenA != tokenB, "!same-want");
-        pair = IUniswapV2Pair(getPair());
+        decimalsA = IERC20Extended(tokenA).decimals();
+        decimalsB = IERC20Extended(tokenB).decimals();
+        _setPair(getPair());
 
         IERC20(tokenA).approve(address(_router), type(uint256).max);
         IERC20(tokenB).approve(address(_router), type(uint256).max);
@@ -162,12 +168,22 @@ abstract contract Joint is ySwapper {
         IERC20(address(pair)).approve(address(_router), type(uint256).max);
     }
 
+    function _setPair(address _pair) internal {
+        pair = IUniswapV2Pair(_pair);
+        tokenAIsToken0 = tokenA == pair.token0();
+    }
+
     function name() external view virtual returns (string memory);
 
     function shouldEndEpoch() public view virtual returns (bool);
 
     function _autoProtect() internal view virtual returns (bool);
 
+    // true if closing the position now would stop new epochs (see closePositionReturnFunds)
+    function autoProtect() external view returns (bool) {
+        return _autoProtect() && !autoProtectionDisabled;
+    }
+
     function shouldStartEpoch() public view returns (bool) {
         // return true if we have balance of A or balance of B while the position is closed
         return
@@ -412,6 +428,24 @@ abstract contract Joint is ySwapper {
         }
     }
 
+    // estimatedTotalAssetsAfterBalance and the estimatedTotalAssets of both providers (their want
+    // balance plus their side of the joint) from a single evaluation of the joint, so that
+    // ProviderStrategy and JointLens don't run it once per provider
+    function estimatedTotalAssetsOfProviders()
+        public
+        view
+        returns (
+            uint256 _aBalance,
+            uint256 _bBalance,
+            uint256 _aAssets,
+            uint256 _bAssets
+        )
+    {
+        (_aBalance, _bBalance) = estimatedTotalAssetsAfterBalance();
+        _aAssets = _aBalance.add(IERC20(tokenA).balanceOf(address(providerA)));
+        _bAssets = _bBalance.add(IERC20(tokenB).balanceOf(address(providerB)));
+    }
+
     function getHedgeBudget(address token)
         public
         view
@@ -446,7 +480,7 @@ abstract contract Joint is ySwapper {
                 startingB,
                 reserveA,
                 reserveB,
-                10**uint256(IERC20Extended(tokenA).decimals())
+                10**uint256(decimalsA)
             );
         } else {
             _sellToken = tokenB;
@@ -457,7 +491,7 @@ abstract contract Joint is ySwapper {
                 startingA,
                 reserveB,
                 reserveA,
-                10**uint256(IERC20Extended(tokenB).decimals())
+                10**uint256(decimalsB)
             );
         }
     }
@@ -513,7 +547,7 @@ abstract contract Joint is ySwapper {
         view
         returns (uint256 reserveA, uint256 reserveB)
     {
-        if (tokenA == pair.token0()) {
+        if (tokenAIsToken0) {
             (reserveA, reserveB, ) = pair.getReserves();
         } else {
             (reserveB, reserveA, ) = pair.getReserves();
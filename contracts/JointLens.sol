@@ -0,0 +1,226 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+pragma experimental ABIEncoderV2;
+
+import {
+    VaultAPI,
+    StrategyAPI,
+    StrategyParams
+} from "@yearnvaults/contracts/BaseStrategy.sol";
+
+interface IJoint {
+    function providerA() external view returns (address);
+
+    function providerB() external view returns (address);
+
+    function investedA() external view returns (uint256);
+
+    function investedB() external view returns (uint256);
+
+    function balanceOfA() external view returns (uint256);
+
+    function balanceOfB() external view returns (uint256);
+
+    function balanceOfStake() external view returns (uint256);
+
+    function balanceOfPair() external view returns (uint256);
+
+    function balanceOfTokensInLP() external view returns (uint256, uint256);
+
+    function pendingReward() external view returns (uint256);
+
+    function getHedgeProfit() external view returns (uint256, uint256);
+
+    function getReserves() external view returns (uint256, uint256);
+
+    function shouldStartEpoch() external view returns (bool);
+
+    function shouldEndEpoch() external view returns (bool);
+
+    function estimatedTotalAssetsAfterBalance()
+        external
+        view
+        returns (uint256, uint256);
+
+    function estimatedTotalAssetsOfProviders()
+        external
+        view
+        returns (
+            uint256,
+            uint256,
+            uint256,
+            uint256
+        );
+}
+
+interface IProvider {
+    function joint() external view returns (address);
+}
+
+// implemented by the hedged joints only
+interface IHedgedJoint {
+    function activeHedgeID() external view returns (uint256);
+
+    function getTimeToMaturity() external view returns (uint256);
+}
+
+// Read-only aggregator returning the full status of many joints in a single eth_call.
+// Decoded by scripts/joint_lens.py
+contract JointLens {
+    struct JointStatus {
+        address joint;
+        // false if reading the joint reverted, every other field is then empty
+        bool success;
+        address providerA;
+        address providerB;
+        uint256 totalDebtA;
+        uint256 totalDebtB;
+        uint256 estimatedTotalAssetsA;
+        uint256 estimatedTotalAssetsB;
+        uint256 investedA;
+        uint256 investedB;
+        uint256 balanceOfA;
+        uint256 balanceOfB;
+        uint256 balanceOfStake;
+        uint256 balanceOfPair;
+        uint256 lpBalanceA;
+        uint256 lpBalanceB;
+        uint256 pendingReward;
+        uint256 hedgeProfitA;
+        uint256 hedgeProfitB;
+        uint256 activeHedgeID;
+        uint256 timeToMaturity;
+        uint256 reserveA;
+        uint256 reserveB;
+        bool shouldStartEpoch;
+        bool shouldEndEpoch;
+        uint256 assetsAfterBalanceA;
+        uint256 assetsAfterBalanceB;
+    }
+
+    function getStatuses(address[] calldata joints)
+        external
+        view
+        returns (JointStatus[] memory statuses)
+    {
+        statuses = new JointStatus[](joints.length);
+        for (uint256 i = 0; i < joints.length; i++) {
+            // a reverting joint doesn't prevent reading the others
+            try this.getStatus(joints[i]) returns (JointStatus memory status) {
+                statuses[i] = status;
+            } catch {
+                statuses[i].joint = joints[i];
+            }
+        }
+    }
+
+    function getStatus(address _joint)
+        public
+        view
+        returns (JointStatus memory status)
+    {
+        IJoint joint = IJoint(_joint);
+        status.joint = _joint;
+        status.success = true;
+
+        status.investedA = joint.investedA();
+        status.investedB = joint.investedB();
+        status.balanceOfA = joint.balanceOfA();
+        status.balanceOfB = joint.balanceOfB();
+        status.balanceOfStake = joint.balanceOfStake();
+        status.balanceOfPair = joint.balanceOfPair();
+        (status.lpBalanceA, status.lpBalanceB) = joint.balanceOfTokensInLP();
+        status.pendingReward = joint.pendingReward();
+        (status.hedgeProfitA, status.hedgeProfitB) = joint.getHedgeProfit();
+        (status.reserveA, status.reserveB) = joint.getReserves();
+        status.shouldStartEpoch = joint.shouldStartEpoch();
+        status.shouldEndEpoch = joint.shouldEndEpoch();
+        status.providerA = joint.providerA();
+        status.providerB = joint.providerB();
+
+        (bool providersAssets, uint256 assetsA, uint256 assetsB) = _jointAssets(
+            joint,
+            status
+        );
+        (status.totalDebtA, status.estimatedTotalAssetsA) = _providerStatus(
+            _joint,
+            status.providerA,
+            providersAssets,
+            assetsA
+        );
+        (status.totalDebtB, status.estimatedTotalAssetsB) = _providerStatus(
+            _joint,
+            status.providerB,
+            providersAssets,
+            assetsB
+        );
+
+        // left empty for joints without a hedgil position
+        try IHedgedJoint(_joint).activeHedgeID() returns (uint256 hedgeID) {
+            status.activeHedgeID = hedgeID;
+        } catch {}
+        try IHedgedJoint(_joint).getTimeToMaturity() returns (uint256 ttm) {
+            status.timeToMaturity = ttm;
+        } catch {}
+    }
+
+    // one evaluation of the joint for its assets and both providers' estimatedTotalAssets (the
+    // values ProviderStrategy.estimatedTotalAssets returns)
+    function _jointAssets(IJoint joint, JointStatus memory status)
+        internal
+        view
+        returns (
+            bool providersAssets,
+            uint256 assetsA,
+            uint256 assetsB
+        )
+    {
+        try joint.estimatedTotalAssetsOfProviders() returns (
+            uint256 balanceA,
+            uint256 balanceB,
+            uint256 _assetsA,
+            uint256 _assetsB
+        ) {
+            status.assetsAfterBalanceA = balanceA;
+            status.assetsAfterBalanceB = balanceB;
+            return (true, _assetsA, _assetsB);
+        } catch {
+            // joints deployed before estimatedTotalAssetsOfProviders
+            (status.assetsAfterBalanceA, status.assetsAfterBalanceB) = joint
+                .estimatedTotalAssetsAfterBalance();
+        }
+    }
+
+    function _providerStatus(
+        address _joint,
+        address provider,
+        bool providersAssets,
+        uint256 jointAssets
+    ) internal view returns (uint256 totalDebt, uint256 estimatedTotalAssets) {
+        VaultAPI vault = VaultAPI(StrategyAPI(provider).vault());
+        StrategyParams memory params = vault.strategies(provider);
+        totalDebt = params.totalDebt;
+
+        // the joint's value is the provider's own as long as the provider points to it
+        if (providersAssets && _providerJoint(provider) == _joint) {
+            return (totalDebt, jointAssets);
+        }
+        // a provider of another joint (or migrating) is asked directly, left empty if the
+        // provider can't estimate its assets
+        try StrategyAPI(provider).estimatedTotalAssets() returns (
+            uint256 assets
+        ) {
+            estimatedTotalAssets = assets;
+        } catch {}
+    }
+
+    function _providerJoint(address provider)
+        internal
+        view
+        returns (address providerJoint)
+    {
+        try IProvider(provider).joint() returns (address _providerJoint) {
+            providerJoint = _providerJoint;
+        } catch {}
+    }
+}
@@ -0,0 +1,234 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+pragma experimental ABIEncoderV2;
+
+import {IERC20} from "@openzeppelin/contracts/token/ERC20/SafeERC20.sol";
+
+interface IJointKeeper {
+    function providerA() external view returns (address);
+
+    function providerB() external view returns (address);
+
+    function tokenA() external view returns (address);
+
+    function tokenB() external view returns (address);
+
+    function shouldStartEpoch() external view returns (bool);
+
+    function shouldEndEpoch() external view returns (bool);
+
+    function pendingReward() external view returns (uint256);
+
+    function minRewardToHarvest() external view returns (uint256);
+
+    function autoProtect() external view returns (bool);
+
+    function harvest() external;
+}
+
+// implemented by the hedged joints only
+interface IHedgeMaturity {
+    function getTimeToMaturity() external view returns (uint256);
+
+    function minTimeToMaturity() external view returns (uint256);
+}
+
+interface IProviderStrategy {
+    function harvest() external;
+
+    function harvestTrigger(uint256 callCost) external view returns (bool);
+}
+
+// Harvests both providers of joints in a single transaction, so an epoch starts / ends / rolls
+// without capital waiting in the joint between the two harvests, and tells keepers which joints
+// need an action with a single call (scan).
+// The router has to be the keeper of the providers it harvests (provider.setKeeper(router))
+contract KeeperRouter {
+    // scan actions, one bit each (mirrored in scripts/keeper.py)
+    uint8 internal constant START_EPOCH = 1;
+    uint8 internal constant END_EPOCH = 2;
+    uint8 internal constant CLAIM_REWARDS = 4;
+    // ending the epoch now will stop new ones (Joint.autoProtect)
+    uint8 internal constant AUTO_PROTECT = 8;
+    uint8 internal constant SCAN_FAILED = 128;
+
+    // scan reasons, why an epoch has to start / end
+    uint8 internal constant REASON_NONE = 0;
+    uint8 internal constant REASON_IDLE_FUNDS = 1;
+    uint8 internal constant REASON_HEDGE_EXPIRING = 2;
+    uint8 internal constant REASON_PRICE_OUT_OF_RANGE = 3;
+
+    address public governance;
+    mapping(address => bool) public keepers;
+
+    event Rolled(address indexed joint);
+    event RollFailed(address indexed joint, bytes reason);
+    event RewardsClaimed(address indexed joint);
+    event ClaimFailed(address indexed joint, bytes reason);
+
+    modifier onlyGovernance() {
+        require(msg.sender == governance, "!governance");
+        _;
+    }
+
+    modifier onlyKeepers() {
+        require(msg.sender == governance || keepers[msg.sender], "!keeper");
+        _;
+    }
+
+    constructor() public {
+        governance = msg.sender;
+    }
+
+    function setGovernance(address _governance) external onlyGovernance {
+        require(_governance != address(0));
+        governance = _governance;
+    }
+
+    function setKeeper(address _keeper, bool _allowed)
+        external
+        onlyGovernance
+    {
+        keepers[_keeper] = _allowed;
+    }
+
+    function harvestTrigger(address joint, uint256 callCost)
+        public
+        view
+        returns (bool)
+    {
+        return
+            IProviderStrategy(IJointKeeper(joint).providerA())
+                .harvestTrigger(callCost) ||
+            IProviderStrategy(IJointKeeper(joint).providerB())
+                .harvestTrigger(callCost);
+    }
+
+    // actions needed by every joint: actions[i] and reasons[i] are the ones of joints[i]
+    function scan(address[] calldata joints)
+        external
+        view
+        returns (bytes memory actions, bytes memory reasons)
+    {
+        actions = new bytes(joints.length);
+        reasons = new bytes(joints.length);
+        for (uint256 i = 0; i < joints.length; i++) {
+            try this.scanJoint(joints[i]) returns (uint8 action, uint8 reason) {
+                actions[i] = bytes1(action);
+                reasons[i] = bytes1(reason);
+            } catch {
+                actions[i] = bytes1(SCAN_FAILED);
+            }
+        }
+    }
+
+    // same conditions as the providers' harvestTrigger, each read once. Rewards are claimed
+    // once the joint's pending ones (still in the farm) go over its minRewardToHarvest
+    function scanJoint(address _joint)
+        external
+        view
+        returns (uint8 actions, uint8 reason)
+    {
+        IJointKeeper joint = IJointKeeper(_joint);
+        if (joint.shouldEndEpoch()) {
+            actions = END_EPOCH;
+            reason = _endEpochReason(_joint);
+            // joints deployed before Joint.autoProtect don't report it
+            try joint.autoProtect() returns (bool protect) {
+                if (protect) {
+                    actions |= AUTO_PROTECT;
+                }
+            } catch {}
+        } else if (
+            joint.shouldStartEpoch() &&
+            (IERC20(joint.tokenA()).balanceOf(joint.providerA()) > 0 ||
+                IERC20(joint.tokenB()).balanceOf(joint.providerB()) > 0)
+        ) {
+            actions = START_EPOCH;
+            reason = REASON_IDLE_FUNDS;
+        }
+        // not Joint.harvestTrigger: it looks at the rewards already claimed, which stay in the
+        // joint until the epoch ends, so it would keep asking for claims
+        if (joint.pendingReward() > joint.minRewardToHarvest()) {
+            actions |= CLAIM_REWARDS;
+        }
+    }
+
+    // why the epoch has to end, REASON_NONE if the joint can't tell (no hedge, or deployed before
+    // minTimeToMaturity was public)
+    function _endEpochReason(address _joint) internal view returns (uint8) {
+        try IHedgeMaturity(_joint).getTimeToMaturity() returns (
+            uint256 timeToMaturity
+        ) {
+            try IHedgeMaturity(_joint).minTimeToMaturity() returns (
+                uint256 minTimeToMaturity
+            ) {
+                return
+                    timeToMaturity <= minTimeToMaturity
+                        ? REASON_HEDGE_EXPIRING
+                        : REASON_PRICE_OUT_OF_RANGE;
+            } catch {}
+        } catch {}
+        return REASON_NONE;
+    }
+
+    // harvests providerA then providerB of every joint, reverts if any harvest does
+    function roll(address[] calldata joints) external onlyKeepers {
+        for (uint256 i = 0; i < joints.length; i++) {
+            _roll(joints[i]);
+        }
+    }
+
+    // rolls the joints whose providers' harvestTrigger is true. A joint failing to roll is
+    // skipped (none of its harvests go through) and reported with RollFailed
+    function rollTriggered(address[] calldata joints, uint256 callCost)
+        external
+        onlyKeepers
+        returns (uint256 rolled)
+    {
+        for (uint256 i = 0; i < joints.length; i++) {
+            try this.rollIfTriggered(joints[i], callCost) returns (
+                bool triggered
+            ) {
+                if (triggered) {
+                    rolled++;
+                }
+            } catch (bytes memory reason) {
+                emit RollFailed(joints[i], reason);
+            }
+        }
+    }
+
+    // claims the pending rewards of every joint (Joint.harvest), they are sold when its epoch
+    // ends. A failing joint is reported with ClaimFailed
+    function claimRewards(address[] calldata joints) external onlyKeepers {
+        for (uint256 i = 0; i < joints.length; i++) {
+            try IJointKeeper(joints[i]).harvest() {
+                emit RewardsClaimed(joints[i]);
+            } catch (bytes memory reason) {
+                emit ClaimFailed(joints[i], reason);
+            }
+        }
+    }
+
+    // only called by rollTriggered, to revert both harvests of a joint if one of them fails
+    function rollIfTriggered(address joint, uint256 callCost)
+        external
+        returns (bool)
+    {
+        require(msg.sender == address(this), "!router");
+        if (!harvestTrigger(joint, callCost)) {
+            return false;
+        }
+        _roll(joint);
+        return true;
+    }
+
+    function _roll(address joint) internal {
+        // same order as harvesting them one by one: providerA parks tokenA in the joint (or
+        // closes the position at the end of the epoch), providerB's harvest opens it
+        IProviderStrategy(IJointKeeper(joint).providerA()).harvest();
+        IProviderStrategy(IJointKeeper(joint).providerB()).harvest();
+        emit Rolled(joint);
+    }
+}
@@ -29,6 +29,16 @@ interface JointAPI {
         view
         returns (uint256);
 
+    function estimatedTotalAssetsOfProviders()
+        external
+        view
+        returns (
+            uint256,
+            uint256,
+            uint256,
+            uint256
+        );
+
     function WETH() external view returns (address);
 
     function router() external view returns (address);
@@ -66,9 +76,20 @@ contract ProviderStrategy is BaseStrategyInitializable {
     }
 
     function estimatedTotalAssets() public view override returns (uint256) {
+        // same value JointLens reports for both providers of the joint
+        JointAPI _joint = JointAPI(joint);
+        if (_joint.providerA() == address(this)) {
+            (, , uint256 _assets, ) = _joint.estimatedTotalAssetsOfProviders();
+            return _assets;
+        }
+        if (_joint.providerB() == address(this)) {
+            (, , , uint256 _assets) = _joint.estimatedTotalAssetsOfProviders();
+            return _assets;
+        }
+        // not (or no longer) a provider of the joint
         return
             want.balanceOf(address(this)).add(
-                JointAPI(joint).estimatedTotalAssetsInToken(address(want))
+                _joint.estimatedTotalAssetsInToken(address(want))
             );
     }
 
@@ -0,0 +1,50 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+
+import "../AggregatorMock.sol";
+
+// Chainlink aggregator proxy (USD feed, 8 decimals) forwarding to an AggregatorMock.
+// Same propose / confirm flow as the live feeds so tests can swap the aggregator.
+contract AggregatorProxyMock {
+    AggregatorMock public aggregator;
+    AggregatorMock public proposedAggregator;
+
+    constructor(address _aggregator) public {
+        aggregator = AggregatorMock(_aggregator);
+    }
+
+    function decimals() external pure returns (uint8) {
+        return 8;
+    }
+
+    function proposeAggregator(address _aggregator) external {
+        proposedAggregator = AggregatorMock(_aggregator);
+    }
+
+    function confirmAggregator(address _aggregator) external {
+        require(
+            _aggregator == address(proposedAggregator),
+            "Invalid proposed aggregator"
+        );
+        aggregator = proposedAggregator;
+        delete proposedAggregator;
+    }
+
+    function latestAnswer() external view returns (int256) {
+        return aggregator.latestAnswer();
+    }
+
+    function latestRoundData()
+        external
+        view
+        returns (
+            uint80 roundId,
+            int256 answer,
+            uint256 startedAt,
+            uint256 updatedAt,
+            uint80 answeredInRound
+        )
+    {
+        return aggregator.latestRoundData();
+    }
+}
@@ -0,0 +1,36 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+
+import "@openzeppelin/contracts/math/SafeMath.sol";
+
+// yearn's CommonHealthCheck limits (profit / loss as bps of the strategy debt), no custom checks
+contract HealthCheckMock {
+    using SafeMath for uint256;
+
+    uint256 private constant MAX_BPS = 10_000;
+
+    uint256 public profitLimitRatio = 100;
+    uint256 public lossLimitRatio = 1;
+
+    function setProfitLimitRatio(uint256 _profitLimitRatio) external {
+        require(_profitLimitRatio < MAX_BPS);
+        profitLimitRatio = _profitLimitRatio;
+    }
+
+    function setlossLimitRatio(uint256 _lossLimitRatio) external {
+        require(_lossLimitRatio < MAX_BPS);
+        lossLimitRatio = _lossLimitRatio;
+    }
+
+    function check(
+        uint256 profit,
+        uint256 loss,
+        uint256 debtPayment,
+        uint256 debtOutstanding,
+        uint256 totalDebt
+    ) external view returns (bool) {
+        return
+            profit <= totalDebt.mul(profitLimitRatio).div(MAX_BPS) &&
+            loss <= totalDebt.mul(lossLimitRatio).div(MAX_BPS);
+    }
+}
@@ -0,0 +1,240 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+pragma experimental ABIEncoderV2;
+
+import {
+    SafeERC20,
+    SafeMath,
+    IERC20
+} from "@openzeppelin/contracts/token/ERC20/SafeERC20.sol";
+import "@openzeppelin/contracts/math/Math.sol";
+import "../../interfaces/IERC20Extended.sol";
+import "../../interfaces/uni/IUniswapV2Pair.sol";
+
+interface IPriceFeed {
+    function latestAnswer() external view returns (int256);
+}
+
+// HedgilV2 pool: hedges the impermanent loss of the caller's LP tokens (paid in quoteToken)
+// for `period`, up to a price move of `maxPriceChange`. Prices come from USD price feeds.
+// The premium is a flat yearly rate over the hedged value instead of hedgil's option pricing.
+contract HedgilV2Mock {
+    using SafeERC20 for IERC20;
+    using SafeMath for uint256;
+
+    struct Hedgil {
+        address owner;
+        uint256 id;
+        address token;
+        uint256 initialQ;
+        uint256 strike;
+        uint256 maxPriceChange;
+        uint256 expiration;
+        uint256 cost;
+    }
+
+    uint256 private constant PRICE_DECIMALS = 1e18;
+    uint256 private constant RATIO_PRECISION = 10_000;
+
+    address public quoteToken;
+    // bps of the hedged value (both sides of the LP) per year
+    uint256 public premium = 500;
+
+    mapping(address => address) public priceFeeds;
+    mapping(uint256 => Hedgil) private hedgils;
+    mapping(uint256 => bool) public closed;
+    uint256 public hedgilCount;
+
+    mapping(address => uint256) public shares;
+    uint256 public totalShares;
+
+    event OpenHedgil(
+        address indexed owner,
+        uint256 indexed id,
+        uint256 strike,
+        uint256 cost
+    );
+    event CloseHedgil(address indexed owner, uint256 indexed id, uint256 payout);
+
+    constructor(address _quoteToken) public {
+        quoteToken = _quoteToken;
+    }
+
+    function setPriceFeed(address token, address feed) external {
+        priceFeeds[token] = feed;
+    }
+
+    function setPremium(uint256 _premium) external {
+        premium = _premium;
+    }
+
+    function provideLiquidity(
+        uint256 amount,
+        uint256 minMint,
+        address to
+    ) external returns (uint256 mint) {
+        uint256 balance = IERC20(quoteToken).balanceOf(address(this));
+        mint = totalShares == 0 ? amount : amount.mul(totalShares).div(balance);
+        require(mint >= minMint, "!minMint");
+        IERC20(quoteToken).safeTransferFrom(msg.sender, address(this), amount);
+        shares[to] = shares[to].add(mint);
+        totalShares = totalShares.add(mint);
+    }
+
+    // price of token in quoteToken units, PRICE_DECIMALS precision
+    function getCurrentPrice(address token) public view returns (uint256) {
+        return
+            _feedPrice(token).mul(PRICE_DECIMALS).div(_feedPrice(quoteToken));
+    }
+
+    function getHedgilByID(uint256 id) external view returns (Hedgil memory) {
+        return hedgils[id];
+    }
+
+    function getTimeToMaturity(uint256 id) external view returns (uint256) {
+        uint256 expiration = hedgils[id].expiration;
+        return expiration > block.timestamp ? expiration - block.timestamp : 0;
+    }
+
+    function getCurrentPayout(uint256 id) external view returns (uint256) {
+        Hedgil memory hedgil = hedgils[id];
+        if (closed[id] || hedgil.initialQ == 0) {
+            return 0;
+        }
+        return _payout(hedgil, getCurrentPrice(hedgil.token));
+    }
+
+    function hedgeLPToken(
+        address pair,
+        uint256 maxPriceChange,
+        uint256 period
+    ) external returns (uint256 id, uint256 strike) {
+        address token = _hedgedToken(pair);
+        uint256 q = _lpAmount(pair, token, msg.sender);
+        require(q > 0, "!amount");
+
+        strike = getCurrentPrice(token);
+        uint256 cost =
+            _value(token, q, strike)
+                .mul(2)
+                .mul(premium)
+                .mul(period)
+                .div(RATIO_PRECISION)
+                .div(365 days);
+        IERC20(quoteToken).safeTransferFrom(msg.sender, address(this), cost);
+
+        id = ++hedgilCount;
+        hedgils[id] = Hedgil({
+            owner: msg.sender,
+            id: id,
+            token: token,
+            initialQ: q,
+            strike: strike,
+            maxPriceChange: maxPriceChange,
+            expiration: block.timestamp.add(period),
+            cost: cost
+        });
+        emit OpenHedgil(msg.sender, id, strike, cost);
+    }
+
+    function closeHedge(uint256 id)
+        external
+        returns (uint256 payout, uint256 exercisePrice)
+    {
+        Hedgil memory hedgil = hedgils[id];
+        require(hedgil.owner == msg.sender, "!owner");
+        require(!closed[id], "closed");
+        closed[id] = true;
+
+        exercisePrice = getCurrentPrice(hedgil.token);
+        payout = Math.min(
+            _payout(hedgil, exercisePrice),
+            IERC20(quoteToken).balanceOf(address(this))
+        );
+        if (payout > 0) {
+            IERC20(quoteToken).safeTransfer(msg.sender, payout);
+        }
+        emit CloseHedgil(msg.sender, id, payout);
+    }
+
+    function _hedgedToken(address pair) internal view returns (address) {
+        address token0 = IUniswapV2Pair(pair).token0();
+        address token1 = IUniswapV2Pair(pair).token1();
+        require(token0 == quoteToken || token1 == quoteToken, "!quoteToken");
+        return token0 == quoteToken ? token1 : token0;
+    }
+
+    // amount of token in the LP tokens held by owner
+    function _lpAmount(
+        address pair,
+        address token,
+        address owner
+    ) internal view returns (uint256) {
+        (uint256 reserve0, uint256 reserve1, ) =
+            IUniswapV2Pair(pair).getReserves();
+        uint256 reserve =
+            token == IUniswapV2Pair(pair).token0() ? reserve0 : reserve1;
+        return
+            IERC20(pair).balanceOf(owner).mul(reserve).div(
+                IERC20(pair).totalSupply()
+            );
+    }
+
+    function _feedPrice(address token) internal view returns (uint256) {
+        require(priceFeeds[token] != address(0), "!feed");
+        int256 price = IPriceFeed(priceFeeds[token]).latestAnswer();
+        require(price > 0, "!price");
+        return uint256(price);
+    }
+
+    // quoteToken amount worth `amount` of token at `price`
+    function _value(
+        address token,
+        uint256 amount,
+        uint256 price
+    ) internal view returns (uint256) {
+        return
+            amount
+                .mul(price)
+                .mul(10**uint256(IERC20Extended(quoteToken).decimals()))
+                .div(PRICE_DECIMALS)
+                .div(10**uint256(IERC20Extended(token).decimals()));
+    }
+
+    // impermanent loss of an LP holding initialQ tokens at strike: q * (sqrt(p) - sqrt(strike))^2
+    // with the price move capped at maxPriceChange, nothing once expired
+    function _payout(Hedgil memory hedgil, uint256 price)
+        internal
+        view
+        returns (uint256)
+    {
+        if (block.timestamp >= hedgil.expiration) {
+            return 0;
+        }
+        uint256 maxMove =
+            hedgil.strike.mul(hedgil.maxPriceChange).div(RATIO_PRECISION);
+        price = Math.min(
+            Math.max(price, hedgil.strike.sub(maxMove)),
+            hedgil.strike.add(maxMove)
+        );
+        uint256 loss =
+            price.add(hedgil.strike).sub(
+                sqrt(price.mul(hedgil.strike)).mul(2)
+            );
+        return _value(hedgil.token, hedgil.initialQ, loss);
+    }
+
+    // babylonian method
+    function sqrt(uint256 y) internal pure returns (uint256 z) {
+        if (y > 3) {
+            z = y;
+            uint256 x = y / 2 + 1;
+            while (x < z) {
+                z = x;
+                x = (y / x + x) / 2;
+            }
+        } else if (y != 0) {
+            z = 1;
+        }
+    }
+}
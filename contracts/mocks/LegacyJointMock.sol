@@ -0,0 +1,47 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+
+// The keeper view of a joint deployed before Joint.autoProtect and a public minTimeToMaturity
+// (e.g. the HegicSushiJoint of scripts/keeper.py), its epoch triggers are set by the tests
+contract LegacyJointMock {
+    address public providerA;
+    address public providerB;
+    address public tokenA;
+    address public tokenB;
+
+    bool public shouldStartEpoch;
+    bool public shouldEndEpoch;
+    uint256 public pendingReward;
+    uint256 public minRewardToHarvest;
+    uint256 public getTimeToMaturity;
+
+    constructor(
+        address _providerA,
+        address _providerB,
+        address _tokenA,
+        address _tokenB
+    ) public {
+        providerA = _providerA;
+        providerB = _providerB;
+        tokenA = _tokenA;
+        tokenB = _tokenB;
+    }
+
+    function setShouldStartEpoch(bool _shouldStartEpoch) external {
+        shouldStartEpoch = _shouldStartEpoch;
+    }
+
+    function setShouldEndEpoch(bool _shouldEndEpoch) external {
+        shouldEndEpoch = _shouldEndEpoch;
+    }
+
+    function setPendingReward(uint256 _pendingReward) external {
+        pendingReward = _pendingReward;
+    }
+
+    function setTimeToMaturity(uint256 _timeToMaturity) external {
+        getTimeToMaturity = _timeToMaturity;
+    }
+
+    function harvest() external {}
+}
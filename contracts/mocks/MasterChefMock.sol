@@ -0,0 +1,133 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+
+import {
+    SafeERC20,
+    SafeMath,
+    IERC20
+} from "@openzeppelin/contracts/token/ERC20/SafeERC20.sol";
+
+// SpookySwap's MasterChef (BOO per second) without owner / dev fees, rewards are pre-funded
+contract MasterChefMock {
+    using SafeERC20 for IERC20;
+    using SafeMath for uint256;
+
+    struct UserInfo {
+        uint256 amount;
+        uint256 rewardDebt;
+    }
+
+    struct PoolInfo {
+        address lpToken;
+        uint256 allocPoint;
+        uint256 lastRewardTime;
+        uint256 accBOOPerShare; // times 1e12
+    }
+
+    IERC20 public boo;
+    uint256 public booPerSecond;
+    uint256 public totalAllocPoint;
+
+    PoolInfo[] public poolInfo;
+    mapping(uint256 => mapping(address => UserInfo)) public userInfo;
+
+    event Deposit(address indexed user, uint256 indexed pid, uint256 amount);
+    event Withdraw(address indexed user, uint256 indexed pid, uint256 amount);
+
+    constructor(address _boo, uint256 _booPerSecond) public {
+        boo = IERC20(_boo);
+        booPerSecond = _booPerSecond;
+    }
+
+    function poolLength() external view returns (uint256) {
+        return poolInfo.length;
+    }
+
+    function add(uint256 _allocPoint, address _lpToken) external {
+        totalAllocPoint = totalAllocPoint.add(_allocPoint);
+        poolInfo.push(
+            PoolInfo({
+                lpToken: _lpToken,
+                allocPoint: _allocPoint,
+                lastRewardTime: block.timestamp,
+                accBOOPerShare: 0
+            })
+        );
+    }
+
+    function _accBOOPerShare(PoolInfo memory pool)
+        internal
+        view
+        returns (uint256)
+    {
+        uint256 lpSupply = IERC20(pool.lpToken).balanceOf(address(this));
+        if (block.timestamp <= pool.lastRewardTime || lpSupply == 0) {
+            return pool.accBOOPerShare;
+        }
+        uint256 elapsed = block.timestamp.sub(pool.lastRewardTime);
+        uint256 booReward =
+            elapsed.mul(booPerSecond).mul(pool.allocPoint).div(
+                totalAllocPoint
+            );
+        return pool.accBOOPerShare.add(booReward.mul(1e12).div(lpSupply));
+    }
+
+    function pendingBOO(uint256 _pid, address _user)
+        external
+        view
+        returns (uint256)
+    {
+        UserInfo memory user = userInfo[_pid][_user];
+        return
+            user.amount.mul(_accBOOPerShare(poolInfo[_pid])).div(1e12).sub(
+                user.rewardDebt
+            );
+    }
+
+    function updatePool(uint256 _pid) public {
+        PoolInfo storage pool = poolInfo[_pid];
+        pool.accBOOPerShare = _accBOOPerShare(pool);
+        pool.lastRewardTime = block.timestamp;
+    }
+
+    function _harvest(uint256 _pid) internal {
+        UserInfo storage user = userInfo[_pid][msg.sender];
+        uint256 pending =
+            user.amount.mul(poolInfo[_pid].accBOOPerShare).div(1e12).sub(
+                user.rewardDebt
+            );
+        if (pending > 0) {
+            uint256 balance = boo.balanceOf(address(this));
+            boo.safeTransfer(msg.sender, pending > balance ? balance : pending);
+        }
+    }
+
+    function deposit(uint256 _pid, uint256 _amount) external {
+        updatePool(_pid);
+        _harvest(_pid);
+
+        UserInfo storage user = userInfo[_pid][msg.sender];
+        PoolInfo storage pool = poolInfo[_pid];
+        IERC20(pool.lpToken).safeTransferFrom(
+            msg.sender,
+            address(this),
+            _amount
+        );
+        user.amount = user.amount.add(_amount);
+        user.rewardDebt = user.amount.mul(pool.accBOOPerShare).div(1e12);
+        emit Deposit(msg.sender, _pid, _amount);
+    }
+
+    function withdraw(uint256 _pid, uint256 _amount) external {
+        UserInfo storage user = userInfo[_pid][msg.sender];
+        require(user.amount >= _amount, "withdraw: not good");
+        updatePool(_pid);
+        _harvest(_pid);
+
+        PoolInfo storage pool = poolInfo[_pid];
+        user.amount = user.amount.sub(_amount);
+        user.rewardDebt = user.amount.mul(pool.accBOOPerShare).div(1e12);
+        IERC20(pool.lpToken).safeTransfer(msg.sender, _amount);
+        emit Withdraw(msg.sender, _pid, _amount);
+    }
+}
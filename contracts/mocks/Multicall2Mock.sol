@@ -0,0 +1,31 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+pragma experimental ABIEncoderV2;
+
+// Multicall2's tryAggregate, the only method scripts/multicall.py uses
+contract Multicall2Mock {
+    struct Call {
+        address target;
+        bytes callData;
+    }
+
+    struct Result {
+        bool success;
+        bytes returnData;
+    }
+
+    function tryAggregate(bool requireSuccess, Call[] memory calls)
+        public
+        returns (Result[] memory returnData)
+    {
+        returnData = new Result[](calls.length);
+        for (uint256 i = 0; i < calls.length; i++) {
+            (bool success, bytes memory ret) =
+                calls[i].target.call(calls[i].callData);
+            if (requireSuccess) {
+                require(success, "Multicall2 aggregate: call failed");
+            }
+            returnData[i] = Result(success, ret);
+        }
+    }
+}
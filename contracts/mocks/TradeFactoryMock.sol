@@ -0,0 +1,29 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+
+// ySwaps TradeFactory stub: keeps track of roles and enabled swaps, never trades
+contract TradeFactoryMock {
+    bytes32 public constant STRATEGY = keccak256("STRATEGY");
+
+    mapping(bytes32 => mapping(address => bool)) public hasRole;
+    // strategy => tokenIn => tokenOut
+    mapping(address => mapping(address => mapping(address => bool)))
+        public enabled;
+
+    function grantRole(bytes32 role, address account) external {
+        hasRole[role][account] = true;
+    }
+
+    function revokeRole(bytes32 role, address account) external {
+        hasRole[role][account] = false;
+    }
+
+    function enable(address _tokenIn, address _tokenOut) external {
+        require(hasRole[STRATEGY][msg.sender], "!strategy");
+        enabled[msg.sender][_tokenIn][_tokenOut] = true;
+    }
+
+    function disable(address _tokenIn, address _tokenOut) external {
+        enabled[msg.sender][_tokenIn][_tokenOut] = false;
+    }
+}
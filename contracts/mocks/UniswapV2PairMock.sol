@@ -0,0 +1,216 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+
+import {
+    SafeERC20,
+    SafeMath,
+    IERC20
+} from "@openzeppelin/contracts/token/ERC20/SafeERC20.sol";
+import "@openzeppelin/contracts/math/Math.sol";
+import "@openzeppelin/contracts/token/ERC20/ERC20.sol";
+
+// UniswapV2Pair (constant product, 0.3% fee) without flash swaps, price accumulators or protocol fee
+contract UniswapV2PairMock is ERC20 {
+    using SafeERC20 for IERC20;
+    using SafeMath for uint256;
+
+    uint256 public constant MINIMUM_LIQUIDITY = 10**3;
+    // ERC20 refuses to mint to address(0), locked liquidity goes here instead
+    address private constant DEAD = 0x000000000000000000000000000000000000dEaD;
+
+    address public factory;
+    address public token0;
+    address public token1;
+
+    uint112 private reserve0;
+    uint112 private reserve1;
+    uint32 private blockTimestampLast;
+
+    uint256 private unlocked = 1;
+
+    event Mint(address indexed sender, uint256 amount0, uint256 amount1);
+    event Burn(
+        address indexed sender,
+        uint256 amount0,
+        uint256 amount1,
+        address indexed to
+    );
+    event Swap(
+        address indexed sender,
+        uint256 amount0In,
+        uint256 amount1In,
+        uint256 amount0Out,
+        uint256 amount1Out,
+        address indexed to
+    );
+    event Sync(uint112 reserve0, uint112 reserve1);
+
+    modifier lock() {
+        require(unlocked == 1, "UniswapV2: LOCKED");
+        unlocked = 0;
+        _;
+        unlocked = 1;
+    }
+
+    constructor() public ERC20("Local LP", "LLP") {
+        factory = msg.sender;
+    }
+
+    function initialize(address _token0, address _token1) external {
+        require(msg.sender == factory, "UniswapV2: FORBIDDEN");
+        token0 = _token0;
+        token1 = _token1;
+    }
+
+    function getReserves()
+        public
+        view
+        returns (
+            uint112 _reserve0,
+            uint112 _reserve1,
+            uint32 _blockTimestampLast
+        )
+    {
+        _reserve0 = reserve0;
+        _reserve1 = reserve1;
+        _blockTimestampLast = blockTimestampLast;
+    }
+
+    function _update(uint256 balance0, uint256 balance1) private {
+        require(
+            balance0 <= uint112(-1) && balance1 <= uint112(-1),
+            "UniswapV2: OVERFLOW"
+        );
+        reserve0 = uint112(balance0);
+        reserve1 = uint112(balance1);
+        blockTimestampLast = uint32(block.timestamp % 2**32);
+        emit Sync(reserve0, reserve1);
+    }
+
+    function _currentBalances() private view returns (uint256, uint256) {
+        return (
+            IERC20(token0).balanceOf(address(this)),
+            IERC20(token1).balanceOf(address(this))
+        );
+    }
+
+    function mint(address to) external lock returns (uint256 liquidity) {
+        (uint256 balance0, uint256 balance1) = _currentBalances();
+        uint256 amount0 = balance0.sub(reserve0);
+        uint256 amount1 = balance1.sub(reserve1);
+
+        uint256 _totalSupply = totalSupply();
+        if (_totalSupply == 0) {
+            liquidity = sqrt(amount0.mul(amount1)).sub(MINIMUM_LIQUIDITY);
+            _mint(DEAD, MINIMUM_LIQUIDITY);
+        } else {
+            liquidity = Math.min(
+                amount0.mul(_totalSupply) / reserve0,
+                amount1.mul(_totalSupply) / reserve1
+            );
+        }
+        require(liquidity > 0, "UniswapV2: INSUFFICIENT_LIQUIDITY_MINTED");
+        _mint(to, liquidity);
+
+        _update(balance0, balance1);
+        emit Mint(msg.sender, amount0, amount1);
+    }
+
+    function burn(address to)
+        external
+        lock
+        returns (uint256 amount0, uint256 amount1)
+    {
+        (uint256 balance0, uint256 balance1) = _currentBalances();
+        uint256 liquidity = balanceOf(address(this));
+
+        uint256 _totalSupply = totalSupply();
+        amount0 = liquidity.mul(balance0) / _totalSupply;
+        amount1 = liquidity.mul(balance1) / _totalSupply;
+        require(
+            amount0 > 0 && amount1 > 0,
+            "UniswapV2: INSUFFICIENT_LIQUIDITY_BURNED"
+        );
+        _burn(address(this), liquidity);
+        IERC20(token0).safeTransfer(to, amount0);
+        IERC20(token1).safeTransfer(to, amount1);
+
+        (balance0, balance1) = _currentBalances();
+        _update(balance0, balance1);
+        emit Burn(msg.sender, amount0, amount1, to);
+    }
+
+    function swap(
+        uint256 amount0Out,
+        uint256 amount1Out,
+        address to,
+        bytes calldata data
+    ) external lock {
+        require(
+            amount0Out > 0 || amount1Out > 0,
+            "UniswapV2: INSUFFICIENT_OUTPUT_AMOUNT"
+        );
+        require(data.length == 0, "UniswapV2: FLASH_SWAPS_NOT_SUPPORTED");
+        (uint112 _reserve0, uint112 _reserve1, ) = getReserves();
+        require(
+            amount0Out < _reserve0 && amount1Out < _reserve1,
+            "UniswapV2: INSUFFICIENT_LIQUIDITY"
+        );
+        require(to != token0 && to != token1, "UniswapV2: INVALID_TO");
+
+        if (amount0Out > 0) IERC20(token0).safeTransfer(to, amount0Out);
+        if (amount1Out > 0) IERC20(token1).safeTransfer(to, amount1Out);
+        (uint256 balance0, uint256 balance1) = _currentBalances();
+
+        uint256 amount0In =
+            balance0 > _reserve0 - amount0Out
+                ? balance0 - (_reserve0 - amount0Out)
+                : 0;
+        uint256 amount1In =
+            balance1 > _reserve1 - amount1Out
+                ? balance1 - (_reserve1 - amount1Out)
+                : 0;
+        require(
+            amount0In > 0 || amount1In > 0,
+            "UniswapV2: INSUFFICIENT_INPUT_AMOUNT"
+        );
+        {
+            // scope to avoid stack too deep errors
+            uint256 balance0Adjusted = balance0.mul(1000).sub(amount0In.mul(3));
+            uint256 balance1Adjusted = balance1.mul(1000).sub(amount1In.mul(3));
+            require(
+                balance0Adjusted.mul(balance1Adjusted) >=
+                    uint256(_reserve0).mul(_reserve1).mul(1000**2),
+                "UniswapV2: K"
+            );
+        }
+
+        _update(balance0, balance1);
+        emit Swap(msg.sender, amount0In, amount1In, amount0Out, amount1Out, to);
+    }
+
+    function skim(address to) external lock {
+        (uint256 balance0, uint256 balance1) = _currentBalances();
+        IERC20(token0).safeTransfer(to, balance0.sub(reserve0));
+        IERC20(token1).safeTransfer(to, balance1.sub(reserve1));
+    }
+
+    function sync() external lock {
+        (uint256 balance0, uint256 balance1) = _currentBalances();
+        _update(balance0, balance1);
+    }
+
+    // babylonian method
+    function sqrt(uint256 y) internal pure returns (uint256 z) {
+        if (y > 3) {
+            z = y;
+            uint256 x = y / 2 + 1;
+            while (x < z) {
+                z = x;
+                x = (y / x + x) / 2;
+            }
+        } else if (y != 0) {
+            z = 1;
+        }
+    }
+}
@@ -0,0 +1,195 @@
+import json
+import os
+import sqlite3
+import threading
+
+from brownie import Contract, chain
+from brownie._config import DATA_FOLDER
+
+from scripts.multicall import Multicall
+
+# bump when the stored format changes, older caches are dropped on open
+SCHEMA_VERSION = 2
+
+CACHE_PATH = os.environ.get(
+    "JOINT_CONTRACT_CACHE", str(DATA_FOLDER.joinpath("joint-contracts.db"))
+)
+
+
+class ContractCache:
+    """
+    On-disk cache (sqlite) of contract ABIs and immutable values, keyed by chain id and address.
+
+    Only values that can never change after deployment / initialization should be stored here
+    (decimals, symbol, token0, vault, pair...). Masterchef pools (pid -> lpToken)
+    are append-only so they are indexed here too (see find_pid).
+
+    The connection can be shared by threads (i.e. status_engine resolving contracts off the
+    event loop), every statement runs under `lock`.
+    """
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        # several processes (xdist workers, sweeps) can share the file, writers wait for each other
+        self.db = sqlite3.connect(
+            path, timeout=60, isolation_level=None, check_same_thread=False
+        )
+        self.lock = threading.RLock()
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("BEGIN EXCLUSIVE")
+        if self.db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            # statement by statement, executescript would commit the exclusive transaction first
+            schema = f"""
+                DROP TABLE IF EXISTS abis;
+                DROP TABLE IF EXISTS immutables;
+                DROP TABLE IF EXISTS pools;
+                CREATE TABLE abis (
+                    chain_id INTEGER, address TEXT, name TEXT, abi TEXT,
+                    PRIMARY KEY (chain_id, address)
+                );
+                CREATE TABLE immutables (
+                    chain_id INTEGER, address TEXT, field TEXT, value TEXT,
+                    PRIMARY KEY (chain_id, address, field)
+                );
+                CREATE TABLE pools (
+                    chain_id INTEGER, masterchef TEXT, pid INTEGER, lp_token TEXT,
+                    PRIMARY KEY (chain_id, masterchef, pid)
+                );
+                CREATE INDEX pools_lp_token ON pools (chain_id, masterchef, lp_token);
+                PRAGMA user_version = {SCHEMA_VERSION}
+                """
+            for statement in schema.split(";"):
+                self.db.execute(statement)
+        self.db.execute("COMMIT")
+        self.db.isolation_level = ""
+
+    def contract(self, address):
+        address = str(address)
+        with self.lock:
+            row = self.db.execute(
+                "SELECT name, abi FROM abis WHERE chain_id=? AND address=?",
+                (chain.id, address),
+            ).fetchone()
+        if row is not None:
+            return Contract.from_abi(row[0], address, json.loads(row[1]))
+
+        # not under the lock, fetching from the explorer doesn't block other threads
+        contract = Contract(address)
+        with self.lock, self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO abis VALUES (?, ?, ?, ?)",
+                (chain.id, address, contract._name, json.dumps(contract.abi)),
+            )
+        return contract
+
+    def read(self, address, fields):
+        # returns the cached subset of fields
+        with self.lock:
+            rows = self.db.execute(
+                f"SELECT field, value FROM immutables WHERE chain_id=? AND address=? "
+                f"AND field IN ({','.join('?' * len(fields))})",
+                (chain.id, str(address), *fields),
+            ).fetchall()
+        return {field: json.loads(value) for field, value in rows}
+
+    def write(self, address, values):
+        with self.lock, self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO immutables VALUES (?, ?, ?, ?)",
+                [
+                    (chain.id, str(address), field, json.dumps(value))
+                    for field, value in values.items()
+                ],
+            )
+
+    def pool_count(self, masterchef):
+        # pids are indexed in order so this is also the next pid to index
+        with self.lock:
+            return self.db.execute(
+                "SELECT COUNT(*) FROM pools WHERE chain_id=? AND masterchef=?",
+                (chain.id, str(masterchef)),
+            ).fetchone()[0]
+
+    def add_pools(self, masterchef, lp_tokens, first_pid):
+        with self.lock, self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO pools VALUES (?, ?, ?, ?)",
+                [
+                    (chain.id, str(masterchef), first_pid + i, str(lp_token))
+                    for i, lp_token in enumerate(lp_tokens)
+                ],
+            )
+
+    def find_pid(self, masterchef, lp_token):
+        # lowest pid of lp_token, None if it's not indexed
+        with self.lock:
+            return self.db.execute(
+                "SELECT MIN(pid) FROM pools WHERE chain_id=? AND masterchef=? AND lp_token=?",
+                (chain.id, str(masterchef), str(lp_token)),
+            ).fetchone()[0]
+
+    def forget(self, address):
+        # use when a "fixed" value is changed by governance (i.e. joint.migrateProvider)
+        with self.lock, self.db:
+            for table in ["abis", "immutables"]:
+                self.db.execute(
+                    f"DELETE FROM {table} WHERE chain_id=? AND address=?",
+                    (chain.id, str(address)),
+                )
+
+
+_cache = None
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        _cache = ContractCache()
+    return _cache
+
+
+def use_cache(cache):
+    # replaces the process cache (i.e. an in-memory one for local networks)
+    global _cache
+    _cache = cache
+
+
+def load_contract(address):
+    return get_cache().contract(address)
+
+
+def cached_reads(contract, fields):
+    """
+    Splits `fields` in the ones already cached and the calls needed to read the rest.
+    Used by multicall read plans: yield the calls and pass the results to `store_reads`.
+    """
+    values = get_cache().read(contract.address, fields)
+    calls = [(getattr(contract, field),) for field in fields if field not in values]
+    return values, calls
+
+
+def store_reads(contract, values, calls, results):
+    fresh = {
+        method.abi["name"]: result
+        for (method,), result in zip(calls, results)
+        if result is not None
+    }
+    if fresh:
+        get_cache().write(contract.address, fresh)
+    values.update(fresh)
+    return values
+
+
+def immutables(contract, fields):
+    # returns the values of `fields` in order, reading only the missing ones (in one multicall)
+    values, calls = cached_reads(contract, fields)
+    if calls:
+        multicall = Multicall()
+        for call in calls:
+            multicall.add(*call)
+        store_reads(contract, values, calls, multicall.execute())
+    return [values.get(field) for field in fields]
+
+
+def immutable(contract, field):
+    return immutables(contract, [field])[0]
@@ -0,0 +1,271 @@
+"""
+Monte Carlo backtest of hedged joint epochs (HedgilV2Joint) over price paths.
+
+An epoch follows what the contracts do:
+- openPosition: tokenB keeps `hedgeBudget` aside for the hedge, the LP is created at the pair
+  price (leftover tokenA stays in the joint) and invested = LP amounts + hedge cost
+- the position accrues rewards (valued in tokenB) while the price moves along the path
+- shouldEndEpoch: the epoch ends as soon as the price leaves `protectionRange` or at `period`.
+  As in the contract, the range is centered on investedB / investedA, hedge cost included
+- closePositionReturnFunds: LP is removed (constant product), hedgil pays the LP impermanent
+  loss with the price move capped at `protectionRange`, and calculateSellToBalance rebalances
+  the balances to the invested ratio through the pair (0.3% fee, price impact included)
+
+Prices are tokenB per tokenA and each provider starts with 1 unit worth of its want, so
+returns are directly comparable with the Harvested profit / totalDebt of each provider.
+Everything is vectorized over paths (floats, this is a model not a port, see joint_math for
+exact integer math) and parameter grids are spread over a process pool.
+
+    brownie run epoch_backtest
+"""
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+RATIO_PRECISION = 10_000
+FEE = 0.997
+SECONDS_PER_YEAR = 365 * 24 * 3600
+
+# time step of the simulated paths
+STEP = 3600
+# hedgil pools refuse to open with less time, epochs end when time to maturity gets there
+MIN_TIME_TO_MATURITY = 3600
+
+DEFAULT_GRID = {
+    "hedgeBudget": [25, 50, 100],
+    "protectionRange": [500, 1000, 1500, 2000],
+    "period": [2 * 86400, 4 * 86400, 7 * 86400],
+}
+
+
+def gbm_paths(n_paths, n_steps, volatility, drift=0.0, step=STEP, seed=None):
+    """
+    Geometric brownian motion price paths starting at 1, shape (n_paths, n_steps + 1).
+    `volatility` and `drift` are annualized.
+    """
+    rng = np.random.default_rng(seed)
+    dt = step / SECONDS_PER_YEAR
+    increments = (drift - volatility**2 / 2) * dt + volatility * np.sqrt(
+        dt
+    ) * rng.standard_normal((n_paths, n_steps))
+    log_prices = np.concatenate(
+        [np.zeros((n_paths, 1)), np.cumsum(increments, axis=1)], axis=1
+    )
+    return np.exp(log_prices)
+
+
+def historical_paths(prices, n_steps, stride=1):
+    """
+    Overlapping windows of a historical price series (one price per step, e.g. from
+    sync_price_series), each one rescaled to start at 1. Shape (n_windows, n_steps + 1).
+    """
+    prices = np.asarray(prices, dtype=float)
+    windows = np.lib.stride_tricks.sliding_window_view(prices, n_steps + 1)[::stride]
+    return windows / windows[:, :1]
+
+
+def sync_price_series(pair, tokenA, from_block, to_block, blocks_per_step):
+    """
+    Pair price (tokenB per tokenA, in token units) replayed from the pair's Sync logs, sampled
+    every `blocks_per_step` blocks (last Sync of each step, carried forward when none).
+    """
+    from brownie import web3
+
+    from scripts.contract_cache import immutable, load_contract
+    from scripts.reserve_mirror import MAX_BLOCK_RANGE, SYNC_TOPIC, decode_sync
+
+    pair = load_contract(pair)
+    token0, token1 = immutable(pair, "token0"), immutable(pair, "token1")
+    decimals0 = immutable(load_contract(token0), "decimals")
+    decimals1 = immutable(load_contract(token1), "decimals")
+
+    n_steps = (to_block - from_block) // blocks_per_step + 1
+    prices = np.full(n_steps, np.nan)
+    for start in range(from_block, to_block + 1, MAX_BLOCK_RANGE):
+        logs = web3.eth.get_logs(
+            {
+                "fromBlock": start,
+                "toBlock": min(start + MAX_BLOCK_RANGE - 1, to_block),
+                "address": pair.address,
+                "topics": [SYNC_TOPIC],
+            }
+        )
+        for log in logs:
+            reserve0, reserve1 = decode_sync(log)
+            price = (reserve1 / 10**decimals1) / (reserve0 / 10**decimals0)
+            if str(tokenA) != token0:
+                price = 1 / price
+            prices[(log["blockNumber"] - from_block) // blocks_per_step] = price
+
+    # carry the last known price forward over steps without Sync
+    known = np.where(~np.isnan(prices), np.arange(n_steps), 0)
+    prices = prices[np.maximum.accumulate(known)]
+    return prices[~np.isnan(prices)]
+
+
+def _get_amount_out(amount_in, reserve_in, reserve_out):
+    amount_in_with_fee = amount_in * FEE
+    return amount_in_with_fee * reserve_out / (reserve_in + amount_in_with_fee)
+
+
+def _calculate_sell_to_balance(
+    current0, current1, starting0, starting1, reserve0, reserve1
+):
+    # Joint._calculateSellToBalance with precision = 1 unit
+    numerator = current0 - starting0 * current1 / starting1
+    exchange_rate = _get_amount_out(1.0, reserve0, reserve1)
+    sell_amount = numerator / (1 + starting0 * exchange_rate / starting1)
+    safe_amount = np.where(sell_amount > 0, sell_amount, 1.0)
+    exchange_rate = _get_amount_out(safe_amount, reserve0, reserve1) / safe_amount
+    return np.where(
+        sell_amount > 0, numerator / (1 + starting0 * exchange_rate / starting1), 0.0
+    )
+
+
+def simulate_epochs(
+    paths,
+    hedgeBudget,
+    protectionRange,
+    period,
+    hedge_cost=1.0,
+    reward_apr=0.0,
+    pool_depth=100.0,
+    step=STEP,
+):
+    """
+    Simulates one epoch per path with the given joint settings.
+
+    - hedge_cost: hedgil premium as a fraction of the budget (the pool charges up to the budget)
+    - reward_apr: farming rewards, as APR over the LP value
+    - pool_depth: pair reserves / joint's LP, drives the price impact of the closing rebalance
+
+    Returns the per path arrays: returnA, returnB (provider returns), ended_early (price left
+    the protection range) and duration (seconds).
+    """
+    paths = np.asarray(paths, dtype=float)
+    budget = hedgeBudget / RATIO_PRECISION
+    protection = protectionRange / RATIO_PRECISION
+    n_steps = min(int((period - MIN_TIME_TO_MATURITY) // step), paths.shape[1] - 1)
+    prices = paths[:, : n_steps + 1]
+    p0 = prices[:, 0]
+
+    # OPEN: tokenB reserves the budget, LP at the pair price, leftover tokenA stays
+    cost = budget * hedge_cost
+    lpB = np.full_like(p0, 1 - budget)
+    lpA = np.minimum(lpB / p0, 1.0)
+    lpB = lpA * p0
+    leftoverA = 1.0 - lpA
+    leftoverB = 1.0 - lpB - cost
+    investedA, investedB = lpA, lpB + cost
+
+    # EPOCH END: first step out of range (shouldEndEpoch) or maturity
+    init_price = investedB / investedA
+    moved = np.abs(prices / init_price[:, None] - 1) * RATIO_PRECISION
+    out = moved[:, 1:] >= protectionRange
+    ended_early = out.any(axis=1)
+    end = np.where(ended_early, out.argmax(axis=1) + 1, n_steps)
+    price = prices[np.arange(len(prices)), end]
+    duration = end * step
+
+    # CLOSE: remove liquidity, hedge payoff (IL capped at the protection range) and rewards
+    k = lpA * lpB
+    balanceA = np.sqrt(k / price) + leftoverA
+    balanceB = np.sqrt(k * price) + leftoverB
+    capped = np.clip(price, p0 * (1 - protection), p0 * (1 + protection))
+    balanceB += lpA * capped + lpB - 2 * np.sqrt(k * capped)
+    balanceB += reward_apr * 2 * lpB * duration / SECONDS_PER_YEAR
+
+    # REBALANCE: calculateSellToBalance + swap through the pair
+    reserveA = np.sqrt(k / price) * pool_depth
+    reserveB = np.sqrt(k * price) * pool_depth
+    sellA = balanceA / investedA > balanceB / investedB
+    sell_amount = np.where(
+        sellA,
+        _calculate_sell_to_balance(
+            balanceA, balanceB, investedA, investedB, reserveA, reserveB
+        ),
+        _calculate_sell_to_balance(
+            balanceB, balanceA, investedB, investedA, reserveB, reserveA
+        ),
+    )
+    safe_amount = np.maximum(sell_amount, 0.0)
+    buyB = _get_amount_out(safe_amount, reserveA, reserveB)
+    buyA = _get_amount_out(safe_amount, reserveB, reserveA)
+    balanceA = np.where(sellA, balanceA - safe_amount, balanceA + buyA)
+    balanceB = np.where(sellA, balanceB + buyB, balanceB - safe_amount)
+
+    return {
+        "returnA": balanceA - 1,
+        "returnB": balanceB - 1,
+        "ended_early": ended_early,
+        "duration": duration,
+    }
+
+
+def summarize(result, params):
+    summary = dict(params)
+    for side in ["A", "B"]:
+        returns = result[f"return{side}"]
+        summary[f"mean{side}"] = returns.mean()
+        summary[f"std{side}"] = returns.std()
+        summary[f"p5{side}"] = np.percentile(returns, 5)
+        summary[f"p95{side}"] = np.percentile(returns, 95)
+    summary["endedEarly"] = result["ended_early"].mean()
+    summary["meanDuration"] = result["duration"].mean()
+    # per year, assuming epochs are rolled one after the other
+    summary["aprB"] = summary["meanB"] * SECONDS_PER_YEAR / summary["meanDuration"]
+    return summary
+
+
+_paths = None
+
+
+def _init_worker(paths):
+    global _paths
+    _paths = paths
+
+
+def _run(params, options):
+    return summarize(simulate_epochs(_paths, **params, **options), params)
+
+
+def grid(**values):
+    # every combination of the given parameter values, e.g. grid(hedgeBudget=[25, 50], ...)
+    keys = list(values.keys())
+    return [
+        dict(zip(keys, combination))
+        for combination in itertools.product(*values.values())
+    ]
+
+
+def sweep(paths, parameter_grid, workers=None, **options):
+    """
+    Runs simulate_epochs for every set of parameters in `parameter_grid` (see grid) over the
+    same paths, spread over `workers` processes. Returns one summary per parameter set.
+    """
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(
+        workers, initializer=_init_worker, initargs=(paths,)
+    ) as pool:
+        futures = [pool.submit(_run, params, options) for params in parameter_grid]
+        return [future.result() for future in futures]
+
+
+def main(volatility=0.8, n_paths=10_000, reward_apr=0.2):
+    max_period = max(DEFAULT_GRID["period"])
+    paths = gbm_paths(n_paths, max_period // STEP, volatility, seed=0)
+    results = sweep(paths, grid(**DEFAULT_GRID), reward_apr=reward_apr)
+
+    print(
+        f"{n_paths} paths, {volatility:.0%} volatility, {reward_apr:.0%} rewards APR\n"
+        f"{'budget':>7} {'range':>6} {'days':>5} | {'mean A':>8} {'mean B':>8} "
+        f"{'p5 B':>8} {'early':>6} {'APR B':>8}"
+    )
+    for r in sorted(results, key=lambda r: -r["aprB"]):
+        print(
+            f"{r['hedgeBudget']/100:>6}% {r['protectionRange']/100:>5}% "
+            f"{r['period']/86400:>5} | {r['meanA']:>8.3%} {r['meanB']:>8.3%} "
+            f"{r['p5B']:>8.3%} {r['endedEarly']:>6.1%} {r['aprB']:>8.2%}"
+        )
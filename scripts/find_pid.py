@@ -1,22 +1,69 @@
-from brownie import Contract
+from brownie import web3
 
-def main():
+from scripts.contract_cache import get_cache, load_contract
+from scripts.multicall import Multicall
 
-    # BOO - WFTM
-    lp_token_to_find = "0x5965E53aa80a0bcF1CD6dbDd72e6A9b2AA047410"
+MASTERCHEFS = {
+    "SPOOKY": "0x2b2929E785374c651a81A63878Ab22742656DcDd",
+    "SPIRIT": "0x9083EA3756BDE6Ee6f27a6e996806FBD37F6F093",
+    "SUSHI": "0xc2EdaD668740f1aA35E4D8f227fB8E17dcA888Cd",
+}
 
-    # SPOOKY
-    masterchef = Contract("0x2b2929E785374c651a81A63878Ab22742656DcDd")
+# poolInfo calls per aggregate call
+POOL_BATCH_SIZE = 250
 
-    i = 0
-    res = ""
-    while (i < 1e6):
-        print(f"Trying with i = {i}")
-        res = masterchef.poolInfo(i)["lpToken"]
-        if res == lp_token_to_find:
+
+def _lp_token_calls(masterchef, pids):
+    # MiniChef keeps lp tokens in their own array, MasterChef in poolInfo
+    if hasattr(masterchef, "lpToken"):
+        return [(masterchef.lpToken, pid) for pid in pids]
+    return [(masterchef.poolInfo, pid) for pid in pids]
+
+
+def update_index(masterchef):
+    """
+    Indexes the pools added to `masterchef` since the last update (pools are only ever
+    appended so already indexed pids never change). Returns the number of new pools.
+    """
+    cache = get_cache()
+    start = cache.pool_count(masterchef)
+    block = web3.eth.block_number
+    (length,) = _execute([(masterchef.poolLength,)], block)
+    if length <= start:
+        return 0
+
+    lp_tokens = []
+    for result in _execute(_lp_token_calls(masterchef, range(start, length)), block):
+        if result is None:
             break
-        else:
-            i += 1
-    
-    print(f"Success with i = {i}, lp_token {lp_token_to_find} found")
-    
+        lp_tokens.append(result if isinstance(result, str) else result[0])
+    cache.add_pools(masterchef, lp_tokens, start)
+    return len(lp_tokens)
+
+
+def _execute(calls, block):
+    multicall = Multicall(block, POOL_BATCH_SIZE)
+    for call in calls:
+        multicall.add(*call)
+    return multicall.execute()
+
+
+def find_pid(masterchef, lp_token):
+    # pid of lp_token in masterchef, None if it has no pool
+    cache = get_cache()
+    lp_token = web3.toChecksumAddress(str(lp_token))
+    pid = cache.find_pid(masterchef, lp_token)
+    if pid is None and update_index(masterchef) > 0:
+        pid = cache.find_pid(masterchef, lp_token)
+    return pid
+
+
+def main(lp_token_to_find="0x5965E53aa80a0bcF1CD6dbDd72e6A9b2AA047410", dex="SPOOKY"):
+    # default: BOO - WFTM in SPOOKY
+    masterchef = load_contract(MASTERCHEFS[dex])
+
+    pid = find_pid(masterchef, lp_token_to_find)
+    if pid is None:
+        print(f"lp_token {lp_token_to_find} has no pool in {dex} masterchef")
+    else:
+        print(f"Success with i = {pid}, lp_token {lp_token_to_find} found")
@@ -0,0 +1,218 @@
+"""
+Caching JSON-RPC proxy between a fork node (ganache / hardhat) and its upstream RPC.
+
+Fork nodes read remote state lazily (eth_getStorageAt, eth_getCode, eth_getBalance...) at the
+fork block, and that state never changes, so answers for a given block are stored on disk
+(sqlite) and served from there on later runs. Once a suite has run against a fork block, it
+runs again at that block without any upstream call.
+
+Requests for moving targets ("latest", "pending", no block) are always forwarded.
+
+    brownie run fork_cache --network ftm-main     # proxy to ftm-main on FORK_CACHE_PORT
+    python -m scripts.fork_cache <upstream url> [port]
+"""
+import json
+import os
+import sqlite3
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.request import Request, urlopen
+
+from brownie._config import DATA_FOLDER
+
+CACHE_PATH = os.environ.get("FORK_CACHE", str(DATA_FOLDER.joinpath("fork-cache.db")))
+PORT = int(os.environ.get("FORK_CACHE_PORT", 8546))
+
+# methods whose answer is fixed once the block they are read at is fixed (last param)
+BLOCK_METHODS = {
+    "eth_getStorageAt",
+    "eth_getCode",
+    "eth_getBalance",
+    "eth_getTransactionCount",
+    "eth_getBlockByNumber",
+    "eth_call",
+}
+# methods whose answer never changes for a given upstream
+STATIC_METHODS = {
+    "eth_chainId",
+    "net_version",
+    "eth_getBlockByHash",
+    "eth_getTransactionByHash",
+    "eth_getTransactionReceipt",
+}
+
+
+def _is_block_number(value):
+    return isinstance(value, str) and value.startswith("0x") or isinstance(value, int)
+
+
+def cache_key(request):
+    # None when the request can't be cached
+    method, params = request.get("method"), request.get("params", [])
+    if method in STATIC_METHODS:
+        return json.dumps([method, params])
+    if method in BLOCK_METHODS and params:
+        block = params[0] if method == "eth_getBlockByNumber" else params[-1]
+        if isinstance(block, dict):
+            # EIP-1898 block parameter
+            block = block.get("blockNumber") or block.get("blockHash")
+        if _is_block_number(block):
+            return json.dumps([method, params])
+    return None
+
+
+class ForkCache:
+    """
+    sqlite store of upstream answers: (upstream, request key) -> result. Also remembers the
+    last fork block used with each upstream, so later runs fork the same (cached) block.
+    """
+
+    def __init__(self, path=CACHE_PATH):
+        self.db = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        with self.db:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(upstream TEXT, key TEXT, result TEXT, PRIMARY KEY (upstream, key))"
+            )
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS fork_blocks (upstream TEXT PRIMARY KEY, block INTEGER)"
+            )
+        self.lock = threading.Lock()
+
+    def get(self, upstream, key):
+        with self.lock:
+            row = self.db.execute(
+                "SELECT result FROM responses WHERE upstream=? AND key=?",
+                (upstream, key),
+            ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def put(self, upstream, key, result):
+        with self.lock, self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?)",
+                (upstream, key, json.dumps(result)),
+            )
+
+    def fork_block(self, upstream):
+        with self.lock:
+            row = self.db.execute(
+                "SELECT block FROM fork_blocks WHERE upstream=?", (upstream,)
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def set_fork_block(self, upstream, block):
+        with self.lock, self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO fork_blocks VALUES (?, ?)", (upstream, block)
+            )
+
+
+def _post(url, payload):
+    request = Request(
+        url,
+        data=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with urlopen(request, timeout=120) as response:
+        return json.loads(response.read())
+
+
+def upstream_block_number(upstream):
+    response = _post(
+        upstream, {"jsonrpc": "2.0", "id": 1, "method": "eth_blockNumber", "params": []}
+    )
+    return int(response["result"], 16)
+
+
+class ForkCacheProxy(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, upstream, port=PORT, cache=None):
+        self.upstream = upstream
+        self.cache = cache or ForkCache()
+        self.hits = self.misses = 0
+        super().__init__(("127.0.0.1", port), _Handler)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def handle_requests(self, requests):
+        answers = [None] * len(requests)
+        forward = []
+        for i, request in enumerate(requests):
+            key = cache_key(request)
+            result = None if key is None else self.cache.get(self.upstream, key)
+            if result is None:
+                forward.append((i, key))
+            else:
+                self.hits += 1
+                answers[i] = {
+                    "jsonrpc": "2.0",
+                    "id": request.get("id"),
+                    "result": result,
+                }
+
+        self.misses += len(forward)
+        for (i, key), response in zip(
+            forward, self._forward([requests[i] for i, _ in forward])
+        ):
+            if key is not None and response.get("result") is not None:
+                self.cache.put(self.upstream, key, response["result"])
+            answers[i] = response
+        return answers
+
+    def _forward(self, requests):
+        # misses go upstream as one batch, one by one if the upstream doesn't do batches
+        if len(requests) == 1:
+            return [_post(self.upstream, requests[0])]
+        responses = _post(self.upstream, requests) if requests else []
+        if not isinstance(responses, list):
+            return [_post(self.upstream, request) for request in requests]
+        by_id = {response.get("id"): response for response in responses}
+        return [by_id[request.get("id")] for request in requests]
+
+    def start(self):
+        # serves from a daemon thread, returns the proxy url
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self.url
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if isinstance(payload, list):
+            answer = self.server.handle_requests(payload)
+        else:
+            (answer,) = self.server.handle_requests([payload])
+        body = json.dumps(answer).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(upstream, port=PORT):
+    proxy = ForkCacheProxy(upstream, port)
+    print(f"Caching {upstream} on {proxy.url} ({CACHE_PATH})")
+    try:
+        proxy.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n{proxy.hits} hits, {proxy.misses} misses")
+
+
+def main():
+    from brownie import web3
+
+    serve(web3.provider.endpoint_uri)
+
+
+if __name__ == "__main__":
+    serve(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else PORT)
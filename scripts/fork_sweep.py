@@ -0,0 +1,260 @@
+"""
+Validates hedge settings (setHedgeBudget / setProtectionRange / setHedgingPeriod) on local
+forks, many combinations at once.
+
+An epoch-started joint state is dumped once from an anvil fork (anvil_dumpState), then every
+worker process starts its own anvil on the same fork block, loads the dump and runs its share
+of the combinations, reverting to the loaded state (evm_snapshot / evm_revert) between them.
+For each combination the worker:
+1. sets the hedge parameters on the joint (as vault governance, impersonated)
+2. rolls the epoch (providerA + providerB harvests) so a new one opens with them
+3. waits `hold` of the period (optionally running a `scenario`, e.g. a price dump)
+4. ends the epoch and reports the profit / loss of both Harvested events
+
+Workers only use web3 (ABIs are sent from the main process) so they don't need brownie.
+
+    brownie run fork_sweep main <joint address>
+"""
+import os
+import socket
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.util import Finalize
+
+from web3 import HTTPProvider, Web3
+
+from scripts.epoch_backtest import DEFAULT_GRID, grid
+
+ANVIL = os.environ.get("ANVIL", "anvil")
+# seconds to wait for a freshly started anvil
+ANVIL_STARTUP_TIMEOUT = 30
+
+
+def fork_url():
+    # upstream RPC of the active fork network (or FORK_URL)
+    from brownie._config import CONFIG
+
+    url = os.environ.get("FORK_URL")
+    if url:
+        return url
+    fork = CONFIG.active_network.get("cmd_settings", {}).get("fork")
+    if fork in CONFIG.networks:
+        return CONFIG.networks[fork]["host"]
+    if fork is None:
+        raise ValueError("active network is not a fork, set FORK_URL")
+    return fork
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_anvil(url, block):
+    """
+    Starts an anvil forking `url` at `block` on a free port.
+    Returns (process, web3), the process is killed when the current process exits.
+    """
+    port = _free_port()
+    process = subprocess.Popen(
+        [
+            ANVIL,
+            "--fork-url",
+            url,
+            "--fork-block-number",
+            str(block),
+            "--port",
+            str(port),
+            "--base-fee",
+            "0",
+            "--silent",
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    Finalize(process, process.terminate, exitpriority=10)
+
+    w3 = Web3(HTTPProvider(f"http://127.0.0.1:{port}", request_kwargs={"timeout": 600}))
+    deadline = time.time() + ANVIL_STARTUP_TIMEOUT
+    while not w3.isConnected():
+        if process.poll() is not None or time.time() > deadline:
+            raise RuntimeError(f"anvil did not start on port {port}")
+        time.sleep(0.2)
+    return process, w3
+
+
+def _request(w3, method, params):
+    response = w3.provider.make_request(method, params)
+    if "error" in response:
+        raise RuntimeError(f"{method}: {response['error']}")
+    return response["result"]
+
+
+def _impersonate(w3, account):
+    _request(w3, "anvil_impersonateAccount", [account])
+    _request(w3, "anvil_setBalance", [account, hex(10**21)])
+
+
+def _transact(w3, function, sender):
+    tx_hash = function.transact({"from": sender, "gasPrice": 0})
+    receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+    if receipt["status"] != 1:
+        raise RuntimeError(f"{function.fn_name} reverted")
+    return receipt
+
+
+class SweepContracts:
+    # web3 contracts of the joint and its providers, built from ABIs and addresses
+    def __init__(self, w3, spec):
+        self.joint = w3.eth.contract(spec["joint"], abi=spec["jointAbi"])
+        self.providerA = w3.eth.contract(spec["providerA"], abi=spec["providerAbi"])
+        self.providerB = w3.eth.contract(spec["providerB"], abi=spec["providerAbi"])
+        self.gov = spec["gov"]
+
+
+def _harvest(w3, contracts, provider):
+    receipt = _transact(w3, provider.functions.harvest(), contracts.gov)
+    (event,) = provider.events.Harvested().processReceipt(receipt)
+    return event["args"]
+
+
+def roll_epoch(w3, contracts):
+    # closes the running epoch and opens a new one (same as harvest_providers)
+    a = _harvest(w3, contracts, contracts.providerA)
+    b = _harvest(w3, contracts, contracts.providerB)
+    return a, b
+
+
+def run_config(w3, contracts, params, hold, scenario=None):
+    joint = contracts.joint
+    _transact(w3, joint.functions.setHedgeBudget(params["hedgeBudget"]), contracts.gov)
+    _transact(
+        w3, joint.functions.setProtectionRange(params["protectionRange"]), contracts.gov
+    )
+    _transact(w3, joint.functions.setHedgingPeriod(params["period"]), contracts.gov)
+    roll_epoch(w3, contracts)
+    investedA = joint.functions.investedA().call()
+    investedB = joint.functions.investedB().call()
+
+    _request(w3, "evm_increaseTime", [int(params["period"] * hold)])
+    _request(w3, "evm_mine", [])
+    if scenario is not None:
+        scenario(w3, contracts)
+
+    a, b = roll_epoch(w3, contracts)
+    return {
+        **params,
+        "investedA": investedA,
+        "investedB": investedB,
+        "profitA": a["profit"],
+        "lossA": a["loss"],
+        "profitB": b["profit"],
+        "lossB": b["loss"],
+        "returnA": (a["profit"] - a["loss"]) / investedA if investedA else 0,
+        "returnB": (b["profit"] - b["loss"]) / investedB if investedB else 0,
+    }
+
+
+_worker = {}
+
+
+def _init_worker(url, block, state, spec):
+    _, w3 = start_anvil(url, block)
+    _request(w3, "anvil_loadState", [state])
+    _impersonate(w3, spec["gov"])
+    _worker["w3"] = w3
+    _worker["contracts"] = SweepContracts(w3, spec)
+    _worker["snapshot"] = _request(w3, "evm_snapshot", [])
+
+
+def _run(params, hold, scenario):
+    w3 = _worker["w3"]
+    # back to the loaded state, a snapshot can only be reverted once
+    _request(w3, "evm_revert", [_worker["snapshot"]])
+    _worker["snapshot"] = _request(w3, "evm_snapshot", [])
+    try:
+        return run_config(w3, _worker["contracts"], params, hold, scenario)
+    except Exception as error:
+        return {**params, "error": repr(error)}
+
+
+def sweep_spec(joint):
+    # addresses and ABIs the workers need, read through brownie in the main process
+    from scripts.contract_cache import immutable, load_contract
+
+    # providers can be migrated, they are not cached
+    providerA, providerB = [
+        load_contract(p) for p in (joint.providerA(), joint.providerB())
+    ]
+    vaultA = load_contract(immutable(providerA, "vault"))
+    return {
+        "joint": joint.address,
+        "jointAbi": joint.abi,
+        "providerA": providerA.address,
+        "providerB": providerB.address,
+        "providerAbi": providerA.abi,
+        "gov": vaultA.governance(),
+    }
+
+
+def epoch_started_state(url, block, spec):
+    """
+    Dumps the state of an anvil fork at `block` where the joint has a running epoch
+    (one is started if needed). Returns the anvil_dumpState blob.
+    """
+    process, w3 = start_anvil(url, block)
+    try:
+        _impersonate(w3, spec["gov"])
+        contracts = SweepContracts(w3, spec)
+        if contracts.joint.functions.investedA().call() == 0:
+            roll_epoch(w3, contracts)
+        return _request(w3, "anvil_dumpState", [])
+    finally:
+        process.terminate()
+
+
+def sweep(
+    joint, parameter_grid, hold=0.5, scenario=None, workers=None, block=None, url=None
+):
+    """
+    Runs every parameter set of `parameter_grid` (see epoch_backtest.grid) on its own copy of
+    the same epoch-started fork state, spread over `workers` anvil instances.
+    `scenario(w3, contracts)` runs mid-epoch, it has to be picklable (module level function).
+    """
+    from brownie import web3
+
+    url = url or fork_url()
+    block = block or web3.eth.block_number
+    spec = sweep_spec(joint)
+    state = epoch_started_state(url, block, spec)
+
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(
+        workers, initializer=_init_worker, initargs=(url, block, state, spec)
+    ) as pool:
+        futures = [
+            pool.submit(_run, params, hold, scenario) for params in parameter_grid
+        ]
+        return [future.result() for future in futures]
+
+
+def main(joint_address, workers=None, hold=0.5):
+    from scripts.contract_cache import load_contract
+
+    start = time.time()
+    results = sweep(
+        load_contract(joint_address),
+        grid(**DEFAULT_GRID),
+        hold=float(hold),
+        workers=int(workers) if workers else None,
+    )
+    print(f"{len(results)} configurations in {time.time() - start:,.0f}s")
+    print(f"{'budget':>7} {'range':>6} {'days':>5} | {'return A':>9} {'return B':>9}")
+    for r in results:
+        line = f"{r['hedgeBudget']/100:>6}% {r['protectionRange']/100:>5}% {r['period']/86400:>5} |"
+        if "error" in r:
+            print(f"{line} {r['error']}")
+        else:
+            print(f"{line} {r['returnA']:>9.4%} {r['returnB']:>9.4%}")
@@ -0,0 +1,107 @@
+"""
+Gas used per contract function (external calls and internal functions) of transactions, from
+their traces, and comparison against a stored baseline.
+
+Gas of a function includes the functions it calls, the same way `tx.call_trace()` shows it,
+and is summed over all the calls to the function.
+"""
+import json
+import os
+from collections import defaultdict
+
+from brownie._config import __version__ as BROWNIE_VERSION
+
+# brownie versions whose trace internals (see _trace_internals) were checked
+SUPPORTED_BROWNIE_VERSIONS = ("1.18.", "1.19.")
+
+
+def _trace_internals():
+    """
+    The private brownie APIs trace_gas relies on, kept here so a brownie upgrade only has to be
+    checked in one place: returns (same_frame(step, previous_step), steps_gas(tx, start, stop)).
+    Raises on other brownie versions instead of silently measuring something else.
+    """
+    if not BROWNIE_VERSION.startswith(SUPPORTED_BROWNIE_VERSIONS):
+        raise RuntimeError(
+            f"gas_profile relies on brownie internals checked for "
+            f"{', '.join(v + 'x' for v in SUPPORTED_BROWNIE_VERSIONS)}, "
+            f"not {BROWNIE_VERSION}: check _trace_internals and update "
+            f"SUPPORTED_BROWNIE_VERSIONS"
+        )
+    from brownie.network.transaction import _step_compare
+
+    def steps_gas(tx, start, stop):
+        # gas of trace[start:stop], called functions and refunds included
+        return tx._get_trace_gas(start, stop)[1]
+
+    return _step_compare, steps_gas
+
+
+def trace_gas(tx):
+    # {"Contract.function": gas} of tx (needs debug_traceTransaction)
+    same_frame, steps_gas = _trace_internals()
+    trace = tx.trace
+    gas = defaultdict(int)
+    gas[trace[0]["fn"]] += steps_gas(tx, 0, len(trace))
+
+    # (index, depth, jumpDepth) of the steps entering / leaving a function
+    index = [(0, 0, 0)] + [
+        (i, trace[i]["depth"], trace[i]["jumpDepth"])
+        for i in range(1, len(trace))
+        if not same_frame(trace[i], trace[i - 1])
+    ]
+    for i, (idx, depth, jump_depth) in enumerate(index[1:], start=1):
+        last = index[i - 1]
+        if depth > last[1]:
+            # external call, ends when returning to the caller
+            end = next((x[0] for x in index[i + 1 :] if x[1] < depth), len(trace))
+        elif depth == last[1] and jump_depth > last[2]:
+            # internal function, ends when jumping back
+            end = next(
+                (
+                    x[0]
+                    for x in index[i + 1 :]
+                    if x[1] < depth or (x[1] == depth and x[2] < jump_depth)
+                ),
+                len(trace),
+            )
+        else:
+            continue
+        gas[trace[idx]["fn"]] += steps_gas(tx, idx, end)
+    return dict(gas)
+
+
+def txs_gas(txs):
+    """
+    Gas of a sequence of transactions: `gas_used` of each one (keyed "tx <n> Contract.fn") and
+    the gas per function over all of them.
+    """
+    gas = defaultdict(int)
+    for n, tx in enumerate(txs):
+        gas[f"tx {n} {tx.contract_name}.{tx.fn_name}"] = tx.gas_used
+        for fn, fn_gas in trace_gas(tx).items():
+            gas[fn] += fn_gas
+    return dict(gas)
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(path, gas):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(gas, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def regressions(baseline, gas, threshold):
+    # [(key, baseline gas, gas)] of the keys using more than (1 + threshold) times their baseline
+    return [
+        (key, baseline[key], value)
+        for key, value in sorted(gas.items())
+        if key in baseline and value > baseline[key] * (1 + threshold)
+    ]
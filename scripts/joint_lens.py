@@ -0,0 +1,117 @@
+"""
+Reads the status of any number of joints in a single eth_call through JointLens
+(contracts/JointLens.sol) and decodes it into JointStatus.
+"""
+from dataclasses import dataclass
+
+from brownie import Contract, JointLens, chain, web3
+from brownie._config import CONFIG
+
+# deployed lenses per chain id, other networks set CONFIG.active_network["joint_lens"]
+# (see deploy_joint_lens)
+JOINT_LENS_ADDRESSES = {}
+
+# JointLens.JointStatus fields, in the order the contract returns them
+JOINT_STATUS_FIELDS = (
+    "joint",
+    "success",
+    "providerA",
+    "providerB",
+    "totalDebtA",
+    "totalDebtB",
+    "estimatedTotalAssetsA",
+    "estimatedTotalAssetsB",
+    "investedA",
+    "investedB",
+    "balanceOfA",
+    "balanceOfB",
+    "balanceOfStake",
+    "balanceOfPair",
+    "lpBalanceA",
+    "lpBalanceB",
+    "pendingReward",
+    "hedgeProfitA",
+    "hedgeProfitB",
+    "activeHedgeID",
+    "timeToMaturity",
+    "reserveA",
+    "reserveB",
+    "shouldStartEpoch",
+    "shouldEndEpoch",
+    "assetsAfterBalanceA",
+    "assetsAfterBalanceB",
+)
+
+
+@dataclass(frozen=True)
+class JointStatus:
+    # a joint read by JointLens at `block`. estimatedTotalAssetsA/B are the providers' own
+    # (0 if it reverted), assetsAfterBalanceA/B the joint's estimatedTotalAssetsAfterBalance
+    __slots__ = ("block",) + JOINT_STATUS_FIELDS
+    block: int
+    joint: str
+    # False if reading the joint reverted, every other field is then empty
+    success: bool
+    providerA: str
+    providerB: str
+    totalDebtA: int
+    totalDebtB: int
+    estimatedTotalAssetsA: int
+    estimatedTotalAssetsB: int
+    investedA: int
+    investedB: int
+    balanceOfA: int
+    balanceOfB: int
+    balanceOfStake: int
+    balanceOfPair: int
+    lpBalanceA: int
+    lpBalanceB: int
+    pendingReward: int
+    hedgeProfitA: int
+    hedgeProfitB: int
+    activeHedgeID: int
+    timeToMaturity: int
+    reserveA: int
+    reserveB: int
+    shouldStartEpoch: bool
+    shouldEndEpoch: bool
+    assetsAfterBalanceA: int
+    assetsAfterBalanceB: int
+
+
+def joint_lens():
+    # the lens of the active network, None if there isn't one
+    address = CONFIG.active_network.get("joint_lens") or JOINT_LENS_ADDRESSES.get(
+        chain.id
+    )
+    if address is None:
+        return None
+    return Contract.from_abi("JointLens", address, JointLens.abi)
+
+
+def deploy_joint_lens(account):
+    lens = account.deploy(JointLens)
+    CONFIG.active_network["joint_lens"] = lens.address
+    return lens
+
+
+def decode_statuses(returned, block):
+    # getStatuses output -> [JointStatus]
+    return [JointStatus(block, *status) for status in returned]
+
+
+def read_joint_statuses(joints, lens=None, block_identifier=None):
+    # status of every joint, all read at the same block in one eth_call
+    lens = lens or joint_lens()
+    if lens is None:
+        raise ValueError(f"no JointLens on chain {chain.id}, see deploy_joint_lens")
+    block = web3.eth.block_number if block_identifier is None else block_identifier
+    returned = lens.getStatuses.call(
+        [str(joint) for joint in joints], block_identifier=block
+    )
+    return decode_statuses(returned, block)
+
+
+def read_joint_status(joint, lens=None, block_identifier=None):
+    (status,) = read_joint_statuses([joint], lens, block_identifier)
+    return status
@@ -0,0 +1,181 @@
+"""
+Integer ports of Joint view logic, so it can be evaluated off-chain from raw state.
+They follow the solidity code operation by operation (floor divisions included) so results
+match the contracts exactly.
+"""
+from scripts.uniswap_math import get_amount_out
+
+RATIO_PRECISION = 10_000
+
+# PRICE_DECIMALS constant of each hedge implementation
+PRICE_DECIMALS = {
+    "hedgil": 10**18,
+    "hegic": 10**8,
+}
+
+
+def pair_price(reserveA, reserveB, decimalsA, decimalsB, price_decimals):
+    # tokenB per tokenA, as in _isWithinRange
+    return reserveB * 10**decimalsA * price_decimals // reserveA // 10**decimalsB
+
+
+def init_price(investedA, investedB, decimalsA, decimalsB, price_decimals):
+    # initial price of the epoch, as in shouldEndEpoch
+    return investedB * 10**decimalsA * price_decimals // investedA // 10**decimalsB
+
+
+def is_within_range(
+    oracle_price, max_slippage, reserveA, reserveB, decimalsA, decimalsB, price_decimals
+):
+    # HedgilV2Joint._isWithinRange / HegicJoint._isWithinRange
+    if oracle_price == 0:
+        return False
+
+    current_pair_price = pair_price(
+        reserveA, reserveB, decimalsA, decimalsB, price_decimals
+    )
+    ratio = current_pair_price * RATIO_PRECISION // oracle_price
+    if current_pair_price > oracle_price:
+        return ratio < RATIO_PRECISION + max_slippage
+    return ratio > RATIO_PRECISION - max_slippage
+
+
+def is_price_out_of_range(
+    investedA,
+    investedB,
+    protection_range,
+    reserveA,
+    reserveB,
+    decimalsA,
+    decimalsB,
+    price_decimals,
+):
+    # price half of shouldEndEpoch: pair price moved more than protectionRange since the epoch start
+    # (the other half, time to maturity, is in the hedge pool)
+    if investedA == 0 or investedB == 0:
+        return False
+
+    return not is_within_range(
+        init_price(investedA, investedB, decimalsA, decimalsB, price_decimals),
+        protection_range,
+        reserveA,
+        reserveB,
+        decimalsA,
+        decimalsB,
+        price_decimals,
+    )
+
+
+def get_ratios(currentA, currentB, startingA, startingB):
+    # Joint.getRatios
+    return (
+        currentA * RATIO_PRECISION // startingA,
+        currentB * RATIO_PRECISION // startingB,
+    )
+
+
+def _calculate_sell_to_balance(
+    current0, current1, starting0, starting1, reserve0, reserve1, precision
+):
+    # Joint._calculateSellToBalance
+    numerator = (current0 - starting0 * current1 // starting1) * precision
+
+    # First time to approximate
+    exchange_rate = get_amount_out(precision, reserve0, reserve1)
+    sell_amount = numerator // (precision + starting0 * exchange_rate // starting1)
+    if sell_amount == 0:
+        return 0
+
+    # Second time to account for price impact
+    exchange_rate = (
+        get_amount_out(sell_amount, reserve0, reserve1) * precision // sell_amount
+    )
+    return numerator // (precision + starting0 * exchange_rate // starting1)
+
+
+def calculate_sell_to_balance(
+    currentA, currentB, startingA, startingB, reserveA, reserveB, decimalsA, decimalsB
+):
+    """
+    Joint.calculateSellToBalance, returns ("A" | "B" | None, amount to sell) so that
+    current balances end up in the same ratio as the starting ones.
+    """
+    if startingA == 0 or startingB == 0:
+        return None, 0
+
+    ratioA, ratioB = get_ratios(currentA, currentB, startingA, startingB)
+    if ratioA == ratioB:
+        return None, 0
+
+    if ratioA > ratioB:
+        return "A", _calculate_sell_to_balance(
+            currentA,
+            currentB,
+            startingA,
+            startingB,
+            reserveA,
+            reserveB,
+            10**decimalsA,
+        )
+    return "B", _calculate_sell_to_balance(
+        currentB, currentA, startingB, startingA, reserveB, reserveA, 10**decimalsB
+    )
+
+
+def balance_of_tokens_in_lp(
+    reserveA, reserveB, lp_balance, pair_decimals, total_supply
+):
+    # Joint.balanceOfTokensInLP, lp_balance being balanceOfStake + balanceOfPair
+    pair_precision = 10**pair_decimals
+    percent_total = lp_balance * pair_precision // total_supply
+    return (
+        reserveA * percent_total // pair_precision,
+        reserveB * percent_total // pair_precision,
+    )
+
+
+def estimated_total_assets_after_balance(state):
+    """
+    Joint.estimatedTotalAssetsAfterBalance evaluated from raw state (see
+    joint_snapshot.joint_state_plan). Values can be replaced to evaluate other scenarios
+    (e.g. reserves after a price move) without any call.
+
+    The reward swap goes through the router (its own fee and path) so its output is part of
+    the state (`rewardOut`) instead of being recomputed.
+    Only valid for UniswapV2 pairs: SolidexJoint overrides it with the Solidly curve.
+    """
+    balanceA, balanceB = balance_of_tokens_in_lp(
+        state["reserveA"],
+        state["reserveB"],
+        state["lpBalance"],
+        state["pairDecimals"],
+        state["totalSupply"],
+    )
+    balanceA += state["balanceOfA"] + state["callProfit"]
+    balanceB += state["balanceOfB"] + state["putProfit"]
+
+    if state["rewardSwapTo"] == "A":
+        balanceA += state["rewardOut"]
+    elif state["rewardSwapTo"] == "B":
+        balanceB += state["rewardOut"]
+
+    sell_token, sell_amount = calculate_sell_to_balance(
+        balanceA,
+        balanceB,
+        state["investedA"],
+        state["investedB"],
+        state["reserveA"],
+        state["reserveB"],
+        state["decimalsA"],
+        state["decimalsB"],
+    )
+    if sell_token == "A":
+        buy_amount = get_amount_out(sell_amount, state["reserveA"], state["reserveB"])
+        balanceA -= sell_amount
+        balanceB += buy_amount
+    elif sell_token == "B":
+        buy_amount = get_amount_out(sell_amount, state["reserveB"], state["reserveA"])
+        balanceB -= sell_amount
+        balanceA += buy_amount
+
+    return balanceA, balanceB
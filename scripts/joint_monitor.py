@@ -0,0 +1,149 @@
+import time
+
+from brownie import web3
+from eth_utils import keccak
+
+from scripts.joint_snapshot import joint_light_plan, joint_plan
+from scripts.multicall import run_plans
+from scripts.reserve_mirror import SYNC_TOPIC, ReserveMirror
+
+HARVESTED_TOPIC = "0x" + keccak(text="Harvested(uint256,uint256,uint256,uint256)").hex()
+
+# blocks between two refreshes of the values that can't be followed through logs
+# (pending rewards, estimated assets, hedge payout). They move every block, so every block by
+# default: it is a single multicall for all joints. Higher values trade freshness for RPC load,
+# the reserves are then kept up to date from Sync logs in between
+LIGHT_REFRESH_BLOCKS = 1
+# blocks between two checkpoints of the reserve mirror
+MIRROR_SAVE_BLOCKS = 100
+# seconds between two polls of the chain head
+POLL_INTERVAL = 2
+
+
+class JointMonitor:
+    """
+    Keeps joint snapshots up to date following the chain head instead of re-reading everything.
+
+    - `Harvested` in any of the providers means an epoch was started / ended (liquidity added or
+      removed, hedge opened or closed, debt changed) so the joint gets a full snapshot
+    - `Sync` in the joint's pair carries the new reserves, they are applied to a local mirror
+      (see ReserveMirror) and the joint's reserves are updated without any call
+    - values that need a call (estimated assets, hedge payout, pending rewards) are refreshed
+      every `light_refresh_blocks` (every block by default)
+    - time to maturity is computed locally from the hedge expiration and the block timestamp
+
+    All logs of a block range are fetched with a single eth_getLogs and all refreshes of a block
+    go into the same multicall.
+    """
+
+    def __init__(
+        self,
+        joints,
+        oracle,
+        render,
+        light_refresh_blocks=LIGHT_REFRESH_BLOCKS,
+        mirror=None,
+        mirror_save_blocks=MIRROR_SAVE_BLOCKS,
+    ):
+        self.joints = joints
+        self.oracle = oracle
+        self.render = render
+        self.light_refresh_blocks = light_refresh_blocks
+        self.mirror = ReserveMirror() if mirror is None else mirror
+        self.mirror_save_blocks = mirror_save_blocks
+        self.snapshots = {}
+        self.block = None
+        self.last_light_refresh = None
+        self.last_mirror_save = None
+
+    def _refresh(self, full, light, block):
+        joints = full + light
+        plans = [joint_plan(joint, self.oracle) for joint in full]
+        plans += [joint_light_plan(self.snapshots[joint.address]) for joint in light]
+        for joint, snapshot in zip(joints, run_plans(plans, block["number"])):
+            self.snapshots[joint.address] = snapshot
+
+        self._render(joints, block, full)
+
+    def _render(self, joints, block, full):
+        for joint in joints:
+            snapshot = self.snapshots[joint.address]
+            if snapshot["expiration"] is not None:
+                snapshot["timeToMaturity"] = max(
+                    snapshot["expiration"] - block["timestamp"], 0
+                )
+            self.render(snapshot, block, joint in full)
+
+    def _mirror_reserves(self, joints):
+        for joint in joints:
+            snapshot = self.snapshots[joint.address]
+            snapshot["reserves"] = self.mirror.reserves(
+                snapshot["pair"], snapshot["tokenA"]
+            )
+
+    def start(self):
+        block = web3.eth.get_block("latest")
+        self._refresh(list(self.joints), [], block)
+        # the mirror catches up from its checkpoint, new pairs are read at the same block
+        self.mirror.sync(block["number"])
+        self.mirror.track(
+            [self.snapshots[joint.address]["pair"] for joint in self.joints]
+        )
+        self.mirror.save()
+        self.block = self.last_light_refresh = self.last_mirror_save = block["number"]
+
+    def _watched_addresses(self):
+        # address -> [(joint, refresh)], several joints can share the same pair
+        watched = {}
+        for joint in self.joints:
+            snapshot = self.snapshots[joint.address]
+            for address in [snapshot["providerA"], snapshot["providerB"]]:
+                watched.setdefault(str(address), []).append((joint, "full"))
+            watched.setdefault(str(snapshot["pair"]), []).append((joint, "sync"))
+        return watched
+
+    def on_block(self, block):
+        watched = self._watched_addresses()
+        logs = web3.eth.get_logs(
+            {
+                "fromBlock": self.block + 1,
+                "toBlock": block["number"],
+                "address": list(watched.keys()),
+                "topics": [[HARVESTED_TOPIC, SYNC_TOPIC]],
+            }
+        )
+
+        # reserves first, any snapshot refreshed below reads the same block
+        self.mirror.apply(logs, block["number"])
+
+        triggered = [entry for log in logs for entry in watched[log["address"]]]
+        full, light, synced = [], [], []
+        for joint, refresh in triggered:
+            if refresh == "full" and joint not in full:
+                full.append(joint)
+
+        if block["number"] - self.last_light_refresh >= self.light_refresh_blocks:
+            light = [joint for joint in self.joints if joint not in full]
+            self.last_light_refresh = block["number"]
+        else:
+            for joint, refresh in triggered:
+                if refresh == "sync" and joint not in full + synced:
+                    synced.append(joint)
+
+        if full or light:
+            self._refresh(full, light, block)
+        if synced:
+            self._mirror_reserves(synced)
+            self._render(synced, block, [])
+        if block["number"] - self.last_mirror_save >= self.mirror_save_blocks:
+            self.mirror.save()
+            self.last_mirror_save = block["number"]
+        self.block = block["number"]
+
+    def run(self, poll_interval=POLL_INTERVAL):
+        self.start()
+        while True:
+            block = web3.eth.get_block("latest")
+            if block["number"] > self.block:
+                self.on_block(block)
+            time.sleep(poll_interval)
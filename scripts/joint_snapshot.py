@@ -0,0 +1,425 @@
+from dataclasses import dataclass
+
+from brownie import interface, web3
+
+from scripts.contract_cache import cached_reads, load_contract, store_reads
+from scripts.multicall import run_plan, run_plans
+
+# providers are not immutable (Joint.migrateProvider), they are read every round 1
+JOINT_IMMUTABLES = [
+    "name",
+    "tokenA",
+    "tokenB",
+    "reward",
+    "pair",
+]
+HEDGE_IMMUTABLES = {
+    "hegic": ["hegicCallOptionsPool", "hegicPutOptionsPool"],
+    "hedgil": ["hedgilPool"],
+    "nohedge": [],
+}
+TOKEN_IMMUTABLES = ["symbol", "decimals"]
+
+
+def hedge_type(joint):
+    if hasattr(joint, "activeCallID"):
+        return "hegic"
+    if hasattr(joint, "activeHedgeID"):
+        return "hedgil"
+    return "nohedge"
+
+
+def _check_reads(contract, values, fields):
+    # values the next rounds depend on: a reverted read fails the plan (as in joint_state_plan)
+    reverted = [field for field in fields if values.get(field) is None]
+    if reverted:
+        raise ValueError(f"{contract.address}: {', '.join(reverted)} reverted")
+
+
+def joint_plan(joint, oracle):
+    """
+    Read plan (see multicall.run_plans) collecting everything joint-status needs from a joint.
+    Reads are grouped in 3 rounds, each one depending on addresses / ids read in the previous one.
+    Immutable values (addresses, symbols, decimals) come from the contract cache when available.
+    """
+    snapshot = {"joint": joint, "hedge_type": hedge_type(joint)}
+
+    # ROUND 1: joint state
+    fixed, fixed_calls = cached_reads(
+        joint, JOINT_IMMUTABLES + HEDGE_IMMUTABLES[snapshot["hedge_type"]]
+    )
+    calls = [
+        (joint.providerA,),
+        (joint.providerB,),
+        (joint.investedA,),
+        (joint.investedB,),
+        (joint.getReserves,),
+        (joint.pendingReward,),
+        (joint.estimatedTotalAssetsAfterBalance,),
+    ]
+    if snapshot["hedge_type"] == "hegic":
+        calls += [(joint.activeCallID,), (joint.activePutID,)]
+    elif snapshot["hedge_type"] == "hedgil":
+        calls += [(joint.activeHedgeID,)]
+    if snapshot["hedge_type"] != "nohedge":
+        calls += [
+            (joint.protectionRange,),
+            (joint.getTimeToMaturity,),
+            (joint.getHedgeProfit,),
+        ]
+
+    results = yield fixed_calls + calls
+    fixed = store_reads(joint, fixed, fixed_calls, results[: len(fixed_calls)])
+    (
+        providerA,
+        providerB,
+        snapshot["investedA"],
+        snapshot["investedB"],
+        snapshot["reserves"],
+        snapshot["pendingReward"],
+        snapshot["estimatedTotalAssets"],
+        *hedge,
+    ) = results[len(fixed_calls) :]
+
+    _check_reads(
+        joint,
+        dict(fixed, providerA=providerA, providerB=providerB),
+        ["providerA", "providerB", "tokenA", "tokenB", "reward", "pair"],
+    )
+    # None when the read reverted, like the other values
+    snapshot["name"] = fixed.get("name")
+    snapshot["pair"] = fixed["pair"]
+    snapshot["providerA"] = providerA = load_contract(providerA)
+    snapshot["providerB"] = providerB = load_contract(providerB)
+    snapshot["tokenA"] = tokenA = load_contract(fixed["tokenA"])
+    snapshot["tokenB"] = tokenB = load_contract(fixed["tokenB"])
+    snapshot["reward"] = reward = load_contract(fixed["reward"])
+
+    # ROUND 2: providers, token metadata and hedge positions
+    contracts = [providerA, providerB, tokenA, tokenB, reward]
+    fields = [["vault"], ["vault"]] + [TOKEN_IMMUTABLES] * 3
+    cached = [cached_reads(contract, f) for contract, f in zip(contracts, fields)]
+    fixed_calls = [call for _, contract_calls in cached for call in contract_calls]
+
+    calls = [
+        (providerA.balanceOfWant,),
+        (providerB.balanceOfWant,),
+        (providerA.harvestTrigger, 100),
+        (providerB.harvestTrigger, 100),
+    ]
+    if snapshot["hedge_type"] == "hegic":
+        snapshot["activeCallID"], snapshot["activePutID"], *hedge = hedge
+        callPool = fixed.get("hegicCallOptionsPool")
+        putPool = fixed.get("hegicPutOptionsPool")
+        # ids and pools are None when the read reverted
+        if (
+            snapshot["activeCallID"]
+            and snapshot["activePutID"]
+            and callPool
+            and putPool
+        ):
+            calls += [
+                (load_contract(callPool).options, snapshot["activeCallID"]),
+                (load_contract(putPool).options, snapshot["activePutID"]),
+            ]
+    elif snapshot["hedge_type"] == "hedgil":
+        snapshot["activeHedgeID"], *hedge = hedge
+        if snapshot["activeHedgeID"] and fixed.get("hedgilPool"):
+            calls += [
+                (
+                    load_contract(fixed["hedgilPool"]).getHedgilByID,
+                    snapshot["activeHedgeID"],
+                )
+            ]
+    if snapshot["hedge_type"] != "nohedge":
+        (
+            snapshot["protectionRange"],
+            snapshot["timeToMaturity"],
+            snapshot["hedgeProfit"],
+        ) = hedge
+
+    results = yield fixed_calls + calls
+    offset = 0
+    for contract, (values, contract_calls) in zip(contracts, cached):
+        store_reads(
+            contract,
+            values,
+            contract_calls,
+            results[offset : offset + len(contract_calls)],
+        )
+        offset += len(contract_calls)
+    (
+        snapshot["balanceOfWantA"],
+        snapshot["balanceOfWantB"],
+        snapshot["harvestTriggerA"],
+        snapshot["harvestTriggerB"],
+        *positions,
+    ) = results[offset:]
+
+    providerA_fixed, providerB_fixed, tokenA_fixed, tokenB_fixed, reward_fixed = [
+        values for values, _ in cached
+    ]
+    _check_reads(providerA, providerA_fixed, ["vault"])
+    _check_reads(providerB, providerB_fixed, ["vault"])
+    _check_reads(tokenA, tokenA_fixed, ["decimals"])
+    _check_reads(tokenB, tokenB_fixed, ["decimals"])
+    _check_reads(reward, reward_fixed, ["decimals"])
+    snapshot["symbolA"] = tokenA_fixed.get("symbol")
+    snapshot["decimalsA"] = tokenA_fixed["decimals"]
+    snapshot["symbolB"] = tokenB_fixed.get("symbol")
+    snapshot["decimalsB"] = tokenB_fixed["decimals"]
+    snapshot["rewardSymbol"] = reward_fixed.get("symbol")
+    snapshot["rewardDecimals"] = reward_fixed["decimals"]
+
+    snapshot["expiration"] = None
+    if snapshot["hedge_type"] == "hegic" and positions:
+        snapshot["callInfo"], snapshot["putInfo"] = positions
+        if snapshot["callInfo"] is not None:
+            snapshot["expiration"] = snapshot["callInfo"][4]
+    elif snapshot["hedge_type"] == "hedgil" and positions:
+        (snapshot["hedgilPosition"],) = positions
+        if snapshot["hedgilPosition"] is not None:
+            snapshot["expiration"] = snapshot["hedgilPosition"]["expiration"]
+
+    snapshot["vaultA"] = vaultA = load_contract(providerA_fixed["vault"])
+    snapshot["vaultB"] = vaultB = load_contract(providerB_fixed["vault"])
+
+    # ROUND 3: vault accounting and usd prices
+    (
+        snapshot["strategyA"],
+        snapshot["strategyB"],
+        priceA,
+        priceB,
+        rewardPrice,
+    ) = yield [
+        (vaultA.strategies, providerA),
+        (vaultB.strategies, providerB),
+        (oracle.getNormalizedValueUsdc, tokenA, 10 ** snapshot["decimalsA"]),
+        (oracle.getNormalizedValueUsdc, tokenB, 10 ** snapshot["decimalsB"]),
+        (oracle.getNormalizedValueUsdc, reward, 10 ** snapshot["rewardDecimals"]),
+    ]
+    snapshot["priceA"] = priceA / 10**6 if priceA is not None else None
+    snapshot["priceB"] = priceB / 10**6 if priceB is not None else None
+    snapshot["rewardPrice"] = rewardPrice / 10**6 if rewardPrice is not None else None
+
+    return snapshot
+
+
+def joint_light_plan(snapshot):
+    """
+    Read plan refreshing only the values of a snapshot that change every block
+    (rewards accrual, hedge payout and the resulting assets estimation).
+    Everything else stays as in the last full snapshot.
+    """
+    joint = snapshot["joint"]
+    calls = [
+        (joint.getReserves,),
+        (joint.pendingReward,),
+        (joint.estimatedTotalAssetsAfterBalance,),
+        (snapshot["providerA"].balanceOfWant,),
+        (snapshot["providerB"].balanceOfWant,),
+    ]
+    if snapshot["hedge_type"] != "nohedge":
+        calls += [(joint.getHedgeProfit,)]
+
+    snapshot = dict(snapshot)
+    (
+        snapshot["reserves"],
+        snapshot["pendingReward"],
+        snapshot["estimatedTotalAssets"],
+        snapshot["balanceOfWantA"],
+        snapshot["balanceOfWantB"],
+        *hedge,
+    ) = yield calls
+    if hedge:
+        (snapshot["hedgeProfit"],) = hedge
+
+    return snapshot
+
+
+def joint_state_plan(joint):
+    """
+    Read plan collecting the raw state joint_math.estimated_total_assets_after_balance needs
+    to reproduce Joint.estimatedTotalAssetsAfterBalance off-chain.
+    """
+    # ROUND 1: joint balances, reserves, rewards and hedge payout
+    fixed, fixed_calls = cached_reads(
+        joint, ["tokenA", "tokenB", "reward", "pair", "WETH", "router"]
+    )
+    results = yield fixed_calls + [
+        (joint.investedA,),
+        (joint.investedB,),
+        (joint.getReserves,),
+        (joint.balanceOfStake,),
+        (joint.balanceOfPair,),
+        (joint.balanceOfA,),
+        (joint.balanceOfB,),
+        (joint.balanceOfReward,),
+        (joint.pendingReward,),
+        (joint.getHedgeProfit,),
+    ]
+    fixed = store_reads(joint, fixed, fixed_calls, results[: len(fixed_calls)])
+    (
+        investedA,
+        investedB,
+        reserves,
+        balanceOfStake,
+        balanceOfPair,
+        balanceOfA,
+        balanceOfB,
+        balanceOfReward,
+        pendingReward,
+        hedgeProfit,
+    ) = results[len(fixed_calls) :]
+    # estimatedTotalAssetsAfterBalance reverts as well when any of these does
+    for name, value in [("getReserves", reserves), ("getHedgeProfit", hedgeProfit)]:
+        if value is None:
+            raise ValueError(f"{joint.address}: {name} reverted")
+    (reserveA, reserveB), (callProfit, putProfit) = reserves, hedgeProfit
+    state = {
+        "investedA": investedA,
+        "investedB": investedB,
+        "reserveA": reserveA,
+        "reserveB": reserveB,
+        "lpBalance": balanceOfStake + balanceOfPair,
+        "balanceOfA": balanceOfA,
+        "balanceOfB": balanceOfB,
+        "callProfit": callProfit,
+        "putProfit": putProfit,
+        "rewardsPending": pendingReward + balanceOfReward,
+    }
+
+    # ROUND 2: decimals, lp supply and the reward swap (Joint.findSwapTo / getTokenOutPath)
+    tokenA, tokenB, reward, weth = [
+        fixed[field] for field in ["tokenA", "tokenB", "reward", "WETH"]
+    ]
+    pair = load_contract(fixed["pair"])
+    contracts = [load_contract(tokenA), load_contract(tokenB), pair]
+    cached = [cached_reads(contract, ["decimals"]) for contract in contracts]
+    fixed_calls = [call for _, contract_calls in cached for call in contract_calls]
+
+    calls = [(pair.totalSupply,)]
+    state["rewardOut"] = state["rewardsPending"]
+    if reward == tokenA:
+        state["rewardSwapTo"] = "A"
+    elif reward == tokenB:
+        state["rewardSwapTo"] = "B"
+    else:
+        swap_to = weth if weth in (tokenA, tokenB) else tokenA
+        state["rewardSwapTo"] = "A" if swap_to == tokenA else "B"
+        path = (
+            [reward, swap_to] if weth in (reward, swap_to) else [reward, weth, swap_to]
+        )
+        if state["rewardsPending"] != 0:
+            router = load_contract(fixed["router"])
+            calls += [(router.getAmountsOut, state["rewardsPending"], path)]
+
+    results = yield fixed_calls + calls
+    offset = 0
+    for contract, (values, contract_calls) in zip(contracts, cached):
+        store_reads(
+            contract,
+            values,
+            contract_calls,
+            results[offset : offset + len(contract_calls)],
+        )
+        offset += len(contract_calls)
+    state["totalSupply"], *amounts_out = results[offset:]
+    if amounts_out:
+        state["rewardOut"] = amounts_out[0][-1]
+
+    (state["decimalsA"], state["decimalsB"], state["pairDecimals"]) = [
+        values["decimals"] for values, _ in cached
+    ]
+    return state
+
+
+def snapshot_joints(joints, oracle, block_identifier=None):
+    # one snapshot per joint, all of them read at the same block
+    return run_plans(
+        [joint_plan(joint, oracle) for joint in joints],
+        block_identifier=block_identifier,
+    )
+
+
+@dataclass(frozen=True)
+class JointBalances:
+    # joint and providers balances, all read at `block` (see read_joint_balances)
+    __slots__ = (
+        "block",
+        "balanceOfA",
+        "balanceOfB",
+        "balanceOfStake",
+        "balanceOfPair",
+        "estimatedTotalAssetsA",
+        "estimatedTotalAssetsB",
+    )
+    block: int
+    balanceOfA: int
+    balanceOfB: int
+    balanceOfStake: int
+    balanceOfPair: int
+    estimatedTotalAssetsA: int
+    estimatedTotalAssetsB: int
+
+
+@dataclass(frozen=True)
+class StrategyState:
+    # strategy assets and its vault accounting, read at `block` (see read_strategy_state)
+    __slots__ = (
+        "block",
+        "estimatedTotalAssets",
+        "debtRatio",
+        "totalDebt",
+        "totalGain",
+        "totalLoss",
+    )
+    block: int
+    estimatedTotalAssets: int
+    debtRatio: int
+    totalDebt: int
+    totalGain: int
+    totalLoss: int
+
+
+def joint_balances_plan(joint, providerA, providerB, block):
+    # read plan of a JointBalances, no cached values: tests redeploy at the same addresses
+    values = yield [
+        (joint.balanceOfA,),
+        (joint.balanceOfB,),
+        (joint.balanceOfStake,),
+        (joint.balanceOfPair,),
+        (providerA.estimatedTotalAssets,),
+        (providerB.estimatedTotalAssets,),
+    ]
+    return JointBalances(block, *values)
+
+
+def strategy_state_plan(strategy, block, vault):
+    # read plan of a StrategyState, a single round
+    estimated_total_assets, params = yield [
+        (strategy.estimatedTotalAssets,),
+        (vault.strategies, strategy),
+    ]
+    params = params.dict()
+    return StrategyState(
+        block,
+        estimated_total_assets,
+        params["debtRatio"],
+        params["totalDebt"],
+        params["totalGain"],
+        params["totalLoss"],
+    )
+
+
+def read_joint_balances(joint, providerA, providerB, block_identifier=None):
+    block = web3.eth.block_number if block_identifier is None else block_identifier
+    return run_plan(joint_balances_plan(joint, providerA, providerB, block), block)
+
+
+def read_strategy_state(strategy, vault=None, block_identifier=None):
+    # one Multicall2 round, plus a strategy.vault() call first when the vault isn't given
+    block = web3.eth.block_number if block_identifier is None else block_identifier
+    if vault is None:
+        vault = interface.VaultAPI(strategy.vault(block_identifier=block))
+    return run_plan(strategy_state_plan(strategy, block, vault), block)
@@ -0,0 +1,193 @@
+"""
+Keeper loop for a fleet of joints: every block, one KeeperRouter.scan call
+(contracts/KeeperRouter.sol) tells which joints need an action, the router then rolls the epochs
+that have to start / end and claims the rewards, one transaction each for the whole fleet.
+
+    brownie run keeper --network ftm-main
+"""
+import time
+from dataclasses import dataclass
+
+import click
+from brownie import accounts, web3
+
+from scripts.contract_cache import load_contract
+from scripts.keeper_router import keeper_router
+
+# KeeperRouter scan actions
+START_EPOCH = 1
+END_EPOCH = 2
+CLAIM_REWARDS = 4
+AUTO_PROTECT = 8
+SCAN_FAILED = 128
+
+# KeeperRouter scan reasons
+REASONS = {
+    0: None,
+    1: "idle funds",
+    2: "hedge expiring",
+    3: "price out of range",
+}
+
+# seconds between two polls of the chain head
+POLL_INTERVAL = 2
+# min blocks between two reward claims of the same joint: rewards accrue every block, without it
+# a joint over its minRewardToHarvest would be claimed again every block
+CLAIM_INTERVAL = 1000
+
+
+@dataclass(frozen=True)
+class JointActions:
+    # what a joint needs, from KeeperRouter.scan at `block`
+    __slots__ = ("block", "joint", "actions", "reason")
+    block: int
+    joint: str
+    actions: int
+    reason: int
+
+    def needs(self, action):
+        return not self.actions & SCAN_FAILED and bool(self.actions & action)
+
+    def describe(self):
+        if self.actions & SCAN_FAILED:
+            return "unable to scan"
+        names = [
+            name
+            for action, name in [
+                (START_EPOCH, "start epoch"),
+                (END_EPOCH, "end epoch"),
+                (CLAIM_REWARDS, "claim rewards"),
+                (AUTO_PROTECT, "auto-protect trips"),
+            ]
+            if self.actions & action
+        ]
+        if REASONS.get(self.reason) is not None:
+            names.append(f"({REASONS[self.reason]})")
+        return ", ".join(names) or "nothing to do"
+
+
+def decode_scan(joints, actions, reasons, block):
+    # scan output (one byte per joint in actions and reasons) -> [JointActions]
+    return [
+        JointActions(block, str(joint), action, reason)
+        for joint, action, reason in zip(joints, actions, reasons)
+    ]
+
+
+def scan(joints, router=None, block_identifier=None):
+    # actions needed by every joint, all read at the same block in one eth_call
+    router = router or keeper_router()
+    if router is None:
+        raise ValueError("no KeeperRouter on this network, see deploy_keeper_router")
+    block = web3.eth.block_number if block_identifier is None else block_identifier
+    actions, reasons = router.scan.call(
+        [str(joint) for joint in joints], block_identifier=block
+    )
+    return decode_scan(joints, actions, reasons, block)
+
+
+class Keeper:
+    """
+    Acts on the scan of every new block: rollTriggered for the joints whose epoch has to start
+    or end (the router checks the providers' triggers again and skips failing joints) and
+    claimRewards for the ones with pending rewards to claim, at most once every `claim_interval`
+    blocks per joint. Nothing is sent when nothing is needed.
+
+    Joints whose auto-protection trips (AUTO_PROTECT) are rolled first, in their own transaction,
+    so closing them doesn't share the gas of the rest of the fleet. Once rolled they stop
+    investing until their managers say otherwise, they are kept in `protected`.
+    """
+
+    def __init__(
+        self, joints, account, router=None, call_cost=0, claim_interval=CLAIM_INTERVAL
+    ):
+        self.joints = joints
+        self.account = account
+        self.router = router or keeper_router()
+        self.call_cost = call_cost
+        self.claim_interval = claim_interval
+        self.block = None
+        # joint -> block of its last claim (or roll, closing the position claims as well)
+        self.last_claim = {}
+        # joint -> block its epoch was ended by auto-protection
+        self.protected = {}
+
+    def _can_claim(self, joint, block):
+        last = self.last_claim.get(joint)
+        return last is None or block - last >= self.claim_interval
+
+    def step(self, block):
+        scanned = scan(self.joints, self.router, block)
+        for joint in scanned:
+            if joint.actions != 0:
+                print(f"#{block} {joint.joint}: {joint.describe()}")
+
+        protect = [j.joint for j in scanned if j.needs(AUTO_PROTECT)]
+        if protect:
+            tx = self._roll(protect, block)
+            if "Rolled" in tx.events:
+                for rolled in tx.events["Rolled"]:
+                    self.protected[str(rolled["joint"])] = block
+                    print(
+                        f"#{block} {rolled['joint']}: auto-protected, it doesn't invest "
+                        "anymore (dontInvestWant) until its managers re-enable it"
+                    )
+
+        roll = [
+            j.joint
+            for j in scanned
+            if j.needs(START_EPOCH | END_EPOCH) and j.joint not in protect
+        ]
+        if roll:
+            self._roll(roll, block)
+
+        # closing the position already claims the rewards
+        claim = [
+            j.joint
+            for j in scanned
+            if j.needs(CLAIM_REWARDS)
+            and j.joint not in roll
+            and j.joint not in protect
+            and self._can_claim(j.joint, block)
+        ]
+        if claim:
+            tx = self.router.claimRewards(claim, {"from": self.account})
+            self._record(tx, "RewardsClaimed", block)
+            self._print_failures(tx, "ClaimFailed", block)
+        return scanned
+
+    def _roll(self, joints, block):
+        tx = self.router.rollTriggered(joints, self.call_cost, {"from": self.account})
+        self._record(tx, "Rolled", block)
+        self._print_failures(tx, "RollFailed", block)
+        return tx
+
+    def _record(self, tx, event, block):
+        # joints with an `event` in tx have just claimed their rewards
+        if event in tx.events:
+            for done in tx.events[event]:
+                self.last_claim[str(done["joint"])] = block
+
+    def _print_failures(self, tx, event, block):
+        if event in tx.events:
+            for failed in tx.events[event]:
+                print(f"#{block} {failed['joint']}: {event}")
+
+    def run(self, poll_interval=POLL_INTERVAL):
+        while True:
+            block = web3.eth.block_number
+            if self.block is None or block > self.block:
+                self.step(block)
+                self.block = block
+            time.sleep(poll_interval)
+
+
+def main():
+    joints = [
+        # HegicSushiJoint(WETH-USDC)
+        load_contract("0x997F3E5cae4455cFD225B5E43d2382C7f6B7c6E4"),
+    ]
+    account = accounts.load(
+        click.prompt("Keeper account", type=click.Choice(accounts.load()))
+    )
+    Keeper(joints, account).run()
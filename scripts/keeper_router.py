@@ -0,0 +1,28 @@
+"""
+KeeperRouter (contracts/KeeperRouter.sol) harvests both providers of joints in one transaction.
+The router has to be the keeper of the providers and the sender one of its keepers.
+"""
+from brownie import Contract, KeeperRouter, chain
+from brownie._config import CONFIG
+
+# deployed routers per chain id, other networks set CONFIG.active_network["keeper_router"]
+# (see deploy_keeper_router)
+KEEPER_ROUTER_ADDRESSES = {}
+
+
+def keeper_router():
+    # the router of the active network, None if there isn't one
+    address = CONFIG.active_network.get("keeper_router") or KEEPER_ROUTER_ADDRESSES.get(
+        chain.id
+    )
+    if address is None:
+        return None
+    return Contract.from_abi("KeeperRouter", address, KeeperRouter.abi)
+
+
+def deploy_keeper_router(account, keepers=()):
+    router = account.deploy(KeeperRouter)
+    for keeper in keepers:
+        router.setKeeper(keeper, True, {"from": account})
+    CONFIG.active_network["keeper_router"] = router.address
+    return router
@@ -0,0 +1,182 @@
+"""
+Local DeFi environment (contracts/mocks) to run joints without a fork: tokens, a UniswapV2
+factory / router, a masterchef, HedgilV2 pools, USD price feeds, a trade factory, a health
+check, Multicall2 (used by scripts/multicall.py) and JointLens (scripts/joint_lens.py).
+Everything is deployed on demand, the first time it's needed.
+
+Tokens get the symbol and decimals of the Fantom tokens they stand for, a USD price feed and
+a large balance in the `whale` account. Pairs are seeded at the feed prices (POOL_VALUE per
+side) from the whale, who keeps the LP tokens.
+
+    brownie run local_env --network development
+"""
+from brownie import (
+    AggregatorMock,
+    AggregatorProxyMock,
+    Contract,
+    HealthCheckMock,
+    HedgilV2Mock,
+    JointLens,
+    MasterChefMock,
+    Multicall2Mock,
+    SpookyJoint,
+    TokenMock,
+    TradeFactoryMock,
+    UniswapV2FactoryMock,
+    UniswapV2PairMock,
+    UniswapV2RouterMock,
+    accounts,
+    chain,
+)
+from brownie._config import CONFIG
+
+from scripts.contract_cache import ContractCache, use_cache
+
+DECIMALS = {"USDC": 6, "fUSDT": 6, "USDT": 6, "BTC": 8, "WBTC": 8}
+# USD value minted to the whale for every token and seeded on each side of every pair
+WHALE_VALUE = 10_000_000_000
+POOL_VALUE = 100_000_000
+# rewards emitted by the masterchef, and minted to it upfront
+REWARD_PER_SECOND = 10**18
+REWARD_FUNDING = 10**9 * 10**18
+# hedgil pool liquidity, in USD
+HEDGIL_VALUE = 10_000_000
+
+
+class LocalEnv:
+    def __init__(self, deployer, prices, whale=None, weth="WFTM"):
+        # Contract(address) only resolves deployments of networks with a chain id, local
+        # networks get theirs so mocks resolve like live contracts on a fork
+        CONFIG.active_network.setdefault("chainid", str(chain.id))
+        # local chains redeploy other contracts at the same addresses every run, their cached
+        # values (scripts/contract_cache.py) are only kept for this run
+        use_cache(ContractCache(":memory:"))
+
+        self.deployer = deployer
+        self.whale = whale or deployer
+        self.prices = prices
+        self.tokens = {}
+        self.feeds = {}
+        self.masterchefs = {}
+        self.hedgils = {}
+
+        self.factory = self._deploy(UniswapV2FactoryMock)
+        self.weth = self.token(weth)
+        self.router = self._deploy(UniswapV2RouterMock, self.factory, self.weth)
+        self.trade_factory = self._deploy(TradeFactoryMock)
+        self.health_check = self._deploy(HealthCheckMock)
+        self.multicall = self._deploy(Multicall2Mock)
+        CONFIG.active_network["multicall2"] = self.multicall.address
+        self.lens = self._deploy(JointLens)
+        CONFIG.active_network["joint_lens"] = self.lens.address
+
+    def _deploy(self, container, *args):
+        contract = self.deployer.deploy(container, *args, {"gas_price": 0})
+        return self._register(contract)
+
+    def _register(self, contract):
+        Contract.from_abi(contract._name, contract.address, contract.abi)
+        return contract
+
+    def _amount(self, symbol, value):
+        # token units worth `value` USD
+        return int(value / self.prices[symbol] * 10 ** DECIMALS.get(symbol, 18))
+
+    def token(self, symbol):
+        if symbol not in self.tokens:
+            token = self._deploy(TokenMock, symbol, symbol, DECIMALS.get(symbol, 18))
+            token.mint(self.whale, self._amount(symbol, WHALE_VALUE))
+            aggregator = self._deploy(
+                AggregatorMock, int(self.prices[symbol] * 10**8)
+            )
+            self.feeds[symbol] = self._deploy(AggregatorProxyMock, aggregator)
+            self.tokens[symbol] = token
+            for hedgil in self.hedgils.values():
+                hedgil.setPriceFeed(token, self.feeds[symbol], {"gas_price": 0})
+        return self.tokens[symbol]
+
+    def feed(self, symbol):
+        self.token(symbol)
+        return self.feeds[symbol]
+
+    def pair(self, tokenA, tokenB):
+        # pair of the two tokens, created and seeded at the feed prices if needed
+        address = self.factory.getPair(tokenA, tokenB)
+        if address != "0x0000000000000000000000000000000000000000":
+            return UniswapV2PairMock.at(address)
+
+        amounts = []
+        for token in [tokenA, tokenB]:
+            amount = self._amount(token.symbol(), POOL_VALUE)
+            token.approve(self.router, amount, {"from": self.whale, "gas_price": 0})
+            amounts.append(amount)
+        self.router.addLiquidity(
+            tokenA,
+            tokenB,
+            *amounts,
+            0,
+            0,
+            self.whale,
+            2**256 - 1,
+            {"from": self.whale, "gas_price": 0},
+        )
+        return self._register(
+            UniswapV2PairMock.at(self.factory.getPair(tokenA, tokenB))
+        )
+
+    def masterchef(self, reward):
+        symbol = reward.symbol()
+        if symbol not in self.masterchefs:
+            masterchef = self._deploy(MasterChefMock, reward, REWARD_PER_SECOND)
+            reward.mint(masterchef, REWARD_FUNDING, {"gas_price": 0})
+            # rewards are sold through WETH
+            if reward != self.weth:
+                self.pair(reward, self.weth)
+            self.masterchefs[symbol] = masterchef
+        return self.masterchefs[symbol]
+
+    def pid(self, masterchef, tokenA, tokenB):
+        # masterchef pool of the tokens' pair, added if needed
+        pair = self.pair(tokenA, tokenB)
+        for pid in range(masterchef.poolLength()):
+            if masterchef.poolInfo(pid)[0] == pair:
+                return pid
+        masterchef.add(100, pair, {"from": self.deployer, "gas_price": 0})
+        return masterchef.poolLength() - 1
+
+    def hedgil(self, quote_token):
+        symbol = quote_token.symbol()
+        if symbol not in self.hedgils:
+            hedgil = self._deploy(HedgilV2Mock, quote_token)
+            for token_symbol, token in self.tokens.items():
+                hedgil.setPriceFeed(token, self.feeds[token_symbol], {"gas_price": 0})
+            quote_token.approve(
+                hedgil, 2**256 - 1, {"from": self.whale, "gas_price": 0}
+            )
+            hedgil.provideLiquidity(
+                self._amount(symbol, HEDGIL_VALUE),
+                0,
+                self.whale,
+                {"from": self.whale, "gas_price": 0},
+            )
+            self.hedgils[symbol] = hedgil
+        return self.hedgils[symbol]
+
+
+def main(tokenA="USDC", tokenB="WFTM", reward="BOO"):
+    # deploys the environment and its tokens' pair, ready for a SpookyJoint
+    env = LocalEnv(
+        accounts[0], {"USDC": 1, "WFTM": 3, "BOO": 11, "ETH": 4_500, "DAI": 1}
+    )
+    tokenA, tokenB, reward = env.token(tokenA), env.token(tokenB), env.token(reward)
+    masterchef = env.masterchef(reward)
+    pid = env.pid(masterchef, tokenA, tokenB)
+    hedgil = env.hedgil(tokenB)
+
+    print(f"router      {env.router.address}")
+    print(f"pair        {env.pair(tokenA, tokenB).address}")
+    print(f"masterchef  {masterchef.address} (pid {pid})")
+    print(f"hedgil      {hedgil.address}")
+    for symbol, token in env.tokens.items():
+        print(f"{symbol:<11} {token.address} (feed {env.feeds[symbol].address})")
+    print(f"Deploy a {SpookyJoint._name} with these and two ProviderStrategy")
@@ -1,9 +1,12 @@
-from brownie import Contract, accounts, chain, history
+from brownie import accounts, chain, history
 import click
 
+from scripts.contract_cache import immutable, immutables, load_contract
+from scripts.keeper_router import keeper_router
+
 dict = {
-    "ETH-USDC": Contract("0x7023Ae05e0FD6f7d6C7BbCB8b435BaF065Df3acD"),
-    "WBTC-USDC": Contract("0x7023Ae05e0FD6f7d6C7BbCB8b435BaF065Df3acD"),
+    "ETH-USDC": load_contract("0x7023Ae05e0FD6f7d6C7BbCB8b435BaF065Df3acD"),
+    "WBTC-USDC": load_contract("0x7023Ae05e0FD6f7d6C7BbCB8b435BaF065Df3acD"),
 }
 joint = dict[click.prompt("Joint", type=click.Choice(list(dict.keys())))]
 # account = accounts.load(click.prompt("Account", type=click.Choice(accounts.load())))
@@ -11,10 +14,10 @@ joint = dict[click.prompt("Joint", type=click.Choice(list(dict.keys())))]
 
 def get_contract_and_account():
     account = accounts.at("0x16388463d60FFE0661Cf7F1f31a7D658aC790ff7", force=True)
-    providerA = Contract(joint.providerA())
-    providerB = Contract(joint.providerB())
+    # providers can be migrated, they are not cached
+    (providerA, providerB) = (joint.providerA(), joint.providerB())
 
-    return (account, joint, providerA, providerB)
+    return (account, joint, load_contract(providerA), load_contract(providerB))
 
 
 def setup_hedgil_joint():
@@ -26,11 +29,11 @@ def setup_hedgil_joint():
 
 def set_debt_ratios(zero=False):
     account, joint, providerA, providerB = get_contract_and_account()
-    vaultA = Contract(providerA.vault())
-    vaultB = Contract(providerB.vault())
+    vaultA = load_contract(immutable(providerA, "vault"))
+    vaultB = load_contract(immutable(providerB, "vault"))
 
-    decimalsA = vaultA.decimals()
-    decimalsB = vaultB.decimals()
+    decimalsA = immutable(vaultA, "decimals")
+    decimalsB = immutable(vaultB, "decimals")
     DECIMALS_DIFF = 1
     if decimalsA > decimalsB:
         DECIMALS_DIFF = 10 ** (decimalsA - decimalsB)
@@ -38,8 +41,8 @@ def set_debt_ratios(zero=False):
         DECIMALS_DIFF = 10 ** (decimalsB - decimalsA)
 
     print(f"decimals: A: {decimalsA}, B: {decimalsB}, diff: {DECIMALS_DIFF}")
-    pair = Contract(joint.pair())
-    if providerA.want() > providerB.want():
+    pair = load_contract(immutable(joint, "pair"))
+    if immutable(providerA, "want") > immutable(providerB, "want"):
         (reserveB, reserveA, l) = pair.getReserves()
     else:
         (reserveA, reserveB, l) = pair.getReserves()
@@ -125,14 +128,21 @@ def finish_epoch():
 
     harvest_providers(providerA, providerB, account)
 
-    vaultA = Contract(providerA.vault())
-    vaultB = Contract(providerB.vault())
+    vaultA = load_contract(immutable(providerA, "vault"))
+    vaultB = load_contract(immutable(providerB, "vault"))
 
     assert vaultA.strategies(providerA).dict()["totalDebt"] == 0
     assert vaultB.strategies(providerB).dict()["totalDebt"] == 0
 
 
 def harvest_providers(providerA, providerB, account):
+    router = keeper_router()
+    if router is not None:
+        # both harvests in one transaction (the router is the providers' keeper)
+        tx = router.roll([joint], {"from": account})
+        print(tx.events["Harvested"])
+        return
+
     tx = providerA.harvest({"from": account})
     print(tx.events["Harvested"])
     tx = providerB.harvest({"from": account})
@@ -143,8 +153,8 @@ def print_status():
     def print_hedge_status(joint, tokenA, tokenB):
         callID = joint.activeCallID()
         putID = joint.activePutID()
-        callProvider = Contract("0xb9ed94c6d594b2517c4296e24A8c517FF133fb6d")
-        putProvider = Contract("0x790e96E7452c3c2200bbCAA58a468256d482DD8b")
+        callProvider = load_contract("0xb9ed94c6d594b2517c4296e24A8c517FF133fb6d")
+        putProvider = load_contract("0x790e96E7452c3c2200bbCAA58a468256d482DD8b")
         callInfo = callProvider.options(callID)
         putInfo = putProvider.options(putID)
         assert (joint.activeCallID() != 0) & (joint.activePutID() != 0)
@@ -155,39 +165,43 @@ def print_status():
         print(f"\tAmount {callInfo[2]/1e18}")
         print(f"\tTTM {(callInfo[4]-chain.time())/3600}h")
         costCall = (callInfo[5] + callInfo[6]) / 0.8
-        print(f"\tCost {(callInfo[5]+callInfo[6])/0.8/1e18} {tokenA.symbol()}")
-        print(f"\tPayout: {callPayout/1e18} {tokenA.symbol()}")
+        print(
+            f"\tCost {(callInfo[5]+callInfo[6])/0.8/1e18} {immutable(tokenA, 'symbol')}"
+        )
+        print(f"\tPayout: {callPayout/1e18} {immutable(tokenA, 'symbol')}")
         print(f"PUT #{putID}")
         print(f"\tStrike {putInfo[1]/1e8}")
         print(f"\tAmount {putInfo[2]/1e18}")
         print(f"\tTTM {(putInfo[4]-chain.time())/3600}h")
         costPut = (putInfo[5] + putInfo[6]) / 0.8
-        print(f"\tCost {costPut/1e6} {tokenB.symbol()}")
-        print(f"\tPayout: {putPayout/1e6} {tokenB.symbol()}")
+        print(f"\tCost {costPut/1e6} {immutable(tokenB, 'symbol')}")
+        print(f"\tPayout: {putPayout/1e6} {immutable(tokenB, 'symbol')}")
         return (callInfo[1] / 1e8, (callInfo[4] - chain.time()) / 3600)
 
-    pair = Contract(joint.pair())
+    (pair, usdc, weth) = [
+        load_contract(address)
+        for address in immutables(joint, ["pair", "tokenA", "tokenB"])
+    ]
+    (providerA, providerB) = [
+        load_contract(address) for address in (joint.providerA(), joint.providerB())
+    ]
     (reserve0, reserve1, l) = pair.getReserves()
-    providerA = Contract(joint.providerA())
-    providerB = Contract(joint.providerB())
-    usdc = Contract(joint.tokenA())
-    weth = Contract(joint.tokenB())
-    vaultA = Contract(providerA.vault())
-    vaultB = Contract(providerB.vault())
+    vaultA = load_contract(immutable(providerA, "vault"))
+    vaultB = load_contract(immutable(providerB, "vault"))
     totalDebtA = vaultA.strategies(providerA).dict()["totalDebt"]
     totalDebtB = vaultB.strategies(providerB).dict()["totalDebt"]
     currentPrice = reserve0 / reserve1 * 1e12
     balanceA = providerA.balanceOfWant()
     balanceB = providerB.balanceOfWant()
-    assetsA = joint.estimatedTotalAssetsInToken(usdc)
-    assetsB = joint.estimatedTotalAssetsInToken(weth)
+    # both sides from one evaluation, estimatedTotalAssetsInToken recomputes it per token
+    (assetsA, assetsB) = joint.estimatedTotalAssetsAfterBalance()
     strategist = providerA.strategist()
     providerA.setInvestWant(False, {"from": strategist})
     providerB.setInvestWant(False, {"from": strategist})
     providerA.setTakeProfit(True, {"from": strategist})
     providerB.setTakeProfit(True, {"from": strategist})
-    print(f"InitialA: {totalDebtA/1e6} {usdc.symbol()}")
-    print(f"InitialB: {totalDebtB/1e18} {weth.symbol()}")
+    print(f"InitialA: {totalDebtA/1e6} {immutable(usdc, 'symbol')}")
+    print(f"InitialB: {totalDebtB/1e18} {immutable(weth, 'symbol')}")
     initialPrice, ttm = print_hedge_status(joint, weth, usdc)
     providerA.harvest({"from": strategist})
     profitA = history[-1].events["Harvested"]["profit"]
@@ -198,7 +212,7 @@ def print_status():
     print(f"CurrentPrice: {currentPrice}")
     print(f"InitialPrice: {initialPrice}")
     print(f"Price change: {(currentPrice/initialPrice-1)*100}%")
-    print(f"CurrentBalanceA: {(balanceA+assetsA)/1e6} {usdc.symbol()}")
-    print(f"CurrentBalanceB: {(balanceB+assetsB)/1e18} {weth.symbol()}")
+    print(f"CurrentBalanceA: {(balanceA+assetsA)/1e6} {immutable(usdc, 'symbol')}")
+    print(f"CurrentBalanceB: {(balanceB+assetsB)/1e18} {immutable(weth, 'symbol')}")
     print(f"ReturnA: {profitA/totalDebtA*100*365*24/(7*24-ttm)}%")
     print(f"ReturnB: {profitB/totalDebtB*100*365*24/(7*24-ttm)}%")
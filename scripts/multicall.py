@@ -0,0 +1,209 @@
+import asyncio
+
+from brownie import Contract, chain, web3
+from brownie._config import CONFIG
+from web3 import AsyncHTTPProvider, Web3
+from web3.eth import AsyncEth
+
+# Multicall2 deployments, used when the active network does not define `multicall2`
+MULTICALL2_ADDRESSES = {
+    1: "0x5BA1e12693Dc8F9c48aAD8770482f4739bEeD696",
+    250: "0xD98e3dBE5950Ca8Ce5a4b59630a5652110403E5c",
+}
+
+MULTICALL2_ABI = [
+    {
+        "inputs": [
+            {"internalType": "bool", "name": "requireSuccess", "type": "bool"},
+            {
+                "components": [
+                    {"internalType": "address", "name": "target", "type": "address"},
+                    {"internalType": "bytes", "name": "callData", "type": "bytes"},
+                ],
+                "internalType": "struct Multicall2.Call[]",
+                "name": "calls",
+                "type": "tuple[]",
+            },
+        ],
+        "name": "tryAggregate",
+        "outputs": [
+            {
+                "components": [
+                    {"internalType": "bool", "name": "success", "type": "bool"},
+                    {"internalType": "bytes", "name": "returnData", "type": "bytes"},
+                ],
+                "internalType": "struct Multicall2.Result[]",
+                "name": "returnData",
+                "type": "tuple[]",
+            }
+        ],
+        "stateMutability": "nonpayable",
+        "type": "function",
+    },
+]
+
+# max number of calls packed in a single aggregate call
+BATCH_SIZE = 500
+
+
+def multicall2():
+    address = CONFIG.active_network.get("multicall2") or MULTICALL2_ADDRESSES[chain.id]
+    return Contract.from_abi("Multicall2", address, MULTICALL2_ABI)
+
+
+def async_web3():
+    # async twin of brownie's web3, connected to the same endpoint
+    return Web3(
+        AsyncHTTPProvider(web3.provider.endpoint_uri),
+        modules={"eth": (AsyncEth,)},
+        middlewares=[],
+    )
+
+
+def decode_result(method, success, data):
+    # failed (reverted) calls are returned as None so one bad read doesn't break the batch
+    if not success or len(data) == 0:
+        return None
+    return method.decode_output(data)
+
+
+def _decode_batch(batch, returned):
+    return [
+        decode_result(method, success, data)
+        for (method, _), (success, data) in zip(batch, returned)
+    ]
+
+
+class Multicall:
+    """
+    Collects view calls and executes them through Multicall2 `tryAggregate`,
+    all pinned to the same block.
+
+    calls are added as `multicall.add(joint.investedA)` or
+    `multicall.add(vault.strategies, provider)`; `execute()` returns the decoded
+    results in the same order (None for calls that reverted).
+    """
+
+    def __init__(self, block_identifier=None, batch_size=BATCH_SIZE):
+        self.block_identifier = block_identifier
+        self.batch_size = batch_size
+        self.calls = []
+
+    def __len__(self):
+        return len(self.calls)
+
+    def add(self, method, *args):
+        self.calls.append((method, method.encode_input(*args)))
+        return len(self.calls) - 1
+
+    def _batches(self):
+        calls, self.calls = self.calls, []
+        for i in range(0, len(calls), self.batch_size):
+            batch = calls[i : i + self.batch_size]
+            yield batch, [(method._address, data) for method, data in batch]
+
+    def execute(self):
+        if self.block_identifier is None:
+            self.block_identifier = web3.eth.block_number
+
+        multicall = multicall2()
+        results = []
+        for batch, calls in self._batches():
+            returned = multicall.tryAggregate.call(
+                False, calls, block_identifier=self.block_identifier
+            )
+            results += _decode_batch(batch, returned)
+
+        return results
+
+    async def execute_async(self, w3):
+        if self.block_identifier is None:
+            self.block_identifier = await w3.eth.block_number
+
+        multicall = multicall2()
+
+        async def aggregate(batch, calls):
+            returned = await w3.eth.call(
+                {
+                    "to": multicall.address,
+                    "data": multicall.tryAggregate.encode_input(False, calls),
+                },
+                self.block_identifier,
+            )
+            return _decode_batch(batch, multicall.tryAggregate.decode_output(returned))
+
+        batches = await asyncio.gather(
+            *[aggregate(batch, calls) for batch, calls in self._batches()]
+        )
+        return [result for batch in batches for result in batch]
+
+
+def _step(plan, values):
+    # advances a plan, returning (next batch of calls, None) or (None, plan output)
+    try:
+        return plan.send(values), None
+    except StopIteration as finished:
+        return None, finished.value
+
+
+def run_plans(plans, block_identifier=None, batch_size=BATCH_SIZE):
+    """
+    Runs read plans in lockstep so every round of every plan goes into the same
+    Multicall2 batch.
+
+    A plan is a generator that yields a list of calls - tuples of (method, *args) -
+    and receives back the list of decoded results. Its return value is the plan output.
+    All rounds are pinned to the same block.
+    """
+    if block_identifier is None:
+        block_identifier = web3.eth.block_number
+
+    plans = list(plans)
+    outputs = [None] * len(plans)
+    batches = {}
+    for i, plan in enumerate(plans):
+        batches[i], outputs[i] = _step(plan, None)
+
+    batches = {i: batch for i, batch in batches.items() if batch is not None}
+    while batches:
+        multicall = Multicall(block_identifier, batch_size)
+        for batch in batches.values():
+            for call in batch:
+                multicall.add(*call)
+
+        results = iter(multicall.execute())
+        answers = {i: [next(results) for _ in batch] for i, batch in batches.items()}
+
+        batches = {}
+        for i, values in answers.items():
+            batch, outputs[i] = _step(plans[i], values)
+            if batch is not None:
+                batches[i] = batch
+
+    return outputs
+
+
+def run_plan(plan, block_identifier=None):
+    return run_plans([plan], block_identifier)[0]
+
+
+async def run_plan_async(
+    plan, w3, block_identifier=None, batch_size=BATCH_SIZE, executor=None
+):
+    """
+    Same as run_plan but through an async web3 (see async_web3) so many plans can run
+    concurrently. The plan itself runs in `executor` (the loop's default one if None): its
+    steps can block (loading contracts from the explorer, contract cache queries) and
+    must not stall the other plans.
+    """
+    loop = asyncio.get_running_loop()
+    batch, output = await loop.run_in_executor(executor, _step, plan, None)
+    while batch is not None:
+        multicall = Multicall(block_identifier, batch_size)
+        for call in batch:
+            multicall.add(*call)
+        results = await multicall.execute_async(w3)
+        block_identifier = multicall.block_identifier
+        batch, output = await loop.run_in_executor(executor, _step, plan, results)
+
+    return output
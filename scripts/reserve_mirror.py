@@ -0,0 +1,126 @@
+import json
+import os
+
+from brownie import chain, web3
+from brownie._config import DATA_FOLDER
+from eth_utils import keccak
+
+from scripts.contract_cache import immutable, load_contract
+from scripts.multicall import Multicall
+
+SYNC_TOPIC = "0x" + keccak(text="Sync(uint112,uint112)").hex()
+
+# max blocks per eth_getLogs request when catching up from the checkpoint
+MAX_BLOCK_RANGE = 5_000
+
+CHECKPOINT_PATH = os.environ.get(
+    "JOINT_RESERVES_CHECKPOINT", str(DATA_FOLDER.joinpath("joint-reserves.json"))
+)
+
+
+def _topic(log):
+    topic = log["topics"][0]
+    topic = topic.hex() if isinstance(topic, bytes) else topic
+    return topic if topic.startswith("0x") else "0x" + topic
+
+
+def decode_sync(log):
+    data = log["data"]
+    data = data.hex() if isinstance(data, bytes) else data
+    data = data[2:] if data.startswith("0x") else data
+    return (int(data[:64], 16), int(data[64:128], 16))
+
+
+class ReserveMirror:
+    """
+    In-memory copy of UniswapV2-like pair reserves, kept up to date from `Sync` logs.
+
+    Each pair emits `Sync(reserve0, reserve1)` every time its reserves change so the last Sync
+    of a block range is all we need. The mirror is checkpointed to disk (block + reserves)
+    so a restart only fetches the logs emitted since the last checkpoint.
+    """
+
+    def __init__(self, checkpoint_path=CHECKPOINT_PATH):
+        self.checkpoint_path = checkpoint_path
+        self.block = None
+        # pair -> (reserve0, reserve1)
+        self.pairs = {}
+        self._load()
+
+    def _load(self):
+        if self.checkpoint_path is None or not os.path.exists(self.checkpoint_path):
+            return
+        with open(self.checkpoint_path) as f:
+            checkpoint = json.load(f)
+        if checkpoint["chain_id"] != chain.id:
+            return
+        self.block = checkpoint["block"]
+        self.pairs = {pair: tuple(r) for pair, r in checkpoint["reserves"].items()}
+
+    def save(self):
+        if self.checkpoint_path is None:
+            return
+        with open(self.checkpoint_path, "w") as f:
+            json.dump(
+                {
+                    "chain_id": chain.id,
+                    "block": self.block,
+                    "reserves": {pair: list(r) for pair, r in self.pairs.items()},
+                },
+                f,
+            )
+
+    def track(self, pairs):
+        # reads the current reserves of pairs not mirrored yet, at the mirror's block
+        pairs = [str(pair) for pair in pairs if str(pair) not in self.pairs]
+        if not pairs:
+            return
+        if self.block is None:
+            self.block = web3.eth.block_number
+
+        multicall = Multicall(self.block)
+        for pair in pairs:
+            multicall.add(load_contract(pair).getReserves)
+        for pair, reserves in zip(pairs, multicall.execute()):
+            self.pairs[pair] = (reserves[0], reserves[1])
+
+    def apply(self, logs, block):
+        # logs have to be in chain order, only Sync logs of mirrored pairs are used
+        for log in logs:
+            if log["address"] in self.pairs and _topic(log) == SYNC_TOPIC:
+                self.pairs[log["address"]] = decode_sync(log)
+        self.block = block
+
+    def sync(self, to_block=None):
+        # catches up with `to_block` (default: head) and checkpoints
+        if to_block is None:
+            to_block = web3.eth.block_number
+        if not self.pairs or self.block > to_block:
+            # nothing to catch up with (or the chain was reset), pairs are read again at to_block
+            self.block = to_block
+            self.pairs = {}
+            return
+        for start in range(self.block + 1, to_block + 1, MAX_BLOCK_RANGE):
+            end = min(start + MAX_BLOCK_RANGE - 1, to_block)
+            logs = web3.eth.get_logs(
+                {
+                    "fromBlock": start,
+                    "toBlock": end,
+                    "address": list(self.pairs.keys()),
+                    "topics": [SYNC_TOPIC],
+                }
+            )
+            self.apply(logs, end)
+        self.save()
+
+    def reserves(self, pair, tokenA):
+        # reserves ordered as (reserveA, reserveB), pairs sort their tokens by address
+        reserve0, reserve1 = self.pairs[str(pair)]
+        return (
+            (reserve0, reserve1)
+            if self.is_token0(pair, tokenA)
+            else (reserve1, reserve0)
+        )
+
+    def is_token0(self, pair, token):
+        return immutable(load_contract(pair), "token0") == str(token)
@@ -0,0 +1,146 @@
+"""
+Pytest plugin counting the JSON-RPC requests sent to the node (and their latency) per test and
+per fixture. Enabled with `brownie test --rpc-profile [path]` (registered in tests/conftest.py):
+prints the chattiest tests and fixtures at the end of the run and writes every count to a JSON
+file (one per xdist worker).
+
+Requests are counted at the provider, so they include the ones brownie sends directly
+(snapshots, reverts, mining...).
+"""
+import json
+import os
+import time
+from collections import defaultdict
+
+import pytest
+from brownie import web3
+
+# rows printed per report section
+REPORT_ROWS = 15
+
+
+class RpcProfiler:
+    def __init__(self, path):
+        self.path = path
+        self.test = "session"
+        self.phase = "setup"
+        # (test, phase) -> method -> [count, seconds]
+        self.stats = defaultdict(lambda: defaultdict(lambda: [0, 0.0]))
+
+    def _install(self):
+        # brownie replaces the provider when it connects, wrap the current one
+        provider = web3.provider
+        if provider is None or getattr(provider, "_rpc_profiler", None) is self:
+            return
+        make_request = provider.make_request
+
+        def profiled_request(method, params):
+            start = time.perf_counter()
+            try:
+                return make_request(method, params)
+            finally:
+                self.record(method, time.perf_counter() - start)
+
+        provider.make_request = profiled_request
+        provider._rpc_profiler = self
+
+    def record(self, method, seconds):
+        stat = self.stats[(self.test, self.phase)][method]
+        stat[0] += 1
+        stat[1] += seconds
+
+    def _run_phase(self, item, phase):
+        self._install()
+        self.test, self.phase = item.nodeid, phase
+        yield
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_setup(self, item):
+        yield from self._run_phase(item, "setup")
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_call(self, item):
+        yield from self._run_phase(item, "call")
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_teardown(self, item):
+        yield from self._run_phase(item, "teardown")
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_fixture_setup(self, fixturedef, request):
+        self._install()
+        previous = self.phase
+        self.phase = f"fixture {fixturedef.argname}"
+        yield
+        self.phase = previous
+
+    def totals(self, key):
+        # {name: {method: [count, seconds]}} with name = key(test, phase)
+        totals = defaultdict(lambda: defaultdict(lambda: [0, 0.0]))
+        for (test, phase), methods in self.stats.items():
+            name = key(test, phase)
+            if name is None:
+                continue
+            for method, (count, seconds) in methods.items():
+                totals[name][method][0] += count
+                totals[name][method][1] += seconds
+        return totals
+
+    def report(self):
+        lines = []
+        sections = [
+            ("test", lambda test, phase: test),
+            (
+                "fixture",
+                lambda test, phase: phase[len("fixture ") :]
+                if phase.startswith("fixture ")
+                else None,
+            ),
+        ]
+        for title, key in sections:
+            rows = []
+            for name, methods in self.totals(key).items():
+                count = sum(c for c, _ in methods.values())
+                seconds = sum(s for _, s in methods.values())
+                mix = sorted(methods.items(), key=lambda m: -m[1][0])[:4]
+                mix = ", ".join(f"{method} {c}" for method, (c, _) in mix)
+                rows.append((seconds, count, name, mix))
+            rows.sort(reverse=True)
+            lines.append(f"RPC requests per {title} (by cumulative latency)")
+            for seconds, count, name, mix in rows[:REPORT_ROWS]:
+                lines.append(f"  {seconds:8.2f}s {count:7d}  {name}  [{mix}]")
+        return lines
+
+    def dump(self):
+        path = self.path
+        worker = os.environ.get("PYTEST_XDIST_WORKER")
+        if worker is not None:
+            root, ext = os.path.splitext(path)
+            path = f"{root}.{worker}{ext}"
+        data = [
+            {
+                "test": test,
+                "phase": phase,
+                "method": method,
+                "count": count,
+                "seconds": round(seconds, 6),
+            }
+            for (test, phase), methods in self.stats.items()
+            for method, (count, seconds) in methods.items()
+        ]
+        with open(path, "w") as f:
+            json.dump(data, f, indent=1)
+        return path
+
+    def pytest_sessionfinish(self, session):
+        # the xdist controller runs no tests
+        if self.stats:
+            self.dump()
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if os.environ.get("PYTEST_XDIST_WORKER") is not None or not self.stats:
+            return
+        terminalreporter.section("rpc profile")
+        for line in self.report():
+            terminalreporter.write_line(line)
+        terminalreporter.write_line(f"All counts written to {self.path}")
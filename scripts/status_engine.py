@@ -0,0 +1,58 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from scripts.joint_snapshot import joint_plan
+from scripts.multicall import async_web3, run_plan_async
+
+# max number of joints being fetched at the same time
+CONCURRENCY = 8
+# seconds before giving up on a joint
+JOINT_TIMEOUT = 60
+
+
+async def _fetch(joint, oracle, w3, block, semaphore, timeout, executor):
+    # errors (reverts, timeouts...) are returned instead of raised so they don't stop other joints
+    async with semaphore:
+        try:
+            snapshot = await asyncio.wait_for(
+                run_plan_async(joint_plan(joint, oracle), w3, block, executor=executor),
+                timeout,
+            )
+            return joint, snapshot, None
+        except Exception as error:
+            return joint, None, error
+
+
+async def poll_joints(
+    joints,
+    oracle,
+    render,
+    concurrency=CONCURRENCY,
+    timeout=JOINT_TIMEOUT,
+    block_identifier=None,
+):
+    """
+    Fetches the snapshot of every joint concurrently and calls `render(joint, snapshot, error)`
+    as soon as each one completes. All joints are read at the same block, which is returned.
+
+    Plans resolve contracts as they go (explorer, contract cache), that runs in a thread pool
+    so a cold cache doesn't serialize the joints nor escape the timeout.
+    """
+    w3 = async_web3()
+    if block_identifier is None:
+        block_identifier = await w3.eth.block_number
+
+    semaphore = asyncio.Semaphore(concurrency)
+    # a step that timed out keeps its thread until it returns, it is not waited for here
+    executor = ThreadPoolExecutor(concurrency)
+    try:
+        tasks = [
+            _fetch(joint, oracle, w3, block_identifier, semaphore, timeout, executor)
+            for joint in joints
+        ]
+        for task in asyncio.as_completed(tasks):
+            render(*await task)
+    finally:
+        executor.shutdown(wait=False)
+
+    return block_identifier
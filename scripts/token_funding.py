@@ -0,0 +1,122 @@
+"""
+Funds accounts writing token balances straight into storage (setStorageAt) instead of
+transferring from whales: one request per account, whatever the whales hold at the fork block.
+
+The balance mapping slot of each token is found once by probing (write a marker balance, read
+balanceOf) and kept in the contract cache. Nodes without a setStorageAt method (ganache 6) and
+tokens whose slot isn't found fall back to a transfer from `whale`.
+
+Total supplies are not updated.
+"""
+from brownie import network, web3
+from eth_abi import encode_abi
+from eth_utils import keccak
+
+from scripts.contract_cache import get_cache
+
+# balances mapping declared in one of the first MAX_SLOT slots
+MAX_SLOT = 100
+# account used to probe slots, never holds tokens
+PROBE_ACCOUNT = "0x000000000000000000000000000000000000f00d"
+PROBE_BALANCE = 0x1234567890ABCDEF
+
+
+def _storage_method():
+    # (setStorageAt, setBalance) of the connected node, None if it has none
+    if network.show_active() == "tenderly":
+        return "tenderly_setStorageAt", "tenderly_setBalance"
+    client = web3.clientVersion.lower()
+    if client.startswith("anvil"):
+        return "anvil_setStorageAt", "anvil_setBalance"
+    if client.startswith("hardhat"):
+        return "hardhat_setStorageAt", "hardhat_setBalance"
+    if client.startswith("ganache/v7"):
+        return "evm_setAccountStorageAt", "evm_setAccountBalance"
+    return None
+
+
+def _balance_key(slot, layout, account):
+    # solidity: keccak(account . slot), vyper: keccak(slot . account)
+    if layout == "vyper":
+        return keccak(encode_abi(["uint256", "address"], [slot, account]))
+    return keccak(encode_abi(["address", "uint256"], [account, slot]))
+
+
+def _read(token, key):
+    slot = int.from_bytes(key, "big")
+    return int.from_bytes(web3.eth.get_storage_at(str(token), slot), "big")
+
+
+def _write(token, key, value):
+    method = _storage_method()[0]
+    # hardhat takes the slot as a quantity (no leading zeros)
+    slot = (
+        hex(int.from_bytes(key, "big"))
+        if method.startswith("hardhat")
+        else "0x" + key.hex()
+    )
+    web3.manager.request_blocking(
+        method, [str(token), slot, "0x" + value.to_bytes(32, "big").hex()]
+    )
+
+
+def balance_slot(token):
+    # (slot, layout) of token's balances mapping, None if it can't be found
+    cache = get_cache()
+    cached = cache.read(token.address, ["balance_slot"])
+    if "balance_slot" in cached:
+        slot = cached["balance_slot"]
+        return None if slot is None else tuple(slot)
+
+    for slot in range(MAX_SLOT):
+        for layout in ["solidity", "vyper"]:
+            key = _balance_key(slot, layout, PROBE_ACCOUNT)
+            original = _read(token, key)
+            _write(token, key, PROBE_BALANCE)
+            found = token.balanceOf(PROBE_ACCOUNT) == PROBE_BALANCE
+            _write(token, key, original)
+            if found:
+                cache.write(token.address, {"balance_slot": [slot, layout]})
+                return slot, layout
+    # not probed again, these tokens always go through the whale
+    cache.write(token.address, {"balance_slot": None})
+    return None
+
+
+def fund(token, account, amount, whale=None):
+    """
+    Adds `amount` of token to account's balance and returns the amount added. Without storage
+    access the tokens are transferred from whale, capped to its balance.
+    """
+    account, amount = str(account), int(amount)
+    slot = balance_slot(token) if _storage_method() is not None else None
+    if slot is not None:
+        key = _balance_key(*slot, account)
+        _write(token, key, _read(token, key) + amount)
+        return amount
+
+    if whale is None:
+        raise ValueError(
+            f"can't write {token.symbol()} balances and no whale to fund from"
+        )
+    amount = min(amount, token.balanceOf(whale))
+    if str(whale) != account:
+        token.transfer(
+            account, amount, {"from": whale, "gas": 6_000_000, "gas_price": 0}
+        )
+    return amount
+
+
+def fund_native(account, amount, donor=None):
+    # adds `amount` of the native token to account, transferred from donor without storage access
+    amount = int(amount)
+    methods = _storage_method()
+    if methods is not None:
+        balance = web3.eth.get_balance(str(account)) + amount
+        web3.manager.request_blocking(methods[1], [str(account), hex(balance)])
+        return amount
+
+    if donor is None:
+        raise ValueError("can't set native balances and no donor to fund from")
+    donor.transfer(account, amount)
+    return amount
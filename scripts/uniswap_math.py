@@ -0,0 +1,190 @@
+"""
+UniswapV2Library (contracts/libraries/UniswapV2Library.sol) math in Python.
+
+The scalar functions follow the library operation by operation: integer products, 997/1000
+fee and floor divisions, raising ValueError with the library's revert message where it reverts
+(SafeMath overflows included).
+
+The `*_array` functions are the same math over numpy arrays (any mix of scalars and arrays,
+broadcast together) to sweep many swap sizes / reserve scenarios at once. Values are kept as
+python ints in object arrays so results are exact for the whole uint256 range, int64 is used
+instead when every intermediate product fits in it.
+"""
+import numpy as np
+
+FEE_NUMERATOR = 997
+FEE_DENOMINATOR = 1000
+
+INT64_MAX = np.iinfo(np.int64).max
+UINT256_MAX = 2**256 - 1
+
+
+def _mul(x, y):
+    # SafeMathUniswap.mul
+    z = x * y
+    if z > UINT256_MAX:
+        raise ValueError("ds-math-mul-overflow")
+    return z
+
+
+def _add(x, y):
+    # SafeMathUniswap.add
+    z = x + y
+    if z > UINT256_MAX:
+        raise ValueError("ds-math-add-overflow")
+    return z
+
+
+def quote(amountA, reserveA, reserveB):
+    if amountA <= 0:
+        raise ValueError("UniswapV2Library: INSUFFICIENT_AMOUNT")
+    if reserveA <= 0 or reserveB <= 0:
+        raise ValueError("UniswapV2Library: INSUFFICIENT_LIQUIDITY")
+    return _mul(amountA, reserveB) // reserveA
+
+
+def get_amount_out(amount_in, reserve_in, reserve_out):
+    if amount_in <= 0:
+        raise ValueError("UniswapV2Library: INSUFFICIENT_INPUT_AMOUNT")
+    if reserve_in <= 0 or reserve_out <= 0:
+        raise ValueError("UniswapV2Library: INSUFFICIENT_LIQUIDITY")
+    amount_in_with_fee = _mul(amount_in, FEE_NUMERATOR)
+    numerator = _mul(amount_in_with_fee, reserve_out)
+    denominator = _add(_mul(reserve_in, FEE_DENOMINATOR), amount_in_with_fee)
+    return numerator // denominator
+
+
+def get_amount_in(amount_out, reserve_in, reserve_out):
+    if amount_out <= 0:
+        raise ValueError("UniswapV2Library: INSUFFICIENT_OUTPUT_AMOUNT")
+    if reserve_in <= 0 or reserve_out <= 0:
+        raise ValueError("UniswapV2Library: INSUFFICIENT_LIQUIDITY")
+    if amount_out > reserve_out:
+        # SafeMath sub in the library
+        raise ValueError("ds-math-sub-underflow")
+    if amount_out == reserve_out:
+        # the whole reserve out, the library divides by zero
+        raise ValueError("Division or modulo by zero")
+    numerator = _mul(_mul(reserve_in, amount_out), FEE_DENOMINATOR)
+    denominator = _mul(reserve_out - amount_out, FEE_NUMERATOR)
+    return _add(numerator // denominator, 1)
+
+
+def get_amounts_out(amount_in, reserves):
+    # reserves: [(reserve_in, reserve_out)] of each hop of the path
+    if len(reserves) == 0:
+        raise ValueError("UniswapV2Library: INVALID_PATH")
+    amounts = [amount_in]
+    for reserve_in, reserve_out in reserves:
+        amounts.append(get_amount_out(amounts[-1], reserve_in, reserve_out))
+    return amounts
+
+
+def get_amounts_in(amount_out, reserves):
+    # reserves: [(reserve_in, reserve_out)] of each hop of the path
+    if len(reserves) == 0:
+        raise ValueError("UniswapV2Library: INVALID_PATH")
+    amounts = [amount_out]
+    for reserve_in, reserve_out in reversed(reserves):
+        amounts.insert(0, get_amount_in(amounts[0], reserve_in, reserve_out))
+    return amounts
+
+
+def _as_array(value):
+    array = np.asarray(value)
+    return array if array.dtype.kind in "iu" else np.asarray(value, dtype=object)
+
+
+def _as_arrays(*values):
+    # broadcasts values together; int64 when no product (x * y * 1000) can overflow, object otherwise.
+    # int64 values can't overflow uint256 either, object ones go through _check_overflow
+    arrays = np.broadcast_arrays(*[_as_array(value) for value in values])
+    largest = max(
+        (int(np.max(np.abs(array))) for array in arrays if array.size), default=0
+    )
+    if largest**2 * FEE_DENOMINATOR <= INT64_MAX:
+        return [array.astype(np.int64) for array in arrays]
+    return [array.astype(object) for array in arrays]
+
+
+def _require(condition, message):
+    if not np.all(condition):
+        raise ValueError(message)
+
+
+def _check_overflow(value, message):
+    # SafeMathUniswap reverts of python int (object) arrays, int64 ones are small enough
+    if value.dtype == object:
+        _require(value <= UINT256_MAX, message)
+    return value
+
+
+def quote_array(amountA, reserveA, reserveB):
+    amountA, reserveA, reserveB = _as_arrays(amountA, reserveA, reserveB)
+    _require(amountA > 0, "UniswapV2Library: INSUFFICIENT_AMOUNT")
+    _require(
+        (reserveA > 0) & (reserveB > 0), "UniswapV2Library: INSUFFICIENT_LIQUIDITY"
+    )
+    return _check_overflow(amountA * reserveB, "ds-math-mul-overflow") // reserveA
+
+
+def get_amount_out_array(amount_in, reserve_in, reserve_out):
+    amount_in, reserve_in, reserve_out = _as_arrays(amount_in, reserve_in, reserve_out)
+    _require(amount_in > 0, "UniswapV2Library: INSUFFICIENT_INPUT_AMOUNT")
+    _require(
+        (reserve_in > 0) & (reserve_out > 0),
+        "UniswapV2Library: INSUFFICIENT_LIQUIDITY",
+    )
+    amount_in_with_fee = _check_overflow(
+        amount_in * FEE_NUMERATOR, "ds-math-mul-overflow"
+    )
+    numerator = _check_overflow(
+        amount_in_with_fee * reserve_out, "ds-math-mul-overflow"
+    )
+    denominator = _check_overflow(
+        _check_overflow(reserve_in * FEE_DENOMINATOR, "ds-math-mul-overflow")
+        + amount_in_with_fee,
+        "ds-math-add-overflow",
+    )
+    return numerator // denominator
+
+
+def get_amount_in_array(amount_out, reserve_in, reserve_out):
+    amount_out, reserve_in, reserve_out = _as_arrays(
+        amount_out, reserve_in, reserve_out
+    )
+    _require(amount_out > 0, "UniswapV2Library: INSUFFICIENT_OUTPUT_AMOUNT")
+    _require(
+        (reserve_in > 0) & (reserve_out > 0),
+        "UniswapV2Library: INSUFFICIENT_LIQUIDITY",
+    )
+    _require(amount_out <= reserve_out, "ds-math-sub-underflow")
+    _require(amount_out < reserve_out, "Division or modulo by zero")
+    numerator = _check_overflow(
+        _check_overflow(reserve_in * amount_out, "ds-math-mul-overflow")
+        * FEE_DENOMINATOR,
+        "ds-math-mul-overflow",
+    )
+    denominator = _check_overflow(
+        (reserve_out - amount_out) * FEE_NUMERATOR, "ds-math-mul-overflow"
+    )
+    return _check_overflow(numerator // denominator + 1, "ds-math-add-overflow")
+
+
+def get_amounts_out_array(amount_in, reserves):
+    # amounts after each hop, reserves being [(reserve_in, reserve_out)] arrays of each hop
+    if len(reserves) == 0:
+        raise ValueError("UniswapV2Library: INVALID_PATH")
+    amounts = [amount_in]
+    for reserve_in, reserve_out in reserves:
+        amounts.append(get_amount_out_array(amounts[-1], reserve_in, reserve_out))
+    return amounts
+
+
+def swap_array(amount_in, reserve_in, reserve_out):
+    """
+    Swaps `amount_in` through the pair, returning (amount_out, new reserve_in, new reserve_out).
+    Used to build the reserves of price shock scenarios (e.g. dumping x% of a reserve).
+    """
+    amount_out = get_amount_out_array(amount_in, reserve_in, reserve_out)
+    return amount_out, reserve_in + amount_in, reserve_out - amount_out
@@ -3,13 +3,112 @@ import pytest
 from brownie import accounts, chain, config, Contract, web3, Wei, \
     SpookyJoint, SolidexJoint, SpiritJoint, SushiJoint
 from brownie.network import gas_price, gas_limit
+import os
 import requests
+from brownie._config import CONFIG
+from scripts.find_pid import find_pid
+from scripts.joint_lens import deploy_joint_lens
+from scripts.keeper_router import deploy_keeper_router
+from scripts.fork_cache import ForkCacheProxy, upstream_block_number
+from scripts.local_env import LocalEnv
+from scripts.token_funding import fund, fund_native
+from scripts.rpc_profiler import RpcProfiler
+from utils import utils as test_utils
+
+
+# Parallel runs: `brownie test -n auto`
+# brownie launches one fork node per xdist worker (on port + worker id). All of them are pinned
+# to the same fork block (FORK_BLOCK) so every worker sees the same state.
+# Fork nodes read the upstream through a caching proxy (scripts/fork_cache.py, disable with
+# FORK_CACHE_PROXY=0): the fork block defaults to the one of the previous run so its cached
+# state is reused and the suite runs offline. FORK_BLOCK=latest moves to the upstream head.
+def _fork_settings(config):
+    network = config.getoption("network", None) or CONFIG.settings["networks"]["default"]
+    return CONFIG.networks[network].get("cmd_settings", {})
+
+
+def _fork_host(settings):
+    fork = settings.get("fork", "")
+    fork = CONFIG.networks[fork]["host"] if fork in CONFIG.networks else fork
+    return fork.split("@")[0]
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--rpc-profile", nargs="?", const="rpc-profile.json", default=None,
+        help="count rpc requests per test and fixture (scripts/rpc_profiler.py), written to a json file",
+    )
+    parser.addoption(
+        "--joint-trace", action="store_true", default=False,
+        help="print the status dumps of tests/utils/utils.py as they happen, not only on failures",
+    )
+
 
-# Function scoped isolation fixture to enable xdist.
-# Snapshots the chain before each test and reverts after test completion.
-# @pytest.fixture(scope="function", autouse=True)
-# def shared_setup(fn_isolation):
-#     pass
+def pytest_configure(config):
+    if config.getoption("rpc_profile"):
+        config.pluginmanager.register(RpcProfiler(config.getoption("rpc_profile")), "rpc_profiler")
+    test_utils.JOINT_TRACE = config.getoption("joint_trace")
+
+    settings = _fork_settings(config)
+    if "fork" not in settings:
+        return
+    upstream = _fork_host(settings)
+
+    # main process (or single process run), workers inherit its environment
+    if not hasattr(config, "workerinput"):
+        cache = None
+        if os.environ.get("FORK_CACHE_PROXY", "1") != "0":
+            proxy = ForkCacheProxy(upstream, port=0)
+            cache = proxy.cache
+            os.environ["FORK_PROXY_URL"] = proxy.start()
+
+        block = os.environ.get("FORK_BLOCK")
+        if block is None and cache is not None:
+            block = cache.fork_block(upstream)
+        pinned = cache is not None or config.getoption("numprocesses", None)
+        if block in (None, "latest") and pinned:
+            block = upstream_block_number(upstream)
+        if block is not None:
+            os.environ["FORK_BLOCK"] = str(block)
+            if cache is not None:
+                cache.set_fork_block(upstream, int(block))
+
+    host = os.environ.get("FORK_PROXY_URL", upstream)
+    block = os.environ.get("FORK_BLOCK")
+    settings["fork"] = host if block is None else f"{host}@{block}"
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    # status dumps of the test are only read and shown when it fails
+    report = (yield).get_result()
+    if report.when == "call":
+        if report.failed:
+            report.sections.append(("joint status", "\n".join(test_utils.pop_status_dumps())))
+        test_utils.discard_status_dumps()
+
+
+def pytest_xdist_make_scheduler(config, log):
+    from xdist.scheduler import LoadScopeScheduling
+
+    class ParametrizationScheduling(LoadScopeScheduling):
+        # tests of the same file and parametrization go to the same worker, so the session
+        # fixtures (deployments) are built once per worker instead of once per test
+        def _split_scope(self, nodeid):
+            path = nodeid.split("::")[0]
+            if "[" not in nodeid:
+                return path
+            return f"{path}[{nodeid.rsplit('[', 1)[1]}"
+
+    return ParametrizationScheduling(config, log)
+
+# Vaults, providers and joint are deployed and funded once per parametrization (session
+# fixtures below) and every test runs on a snapshot of that state, reverted once it's done.
+@pytest.fixture(scope="function", autouse=True)
+def isolation(chain, amountA, amountB, provideLiquidity, auth_yswaps):
+    chain.snapshot()
+    yield
+    chain.revert()
 
 @pytest.fixture(scope="session", autouse=False)
 def tenderly_fork(web3):
@@ -25,15 +124,26 @@ def tenderly_fork(web3):
     print(f"https://dashboard.tenderly.co/yearn/yearn-web/fork/{fork_id}")
 
 @pytest.fixture(scope="session", autouse=True)
-def donate(wftm, accounts, gov, tokenA_whale, tokenB_whale):
+def donate(wftm, accounts, gov, tokenA_whale, tokenB_whale, local_env):
+    # local networks have zero gas price, nobody needs FTM
+    if local_env is not None:
+        return
     donor = accounts.at(wftm, force=True)
     for i in range(10):
-        donor.transfer(accounts[i], 100e18)
-    donor.transfer(gov, 100e18)
+        fund_native(accounts[i], 100e18, donor)
+    fund_native(gov, 100e18, donor)
     
+@pytest.fixture(scope="session", autouse=True)
+def joint_lens(gov, donate, local_env):
+    # tests/utils/checks.py reads joints through JointLens (scripts/joint_lens.py)
+    if local_env is not None:
+        return local_env.lens
+    return deploy_joint_lens(gov)
+
 @pytest.fixture(scope="session", autouse=True)
 def reset_chain(chain):
-    print(f"Initial Height: {chain.height}")
+    # each xdist worker owns its fork node so resetting it doesn't affect the others
+    print(f"Initial Height: {chain.height} ({os.environ.get('PYTEST_XDIST_WORKER', 'main')})")
     yield
     print(f"\nEnd Height: {chain.height}")
     print(f"Reset chain")
@@ -88,7 +198,10 @@ def keeper(accounts):
 
 
 @pytest.fixture(scope="session")
-def hedgilV2():
+def hedgilV2(tokenB, local_env):
+    if local_env is not None:
+        yield local_env.hedgil(tokenB)
+        return
     yield Contract("0x6E7d6Daa034fD0188f879E5648f63D821F7C0702")
 
 
@@ -103,32 +216,28 @@ def deployer(accounts):
 
 
 @pytest.fixture(scope="session")
-def dai():
-    yield Contract(token_addresses["DAI"])
+def dai(local_env):
+    yield _token("DAI", local_env)
 
 
 @pytest.fixture(scope="session")
-def weth():
-    token_address = "0x74b23882a30290451A17c44f4F05243b6b58C76d"
-    yield Contract(token_address)
+def weth(local_env):
+    yield _token("ETH", local_env)
 
 
 @pytest.fixture(scope="session")
-def wftm():
-    token_address = token_addresses["WFTM"]
-    yield Contract(token_address)
+def wftm(local_env):
+    yield _token("WFTM", local_env)
 
 
 @pytest.fixture(scope="session")
-def usdc():
-    token_address = token_addresses["USDC"]
-    yield Contract(token_address)
+def usdc(local_env):
+    yield _token("USDC", local_env)
 
 
 @pytest.fixture(scope="session")
-def mim():
-    token_address = token_addresses["MIM"]
-    yield Contract(token_address)
+def mim(local_env):
+    yield _token("MIM", local_env)
 
 @pytest.fixture(scope="session")
 def registry():
@@ -164,13 +273,30 @@ def hedge_type(request):
         # "SOLID",
         # "SPIRIT",
         # "UNI",
-        "SPOOKY"
+        "SPOOKY",
+        # mocks deployed by scripts/local_env.py: `brownie test --network development`
+        "LOCAL",
     ],
     scope="session",
     autouse=True,)
 def dex(request):
+    forked = "fork" in CONFIG.active_network.get("cmd_settings", {})
+    if forked == (request.param == "LOCAL"):
+        pytest.skip(f"{request.param} doesn't run on {CONFIG.active_network['id']}")
     yield request.param
 
+@pytest.fixture(scope="session")
+def local_env(dex):
+    if dex != "LOCAL":
+        yield None
+        return
+    yield LocalEnv(accounts[9], token_prices)
+
+def _token(symbol, local_env):
+    if local_env is not None:
+        return local_env.token(symbol)
+    return Contract(token_addresses[symbol])
+
 # TODO: uncomment those tokens you want to test as want
 @pytest.fixture(
     params=[
@@ -189,8 +315,8 @@ def dex(request):
     scope="session",
     autouse=True,
 )
-def tokenA(request):
-    yield Contract(token_addresses[request.param])
+def tokenA(request, local_env):
+    yield _token(request.param, local_env)
 
 
 # TODO: uncomment those tokens you want to test as want
@@ -210,16 +336,15 @@ def tokenA(request):
     scope="session",
     autouse=True,
 )
-def tokenB(request):
-    yield Contract(token_addresses[request.param])
+def tokenB(request, local_env):
+    yield _token(request.param, local_env)
 
 @pytest.fixture(params=[
     # "SEX",
     "BOO"
     ], scope="session", autouse=True)
-def rewards(request):
-    rewards_address = token_addresses[request.param]  # sushi
-    yield Contract(rewards_address)
+def rewards(request, local_env):
+    yield _token(request.param, local_env)
 
 joint_type = {
     "SPOOKY": {
@@ -238,9 +363,13 @@ joint_type = {
     "SPIRIT": {
         "nohedge": "",
         "hedgilV2": ""
+    },
+    "LOCAL": {
+        "nohedge": "",
+        "hedgilV2": SpookyJoint
     }
 }
-@pytest.fixture()
+@pytest.fixture(scope="session")
 def joint_to_use(dex, hedge_type):
     yield joint_type[dex][hedge_type]
 
@@ -301,37 +430,41 @@ lp_whales = {
 
 
 @pytest.fixture(scope="session", autouse=True)
-def lp_whale(dex, tokenA, tokenB):
+def lp_whale(dex, tokenA, tokenB, local_env):
+    if local_env is not None:
+        yield local_env.whale
+        return
     yield lp_whales[dex][tokenB.symbol()][tokenA.symbol()]
 
 
 @pytest.fixture(scope="session", autouse=True)
-def tokenA_whale(tokenA):
+def tokenA_whale(tokenA, local_env):
+    if local_env is not None:
+        yield local_env.whale
+        return
     yield whale_addresses[tokenA.symbol()]
 
 
 @pytest.fixture(scope="session", autouse=True)
-def tokenB_whale(tokenB):
+def tokenB_whale(tokenB, local_env):
+    if local_env is not None:
+        yield local_env.whale
+        return
     yield whale_addresses[tokenB.symbol()]
 
-mc_pids = {
-    "WFTM": {
-        "MIM": 24,
-        "USDC": 2,
-        "BOO": 0,
-        "DAI": 3,
-        "BTC": 4,
-        "ETH": 5,
-        "fUSDT": 1,
-    }
-}
-
-@pytest.fixture
-def mc_pid(tokenA, tokenB):
-    if tokenB.symbol() in mc_pids.keys():
-        yield mc_pids[tokenB.symbol()][tokenA.symbol()]
-    else:
+@pytest.fixture(scope="session")
+def mc_pid(dex, masterchef, router, tokenA, tokenB, local_env):
+    # solidex joints stake through the lp depositor, not a masterchef
+    if dex == "SOLID":
         yield ""
+        return
+    if local_env is not None:
+        yield local_env.pid(masterchef, tokenA, tokenB)
+        return
+    # looked up in the persisted lpToken -> pid index (built / extended on demand)
+    pair = Contract(router.factory()).getPair(tokenA, tokenB)
+    pid = find_pid(masterchef, pair)
+    yield pid if pid is not None else ""
 
 router_addresses = {
     "UNI": "",
@@ -341,8 +474,11 @@ router_addresses = {
     "SPIRIT": "0x16327E3FbDaCA3bcF7E38F5Af2599D2DDc33aE52",
 }
 
-@pytest.fixture
-def router(dex):
+@pytest.fixture(scope="session")
+def router(dex, local_env):
+    if local_env is not None:
+        yield local_env.router
+        return
     yield Contract(router_addresses[dex])
 
 lp_depositor_addresses = {
@@ -370,16 +506,25 @@ oracle_addresses = {
 
 
 @pytest.fixture(scope="session")
-def tokenA_oracle(tokenA):
+def tokenA_oracle(tokenA, local_env):
+    if local_env is not None:
+        yield local_env.feed(tokenA.symbol())
+        return
     yield Contract(oracle_addresses[tokenA.symbol()])
 
 
 @pytest.fixture(scope="session")
-def tokenB_oracle(tokenB):
+def tokenB_oracle(tokenB, local_env):
+    if local_env is not None:
+        yield local_env.feed(tokenB.symbol())
+        return
     yield Contract(oracle_addresses[tokenB.symbol()])
 
 @pytest.fixture
-def rewards_whale(rewards):
+def rewards_whale(rewards, local_env):
+    if local_env is not None:
+        yield local_env.whale
+        return
     yield whale_addresses[rewards.symbol()]
 
 masterchef_addresses = {
@@ -390,8 +535,11 @@ masterchef_addresses = {
     "SEX": "0x2b2929E785374c651a81A63878Ab22742656DcDd",
 }
 
-@pytest.fixture
-def masterchef(rewards):
+@pytest.fixture(scope="session")
+def masterchef(rewards, local_env):
+    if local_env is not None:
+        yield local_env.masterchef(rewards)
+        return
     yield Contract(masterchef_addresses[rewards.symbol()])
 
 hedgil_pools = {
@@ -419,32 +567,22 @@ token_prices = {
     "BOO": 11,
 }
 
-@pytest.fixture(autouse=True)
+@pytest.fixture(scope="session", autouse=True)
 def amountA(tokenA, tokenA_whale, user):
     # this will get the number of tokens (around $1m worth of token)
     amillion = round(1_000_000 / token_prices[tokenA.symbol()])
     amount = amillion * 10 ** tokenA.decimals()
-    # In order to get some funds for the token you are about to use,
-    # it impersonate a whale address
-    if amount > tokenA.balanceOf(tokenA_whale):
-        amount = tokenA.balanceOf(tokenA_whale)
-    tokenA.transfer(
-        user, amount, {"from": tokenA_whale, "gas": 6_000_000, "gas_price": 0}
-    )
+    # written to the user's balance, or sent by the whale if the node can't set storage
+    amount = fund(tokenA, user, amount, tokenA_whale)
     yield amount
 
-@pytest.fixture(autouse=True)
+@pytest.fixture(scope="session", autouse=True)
 def amountB(tokenB, tokenB_whale, user):
     # this will get the number of tokens (around $1m worth of token)
     amillion = round(1_000_000 / token_prices[tokenB.symbol()])
     amount = amillion * 10 ** tokenB.decimals()
-    # In order to get some funds for the token you are about to use,
-    # it impersonate a whale address
-    if amount > tokenB.balanceOf(tokenB_whale):
-        amount = tokenB.balanceOf(tokenB_whale)
-    tokenB.transfer(
-        user, amount, {"from": tokenB_whale, "gas": 6_000_000, "gas_price": 0}
-    )
+    # written to the user's balance, or sent by the whale if the node can't set storage
+    amount = fund(tokenB, user, amount, tokenB_whale)
     yield amount
 
 
@@ -456,7 +594,7 @@ def weth_amount(user, weth):
 
 ######### DEPLOYMENTS
 
-@pytest.fixture(scope="function", autouse=True)
+@pytest.fixture(scope="session", autouse=True)
 def vaultA(pm, gov, rewards, guardian, management, tokenA):
     Vault = pm(config["dependencies"][0]).Vault
     vault = guardian.deploy(Vault)
@@ -466,7 +604,7 @@ def vaultA(pm, gov, rewards, guardian, management, tokenA):
     yield vault
 
 
-@pytest.fixture(scope="function", autouse=True)
+@pytest.fixture(scope="session", autouse=True)
 def vaultB(pm, gov, rewards, guardian, management, tokenB):
     Vault = pm(config["dependencies"][0]).Vault
     vault = guardian.deploy(Vault)
@@ -475,7 +613,7 @@ def vaultB(pm, gov, rewards, guardian, management, tokenB):
     vault.setManagement(management, {"from": gov, "gas_price":0})
     yield vault
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def joint(
     providerA,
     providerB,
@@ -525,45 +663,55 @@ def joint(
     yield joint
 
 
-@pytest.fixture
-def providerA(strategist, keeper, vaultA, ProviderStrategy, gov):
+@pytest.fixture(scope="session")
+def health_check(local_env):
+    if local_env is not None:
+        hc = local_env.health_check
+        admin = local_env.deployer
+    else:
+        hc = Contract("0xf13Cd6887C62B5beC145e30c38c4938c5E627fe0")
+        admin = "0x72a34AbafAB09b15E7191822A679f28E067C4a16"
+    hc.setlossLimitRatio(1000, {"from": admin, "gas_price":0})
+    hc.setProfitLimitRatio(2000, {"from": admin, "gas_price":0})
+    yield hc
+
+
+@pytest.fixture(scope="session")
+def providerA(strategist, keeper, vaultA, ProviderStrategy, gov, health_check):
     strategy = strategist.deploy(ProviderStrategy, vaultA)
     strategy.setKeeper(keeper, {"from": gov, "gas_price":0})
     vaultA.addStrategy(strategy, 10_000, 0, 2 ** 256 - 1, 1_000, {"from": gov, "gas_price":0})
-    strategy.setHealthCheck("0xf13Cd6887C62B5beC145e30c38c4938c5E627fe0", {"from": gov, "gas_price":0})
+    strategy.setHealthCheck(health_check, {"from": gov, "gas_price":0})
     strategy.setDoHealthCheck(False, {"from": gov, "gas_price":0})
-    Contract(strategy.healthCheck()).setlossLimitRatio(
-        1000, {"from": "0x72a34AbafAB09b15E7191822A679f28E067C4a16", "gas_price":0}
-    )
-    Contract(strategy.healthCheck()).setProfitLimitRatio(
-        2000, {"from": "0x72a34AbafAB09b15E7191822A679f28E067C4a16", "gas_price":0}
-    )
     yield strategy
 
 
-@pytest.fixture
-def providerB(strategist, keeper, vaultB, ProviderStrategy, gov):
+@pytest.fixture(scope="session")
+def providerB(strategist, keeper, vaultB, ProviderStrategy, gov, health_check):
     strategy = strategist.deploy(ProviderStrategy, vaultB)
     strategy.setKeeper(keeper, {"from": gov, "gas_price":0})
     vaultB.addStrategy(strategy, 10_000, 0, 2 ** 256 - 1, 1_000, {"from": gov, "gas_price":0})
-    strategy.setHealthCheck("0xf13Cd6887C62B5beC145e30c38c4938c5E627fe0", {"from": gov, "gas_price":0})
+    strategy.setHealthCheck(health_check, {"from": gov, "gas_price":0})
     strategy.setDoHealthCheck(False, {"from": gov, "gas_price":0})
-    Contract(strategy.healthCheck()).setlossLimitRatio(
-        1000, {"from": "0x72a34AbafAB09b15E7191822A679f28E067C4a16", "gas_price":0}
-    )
-    Contract(strategy.healthCheck()).setProfitLimitRatio(
-        2000, {"from": "0x72a34AbafAB09b15E7191822A679f28E067C4a16", "gas_price":0}
-    )
     yield strategy
 
-@pytest.fixture(autouse=True)
+@pytest.fixture
+def keeper_router(gov, keeper, providerA, providerB, joint):
+    # harvests both providers in one transaction, becomes their keeper (reverted after the test)
+    router = deploy_keeper_router(gov, keepers=[keeper])
+    providerA.setKeeper(router, {"from": gov, "gas_price":0})
+    providerB.setKeeper(router, {"from": gov, "gas_price":0})
+    yield router
+
+@pytest.fixture(scope="session", autouse=True)
 def provideLiquidity(
     hedgilV2, tokenB, tokenB_whale, hedge_type
 ):
     if hedge_type == "hedgilV2":
+        amount = fund(tokenB, tokenB_whale, 100_000 * 10 ** tokenB.decimals(), tokenB_whale)
         tokenB.approve(hedgilV2, 2 ** 256 - 1, {"from": tokenB_whale, "gas_price": "0"})
         hedgilV2.provideLiquidity(
-            100_000 * 10 ** tokenB.decimals(),
+            amount,
             0,
             tokenB_whale,
             {"from": tokenB_whale, "gas_price": "0"},
@@ -652,9 +800,10 @@ def reset_tenderly_fork():
     yield
 
 
-@pytest.fixture(autouse=True)
-def trade_factory(joint, yMechs_multisig):
-    tf = Contract(joint.tradeFactory())
+@pytest.fixture(scope="session", autouse=True)
+def trade_factory(joint, yMechs_multisig, local_env):
+    # the joint points at the live trade factory, unused by spooky joints
+    tf = local_env.trade_factory if local_env is not None else Contract(joint.tradeFactory())
     tf.grantRole(tf.STRATEGY(), joint, {"from": yMechs_multisig, "gas_price": 0})
     yield tf
 
@@ -664,16 +813,17 @@ def yMechs_multisig():
     yield accounts.at("0x9f2A061d6fEF20ad3A656e23fd9C814b75fd5803", force=True)
 
     
-@pytest.fixture(scope="function", autouse=True)
+@pytest.fixture(scope="session", autouse=True)
 def auth_yswaps(joint, trade_factory, yMechs_multisig):
     gas_price(0)
     trade_factory.grantRole(
         trade_factory.STRATEGY(), joint, {"from": yMechs_multisig, "gas_price": 0}
     )
 
-@pytest.fixture(autouse=True)
-def trade_factory(joint, yMechs_multisig):
-    tf = Contract(joint.tradeFactory())
+@pytest.fixture(scope="session", autouse=True)
+def trade_factory(joint, yMechs_multisig, local_env):
+    # the joint points at the live trade factory, unused by spooky joints
+    tf = local_env.trade_factory if local_env is not None else Contract(joint.tradeFactory())
     tf.grantRole(
         tf.STRATEGY(), joint, {"from": yMechs_multisig, "gas_price": 0}
     )
@@ -0,0 +1,69 @@
+from utils import actions, utils
+import os
+import pytest
+from brownie import chain, history
+from scripts.gas_profile import txs_gas, load_baseline, save_baseline, regressions
+
+# Gas of the epoch lifecycle (harvests opening / closing the position, hedge, reward swaps) per
+# joint variant, compared to the baseline in tests/gas/baselines. Variants without a baseline are
+# skipped, baselines are recorded with GAS_BASELINE_UPDATE=1 and committed.
+# GAS_REGRESSION_THRESHOLD: allowed increase over the baseline (default 0.05, 5%)
+# GAS_BASELINE_UPDATE=1: record the current gas as the new baseline
+BASELINES = os.path.join(os.path.dirname(__file__), "baselines")
+
+
+def test_epoch_gas(
+    chain,
+    tokenA,
+    tokenB,
+    vaultA,
+    vaultB,
+    providerA,
+    providerB,
+    joint,
+    user,
+    amountA,
+    amountB,
+    gov,
+    dex,
+    hedge_type,
+):
+    actions.user_deposit(user, vaultA, tokenA, amountA)
+    actions.user_deposit(user, vaultB, tokenB, amountB)
+    chain.sleep(1)
+
+    start = len(history)
+    if hedge_type == "nohedge":
+        actions.gov_start_non_hedged_epoch(
+            gov, providerA, providerB, joint, vaultA, vaultB, amountA, amountB
+        )
+    else:
+        actions.gov_start_epoch(
+            gov, providerA, providerB, joint, vaultA, vaultB, amountA, amountB
+        )
+    # mid-epoch reward claim and swap
+    utils.sleep_mine(3600)
+    joint.harvest({"from": gov})
+    actions.wait_period_fraction(joint, 0.5)
+    actions.gov_end_epoch(gov, providerA, providerB, joint, vaultA, vaultB)
+
+    gas = txs_gas(history[start:])
+    path = os.path.join(
+        BASELINES, f"{dex}-{hedge_type}-{tokenA.symbol()}-{tokenB.symbol()}.json"
+    )
+    if os.environ.get("GAS_BASELINE_UPDATE") == "1":
+        save_baseline(path, gas)
+        return
+    baseline = load_baseline(path)
+    if baseline is None:
+        pytest.skip(
+            f"no gas baseline {os.path.relpath(path)}, "
+            "record it with GAS_BASELINE_UPDATE=1 and commit it"
+        )
+
+    threshold = float(os.environ.get("GAS_REGRESSION_THRESHOLD", "0.05"))
+    regressed = regressions(baseline, gas, threshold)
+    assert not regressed, "gas regressions (baseline -> current):\n" + "\n".join(
+        f"  {key}: {old} -> {new} (+{(new / max(old, 1) - 1) * 100:.1f}%)"
+        for key, old, new in regressed
+    )
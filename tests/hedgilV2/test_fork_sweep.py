@@ -0,0 +1,62 @@
+from utils import actions, checks
+import shutil
+import pytest
+from brownie import chain, web3
+from scripts.fork_sweep import (
+    ANVIL,
+    SweepContracts,
+    _request,
+    epoch_started_state,
+    start_anvil,
+    sweep,
+    sweep_spec,
+)
+
+# smoke test of the anvil sweep, forking the test chain itself
+@pytest.mark.skipif(shutil.which(ANVIL) is None, reason="anvil is not installed")
+def test_fork_sweep(
+    chain,
+    tokenA,
+    tokenB,
+    vaultA,
+    vaultB,
+    joint,
+    user,
+    amountA,
+    amountB,
+    hedge_type,
+):
+    checks.check_run_test("hedgilV2", hedge_type)
+    actions.user_deposit(user, vaultA, tokenA, amountA)
+    actions.user_deposit(user, vaultB, tokenB, amountB)
+    url, block = web3.provider.endpoint_uri, chain.height
+    assert joint.investedA() == 0
+
+    # the epoch started in the dumped state is there once loaded in another anvil
+    spec = sweep_spec(joint)
+    state = epoch_started_state(url, block, spec)
+    process, w3 = start_anvil(url, block)
+    try:
+        contracts = SweepContracts(w3, spec)
+        assert contracts.joint.functions.investedA().call() == 0
+        _request(w3, "anvil_loadState", [state])
+        assert contracts.joint.functions.investedA().call() > 0
+    finally:
+        process.terminate()
+
+    # the same parameters twice in a single worker: the second run starts from the reverted
+    # snapshot so it gives the same results
+    params = {"hedgeBudget": 50, "protectionRange": 1000, "period": 2 * 86400}
+    other = {"hedgeBudget": 25, "protectionRange": 500, "period": 86400}
+    results = sweep(joint, [params, other, params], workers=1, block=block, url=url)
+
+    assert [r.get("error") for r in results] == [None] * 3
+    assert results[0] == results[2]
+    for result in results:
+        assert result["investedA"] > 0 and result["investedB"] > 0
+        # decoded from both Harvested events, providerB paid the hedge
+        assert all(
+            isinstance(result[key], int)
+            for key in ["profitA", "lossA", "profitB", "lossB"]
+        )
+        assert result["profitB"] != result["lossB"]
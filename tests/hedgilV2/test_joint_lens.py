@@ -0,0 +1,62 @@
+from utils import actions, checks, utils
+import pytest
+from brownie import chain
+from scripts.joint_lens import read_joint_status, read_joint_statuses
+from scripts.joint_snapshot import read_joint_balances
+
+# the lens reports what the joint and its providers return themselves, at the same block
+def test_joint_lens(
+    chain,
+    tokenA,
+    tokenB,
+    vaultA,
+    vaultB,
+    providerA,
+    providerB,
+    joint,
+    user,
+    amountA,
+    amountB,
+    gov,
+    hedge_type,
+):
+    checks.check_run_test("hedgilV2", hedge_type)
+    actions.user_deposit(user, vaultA, tokenA, amountA)
+    actions.user_deposit(user, vaultB, tokenB, amountB)
+
+    chain.sleep(1)
+    actions.gov_start_epoch(
+        gov, providerA, providerB, joint, vaultA, vaultB, amountA, amountB
+    )
+    # accrue some rewards
+    utils.sleep_mine(3600)
+    check_lens(joint, providerA, providerB)
+
+    vaultA.updateStrategyDebtRatio(providerA, 0, {"from": gov})
+    vaultB.updateStrategyDebtRatio(providerB, 0, {"from": gov})
+    actions.gov_end_epoch(gov, providerA, providerB, joint, vaultA, vaultB)
+    check_lens(joint, providerA, providerB)
+
+    # a reverting joint is reported as failed without failing the others
+    (status, not_a_joint) = read_joint_statuses([joint, user])
+    assert status.success
+    assert not not_a_joint.success and not_a_joint.joint == user
+
+
+def check_lens(joint, providerA, providerB):
+    state = read_joint_status(joint)
+    assert state.success
+    assert state.providerA == providerA and state.providerB == providerB
+
+    # the providers' own estimatedTotalAssets, from the joint's single evaluation
+    balances = read_joint_balances(joint, providerA, providerB, state.block)
+    assert state.estimatedTotalAssetsA == balances.estimatedTotalAssetsA
+    assert state.estimatedTotalAssetsB == balances.estimatedTotalAssetsB
+    assert state.balanceOfA == balances.balanceOfA
+    assert state.balanceOfB == balances.balanceOfB
+    assert state.balanceOfStake == balances.balanceOfStake
+    assert state.balanceOfPair == balances.balanceOfPair
+    assert (
+        state.assetsAfterBalanceA,
+        state.assetsAfterBalanceB,
+    ) == joint.estimatedTotalAssetsAfterBalance(block_identifier=state.block)
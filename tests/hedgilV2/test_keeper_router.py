@@ -0,0 +1,177 @@
+from utils import actions, checks, utils
+import pytest
+from brownie import Contract, LegacyJointMock, chain, history, reverts
+from scripts.keeper import (
+    AUTO_PROTECT,
+    CLAIM_REWARDS,
+    END_EPOCH,
+    SCAN_FAILED,
+    Keeper,
+    scan,
+)
+
+# both providers are harvested in the same transaction by the KeeperRouter
+def test_roll_epoch_in_one_transaction(
+    chain,
+    tokenA,
+    tokenB,
+    vaultA,
+    vaultB,
+    providerA,
+    providerB,
+    joint,
+    user,
+    amountA,
+    amountB,
+    gov,
+    keeper,
+    keeper_router,
+    hedge_type,
+):
+    checks.check_run_test("hedgilV2", hedge_type)
+    actions.user_deposit(user, vaultA, tokenA, amountA)
+    actions.user_deposit(user, vaultB, tokenB, amountB)
+    chain.sleep(1)
+
+    with reverts("!keeper"):
+        keeper_router.roll([joint], {"from": user})
+
+    # start the epoch
+    tx = keeper_router.roll([joint], {"from": keeper})
+    assert len(tx.events["Harvested"]) == 2
+    assert tx.events["Rolled"]["joint"] == joint
+    vaultA.updateStrategyDebtRatio(providerA, 0, {"from": gov})
+    vaultB.updateStrategyDebtRatio(providerB, 0, {"from": gov})
+    checks.epoch_started(providerA, providerB, joint, amountA, amountB)
+
+    # nothing to do until the hedge is about to expire
+    assert keeper_router.harvestTrigger(joint, 0) == False
+    (scanned,) = scan([joint], keeper_router)
+    assert not scanned.needs(END_EPOCH)
+    tx = keeper_router.rollTriggered([joint], 0, {"from": keeper})
+    assert "Rolled" not in tx.events
+
+    actions.wait_period_fraction(joint, 0.995)
+    assert keeper_router.harvestTrigger(joint, 0) == True
+    (scanned, not_a_joint) = scan([joint, user], keeper_router)
+    assert scanned.needs(END_EPOCH)
+    assert scanned.describe().endswith("(hedge expiring)")
+    assert not_a_joint.actions == SCAN_FAILED
+
+    # a joint failing to roll doesn't prevent rolling the others
+    tx = keeper_router.rollTriggered([user, joint], 0, {"from": keeper})
+    assert tx.events["RollFailed"]["joint"] == user
+    assert tx.events["Rolled"]["joint"] == joint
+    assert len(tx.events["Harvested"]) == 2
+    checks.epoch_ended(providerA, providerB, joint)
+
+
+# pending rewards over the joint's threshold are claimed, then not again before claim_interval
+def test_keeper_claims_rewards(
+    chain,
+    tokenA,
+    tokenB,
+    vaultA,
+    vaultB,
+    providerA,
+    providerB,
+    joint,
+    user,
+    amountA,
+    amountB,
+    gov,
+    keeper,
+    keeper_router,
+    hedge_type,
+):
+    checks.check_run_test("hedgilV2", hedge_type)
+    actions.user_deposit(user, vaultA, tokenA, amountA)
+    actions.user_deposit(user, vaultB, tokenB, amountB)
+    chain.sleep(1)
+    keeper_router.roll([joint], {"from": keeper})
+    utils.sleep_mine(3600)
+
+    joint.setMinRewardToHarvest(2**256 - 1, {"from": gov})
+    (scanned,) = scan([joint], keeper_router)
+    assert not scanned.needs(CLAIM_REWARDS)
+    joint.setMinRewardToHarvest(0, {"from": gov})
+
+    bot = Keeper([joint], keeper, keeper_router, claim_interval=100)
+    sent = len(history)
+    bot.step(chain.height)
+    assert len(history) == sent + 1
+    assert history[-1].events["RewardsClaimed"]["joint"] == joint
+    assert joint.pendingReward() == 0
+
+    # rewards accrue again right away, the joint was just claimed so nothing is sent
+    utils.sleep_mine(10 * utils.BLOCK_TIME)
+    (scanned,) = bot.step(chain.height)
+    assert scanned.needs(CLAIM_REWARDS)
+    assert len(history) == sent + 1
+
+    chain.mine(100)
+    bot.step(chain.height)
+    assert len(history) == sent + 2
+
+
+# joints deployed before Joint.autoProtect and a public minTimeToMaturity (the ones scripts/keeper.py
+# runs) are still scanned: their epoch ends without a reason
+def test_scan_legacy_joint(
+    tokenA, tokenB, providerA, providerB, gov, keeper_router, hedge_type
+):
+    checks.check_run_test("hedgilV2", hedge_type)
+    legacy = gov.deploy(LegacyJointMock, providerA, providerB, tokenA, tokenB)
+    (scanned,) = scan([legacy], keeper_router)
+    assert scanned.actions == 0
+
+    legacy.setShouldEndEpoch(True, {"from": gov})
+    legacy.setPendingReward(1, {"from": gov})
+    (scanned,) = scan([legacy], keeper_router)
+    assert scanned.actions == END_EPOCH | CLAIM_REWARDS
+    assert scanned.reason == 0
+    assert scanned.describe() == "end epoch, claim rewards"
+
+
+# an epoch ending before half of the hedge period trips the auto-protection: the keeper rolls the
+# joint on its own and keeps track of it, the joint doesn't invest anymore
+def test_keeper_auto_protect(
+    chain,
+    tokenA,
+    tokenB,
+    vaultA,
+    vaultB,
+    providerA,
+    providerB,
+    joint,
+    user,
+    amountA,
+    amountB,
+    gov,
+    keeper,
+    keeper_router,
+    tokenA_whale,
+    router,
+    hedge_type,
+):
+    checks.check_run_test("hedgilV2", hedge_type)
+    actions.user_deposit(user, vaultA, tokenA, amountA)
+    actions.user_deposit(user, vaultB, tokenB, amountB)
+    chain.sleep(1)
+    keeper_router.roll([joint], {"from": keeper})
+
+    # 10% of the tokenA reserve moves the price out of the protection range
+    pair = Contract(joint.pair())
+    reserves = pair.getReserves()
+    reserveA = reserves[0] if pair.token0() == tokenA else reserves[1]
+    actions.dump_token(tokenA_whale, tokenA, tokenB, router, reserveA // 10)
+    (scanned,) = scan([joint], keeper_router)
+    assert scanned.actions & (END_EPOCH | AUTO_PROTECT) == END_EPOCH | AUTO_PROTECT
+    assert scanned.describe().endswith("(price out of range)")
+
+    bot = Keeper([joint], keeper, keeper_router)
+    sent = len(history)
+    bot.step(chain.height)
+    assert len(history) == sent + 1
+    assert history[-1].events["Rolled"]["joint"] == joint
+    assert bot.protected == {str(joint): chain.height - 1}
+    assert joint.dontInvestWant()
@@ -0,0 +1,105 @@
+from utils import actions, checks, utils
+import pytest
+from brownie import Contract, chain
+from scripts.joint_math import estimated_total_assets_after_balance
+from scripts.joint_snapshot import joint_state_plan
+from scripts.multicall import run_plan
+from scripts.uniswap_math import get_amount_in, get_amount_out
+
+# tests the off-chain port of estimatedTotalAssetsAfterBalance matches the contract to the wei
+def test_estimated_total_assets_port(
+    chain,
+    tokenA,
+    tokenB,
+    vaultA,
+    vaultB,
+    providerA,
+    providerB,
+    joint,
+    user,
+    amountA,
+    amountB,
+    gov,
+    tokenA_whale,
+    tokenB_whale,
+    router,
+    hedge_type,
+):
+    checks.check_run_test("hedgilV2", hedge_type)
+    # Deposit to the vault
+    actions.user_deposit(user, vaultA, tokenA, amountA)
+    actions.user_deposit(user, vaultB, tokenB, amountB)
+
+    chain.sleep(1)
+    actions.gov_start_epoch(
+        gov, providerA, providerB, joint, vaultA, vaultB, amountA, amountB
+    )
+    # accrue some rewards
+    utils.sleep_mine(3600)
+
+    state = run_plan(joint_state_plan(joint), chain.height)
+    assert (
+        estimated_total_assets_after_balance(state)
+        == joint.estimatedTotalAssetsAfterBalance()
+    )
+
+    # move the price both ways so both branches of calculateSellToBalance are used
+    actions.dump_token(
+        tokenA_whale, tokenA, tokenB, router, tokenA.balanceOf(joint.pair()) // 20
+    )
+    state = run_plan(joint_state_plan(joint), chain.height)
+    assert (
+        estimated_total_assets_after_balance(state)
+        == joint.estimatedTotalAssetsAfterBalance()
+    )
+
+    actions.dump_token(
+        tokenB_whale, tokenB, tokenA, router, tokenB.balanceOf(joint.pair()) // 10
+    )
+    state = run_plan(joint_state_plan(joint), chain.height)
+    assert (
+        estimated_total_assets_after_balance(state)
+        == joint.estimatedTotalAssetsAfterBalance()
+    )
+
+
+# tests the port of UniswapV2Library matches the contract (exposed by the router mock) to the wei,
+# with the reserves of the joint's pair
+def test_uniswap_library_port(
+    chain,
+    tokenA,
+    tokenB,
+    vaultA,
+    vaultB,
+    providerA,
+    providerB,
+    joint,
+    user,
+    amountA,
+    amountB,
+    gov,
+    router,
+    dex,
+    hedge_type,
+):
+    checks.check_run_test("hedgilV2", hedge_type)
+    if dex != "LOCAL":
+        # live routers have their own fee, the port follows contracts/libraries
+        pytest.skip()
+    actions.user_deposit(user, vaultA, tokenA, amountA)
+    actions.user_deposit(user, vaultB, tokenB, amountB)
+
+    chain.sleep(1)
+    actions.gov_start_epoch(
+        gov, providerA, providerB, joint, vaultA, vaultB, amountA, amountB
+    )
+
+    (reserveA, reserveB) = joint.getReserves()
+    for amount in [1, 10 ** tokenA.decimals(), amountA, reserveA]:
+        assert get_amount_out(amount, reserveA, reserveB) == router.getAmountOut(
+            amount, reserveA, reserveB
+        )
+    for amount in [1, 10 ** tokenB.decimals(), amountB, reserveB - 1]:
+        assert get_amount_in(amount, reserveA, reserveB) == router.getAmountIn(
+            amount, reserveA, reserveB
+        )
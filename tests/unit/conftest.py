@@ -0,0 +1,43 @@
+import pytest
+
+# The tests here only check python code (scripts/*_math.py, scripts/epoch_backtest.py): they
+# replace the autouse fixtures of tests/conftest.py so nothing is deployed or funded and they
+# aren't parametrized over hedges and dexes. They run without a fork:
+#   brownie test tests/unit --network development
+# or with plain pytest, without brownie's plugin and the project's conftest:
+#   python -m pytest tests/unit -p no:pytest-brownie --noconftest
+AUTOUSE_FIXTURES = [
+    "isolation",
+    "donate",
+    "joint_lens",
+    "reset_chain",
+    "reset_tenderly_fork",
+    "hedge_type",
+    "dex",
+    "tokenA",
+    "tokenB",
+    "rewards",
+    "lp_whale",
+    "tokenA_whale",
+    "tokenB_whale",
+    "amountA",
+    "amountB",
+    "vaultA",
+    "vaultB",
+    "provideLiquidity",
+    "trade_factory",
+    "auth_yswaps",
+    "RELATIVE_APPROX",
+]
+
+
+def _unused(name):
+    @pytest.fixture(name=name, scope="session")
+    def fixture():
+        yield None
+
+    return fixture
+
+
+for _name in AUTOUSE_FIXTURES:
+    globals()[f"_{_name}"] = _unused(_name)
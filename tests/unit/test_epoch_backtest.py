@@ -0,0 +1,129 @@
+import numpy as np
+import pytest
+from scripts.epoch_backtest import (
+    FEE,
+    MIN_TIME_TO_MATURITY,
+    STEP,
+    grid,
+    simulate_epochs,
+    summarize,
+    sweep,
+)
+from scripts.joint_math import (
+    PRICE_DECIMALS,
+    estimated_total_assets_after_balance,
+    is_price_out_of_range,
+)
+
+BUDGET = 50
+PROTECTION_RANGE = 1000
+PERIOD = 2 * 86400
+N_STEPS = (PERIOD - MIN_TIME_TO_MATURITY) // STEP
+# deep enough for the closing swap to have no visible price impact
+POOL_DEPTH = 10**9
+SCALE = 10**18
+
+
+def _simulate(paths, hedge_cost=1.0):
+    return simulate_epochs(
+        paths,
+        BUDGET,
+        PROTECTION_RANGE,
+        PERIOD,
+        hedge_cost=hedge_cost,
+        pool_depth=POOL_DEPTH,
+    )
+
+
+# nothing moves: the budget paid for the hedge and the fee of the closing swap are the only losses
+def test_flat_price():
+    paths = np.ones((2, N_STEPS + 10))
+    result = _simulate(paths)
+    assert not result["ended_early"].any()
+    assert (result["duration"] == N_STEPS * STEP).all()
+
+    budget = BUDGET / 10_000
+    returnA, returnB = result["returnA"][0], result["returnB"][0]
+    # tokenB paid the hedge so tokenA is sold back to the invested ratio (1 - budget : 1)
+    assert returnA < 0
+    assert pytest.approx((1 + returnA) / (1 - budget), rel=1e-9) == 1 + returnB
+    assert pytest.approx(returnA + returnB, rel=1e-6) == -budget - (1 - FEE) * -returnA
+
+    # a free hedge leaves the providers as they were
+    result = _simulate(paths, hedge_cost=0.0)
+    assert pytest.approx(result["returnA"], abs=1e-12) == 0
+    assert pytest.approx(result["returnB"], abs=1e-12) == 0
+
+
+# the price leaves the protection range: the epoch ends at the step joint_math.shouldEndEpoch
+# says so and hedgil pays the impermanent loss up to the range only.
+# 1.103 and 0.902 are out of range from the pair price but not from investedB / investedA
+# (the contract's initial price, hedge cost included)
+@pytest.mark.parametrize(
+    "moves", [[1.05, 1.103, 1.2], [1.05, 1.103, 1.5], [0.95, 0.902, 0.7]]
+)
+def test_price_out_of_range(moves):
+    path = np.concatenate([[1.0], moves, np.full(N_STEPS, moves[-1])])
+    result = _simulate(path[None, :])
+
+    # same step as the contract's price check
+    budget = BUDGET / 10_000
+    investedA, investedB = int((1 - budget) * SCALE), int(SCALE)
+    end = next(
+        step
+        for step, price in enumerate(path)
+        if is_price_out_of_range(
+            investedA,
+            investedB,
+            PROTECTION_RANGE,
+            SCALE,
+            int(price * SCALE),
+            18,
+            18,
+            PRICE_DECIMALS["hedgil"],
+        )
+    )
+    assert result["ended_early"][0]
+    assert result["duration"][0] == end * STEP
+    price = path[end]
+
+    # LP removed at the end price, hedge payout = impermanent loss at the capped price
+    lp = 1 - budget
+    protection = PROTECTION_RANGE / 10_000
+    capped = min(max(price, 1 - protection), 1 + protection)
+    payout = lp * capped + lp - 2 * lp * np.sqrt(capped)
+    state = {
+        "investedA": investedA,
+        "investedB": investedB,
+        "reserveA": int(lp / np.sqrt(price) * POOL_DEPTH * SCALE),
+        "reserveB": int(lp * np.sqrt(price) * POOL_DEPTH * SCALE),
+        "lpBalance": SCALE,
+        "totalSupply": POOL_DEPTH * SCALE,
+        "pairDecimals": 18,
+        "balanceOfA": int(budget * SCALE),
+        "balanceOfB": 0,
+        "callProfit": 0,
+        "putProfit": int(payout * SCALE),
+        "rewardSwapTo": None,
+        "rewardOut": 0,
+        "decimalsA": 18,
+        "decimalsB": 18,
+    }
+    assetsA, assetsB = estimated_total_assets_after_balance(state)
+    assert pytest.approx(result["returnA"][0], abs=1e-9) == assetsA / SCALE - 1
+    assert pytest.approx(result["returnB"][0], abs=1e-9) == assetsB / SCALE - 1
+
+
+# the process pool gives the same summaries as running every set of parameters here
+def test_sweep():
+    rng = np.random.default_rng(0)
+    paths = np.exp(np.cumsum(rng.normal(0, 0.01, (50, N_STEPS + 1)), axis=1))
+    parameter_grid = grid(
+        hedgeBudget=[25, 50], protectionRange=[500, 1000], period=[PERIOD]
+    )
+
+    results = sweep(paths, parameter_grid, workers=2, reward_apr=0.1)
+    assert len(results) == len(parameter_grid)
+    for params, summary in zip(parameter_grid, results):
+        expected = summarize(simulate_epochs(paths, **params, reward_apr=0.1), params)
+        assert summary == pytest.approx(expected)
@@ -0,0 +1,155 @@
+import pytest
+from scripts.joint_math import (
+    PRICE_DECIMALS,
+    RATIO_PRECISION,
+    balance_of_tokens_in_lp,
+    calculate_sell_to_balance,
+    estimated_total_assets_after_balance,
+    get_ratios,
+    init_price,
+    is_price_out_of_range,
+    pair_price,
+)
+from scripts.uniswap_math import get_amount_out
+
+SCALE = 10**18
+RESERVE = 10**6 * SCALE
+
+
+def _state(**values):
+    # one LP token out of 100 of a pair of 1M / 1M, both providers invested 10k
+    state = {
+        "investedA": 10**4 * SCALE,
+        "investedB": 10**4 * SCALE,
+        "reserveA": RESERVE,
+        "reserveB": RESERVE,
+        "lpBalance": SCALE,
+        "totalSupply": 100 * SCALE,
+        "pairDecimals": 18,
+        "balanceOfA": 0,
+        "balanceOfB": 0,
+        "callProfit": 0,
+        "putProfit": 0,
+        "rewardSwapTo": None,
+        "rewardOut": 0,
+        "decimalsA": 18,
+        "decimalsB": 18,
+    }
+    state.update(values)
+    return state
+
+
+# tokenB per tokenA in PRICE_DECIMALS, whatever the decimals of the tokens
+@pytest.mark.parametrize("decimalsA, decimalsB", [(18, 18), (18, 6), (6, 18)])
+def test_prices(decimalsA, decimalsB):
+    price_decimals = PRICE_DECIMALS["hedgil"]
+    reserveA, reserveB = 2 * 10**decimalsA, 3 * 10**decimalsB
+    expected = 3 * price_decimals // 2
+    assert (
+        pair_price(reserveA, reserveB, decimalsA, decimalsB, price_decimals) == expected
+    )
+    assert (
+        init_price(reserveA, reserveB, decimalsA, decimalsB, price_decimals) == expected
+    )
+
+
+# the epoch ends once the pair price moved protectionRange (10%) from investedB / investedA
+@pytest.mark.parametrize(
+    "reserveB, out_of_range",
+    [(RESERVE, False), (RESERVE * 109 // 100, False), (RESERVE * 111 // 100, True)]
+    + [(RESERVE * 91 // 100, False), (RESERVE * 89 // 100, True)],
+)
+def test_is_price_out_of_range(reserveB, out_of_range):
+    assert (
+        is_price_out_of_range(
+            SCALE,
+            SCALE,
+            1_000,
+            RESERVE,
+            reserveB,
+            18,
+            18,
+            PRICE_DECIMALS["hedgil"],
+        )
+        == out_of_range
+    )
+
+
+def test_is_price_out_of_range_without_epoch():
+    # nothing invested: no epoch to end
+    assert not is_price_out_of_range(
+        0, SCALE, 1_000, RESERVE, 2 * RESERVE, 18, 18, PRICE_DECIMALS["hedgil"]
+    )
+
+
+def test_balance_of_tokens_in_lp():
+    assert balance_of_tokens_in_lp(RESERVE, 2 * RESERVE, SCALE, 18, 100 * SCALE) == (
+        RESERVE // 100,
+        2 * RESERVE // 100,
+    )
+
+
+@pytest.mark.parametrize(
+    "currentA, currentB, sell",
+    [(100, 100, None), (150, 100, "A"), (100, 150, "B"), (0, 100, "B")],
+)
+def test_calculate_sell_to_balance(currentA, currentB, sell):
+    currentA, currentB = currentA * SCALE, currentB * SCALE
+    startingA = startingB = 100 * SCALE
+    sell_token, amount = calculate_sell_to_balance(
+        currentA, currentB, startingA, startingB, RESERVE, RESERVE, 18, 18
+    )
+    assert sell_token == sell
+    if sell is None:
+        assert amount == 0
+        return
+
+    # after the swap both balances are in the starting ratio again
+    if sell == "A":
+        currentA, currentB = currentA - amount, currentB + get_amount_out(
+            amount, RESERVE, RESERVE
+        )
+    else:
+        currentA, currentB = (
+            currentA + get_amount_out(amount, RESERVE, RESERVE),
+            currentB - amount,
+        )
+    ratioA, ratioB = get_ratios(currentA, currentB, startingA, startingB)
+    assert abs(ratioA - ratioB) <= 1
+
+
+def test_calculate_sell_to_balance_without_epoch():
+    sell = calculate_sell_to_balance(SCALE, SCALE, 0, SCALE, RESERVE, RESERVE, 18, 18)
+    assert sell == (None, 0)
+
+
+def test_estimated_total_assets_after_balance():
+    lp = RESERVE // 100
+    # nothing moved: the LP is returned as it is
+    assert estimated_total_assets_after_balance(_state()) == (lp, lp)
+
+    # idle balances and hedge profits are added to the LP
+    state = _state(balanceOfA=1, balanceOfB=2, callProfit=3, putProfit=4)
+    assert estimated_total_assets_after_balance(state) == (lp + 4, lp + 6)
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        {"putProfit": 500 * SCALE},
+        {"callProfit": 500 * SCALE},
+        {"rewardSwapTo": "A", "rewardOut": 100 * SCALE},
+        {"rewardSwapTo": "B", "rewardOut": 100 * SCALE},
+        {"investedA": 2 * 10**4 * SCALE},
+    ],
+)
+def test_estimated_total_assets_rebalanced(values):
+    state = _state(**values)
+    assetsA, assetsB = estimated_total_assets_after_balance(state)
+
+    # the extra tokens are shared by both providers, back in the ratio they invested
+    ratioA, ratioB = get_ratios(
+        assetsA, assetsB, state["investedA"], state["investedB"]
+    )
+    assert abs(ratioA - ratioB) <= 1
+    assert ratioA != RATIO_PRECISION
@@ -0,0 +1,86 @@
+import math
+import numpy as np
+import pytest
+from scripts.uniswap_math import (
+    FEE_DENOMINATOR,
+    INT64_MAX,
+    UINT256_MAX,
+    get_amount_in,
+    get_amount_in_array,
+    get_amount_out,
+    get_amount_out_array,
+)
+
+# largest value for which the *_array functions still use int64
+INT64_CUTOFF = math.isqrt(INT64_MAX // FEE_DENOMINATOR)
+
+# worked by hand from the library formulas:
+# out = 1000 * 997 * 10000 // (10000 * 1000 + 1000 * 997) = 9970000000 // 10997000 = 906
+# in = 10000 * 906 * 1000 // ((10000 - 906) * 997) + 1 = 9060000000 // 9066718 + 1 = 1000
+def test_known_values():
+    assert get_amount_out(1000, 10000, 10000) == 906
+    assert get_amount_in(906, 10000, 10000) == 1000
+
+    with pytest.raises(ValueError, match="INSUFFICIENT_INPUT_AMOUNT"):
+        get_amount_out(0, 10000, 10000)
+    with pytest.raises(ValueError, match="INSUFFICIENT_LIQUIDITY"):
+        get_amount_in(1, 0, 10000)
+    with pytest.raises(ValueError, match="ds-math-sub-underflow"):
+        get_amount_in(10001, 10000, 10000)
+
+
+# the whole reserve out: the library divides by zero, in both modes of the array function
+@pytest.mark.parametrize("reserve", [10000, 10**30])
+def test_amount_in_of_the_whole_reserve(reserve):
+    assert get_amount_in(reserve - 1, reserve, reserve) > 0
+    with pytest.raises(ValueError, match="Division or modulo by zero"):
+        get_amount_in(reserve, reserve, reserve)
+    with pytest.raises(ValueError, match="Division or modulo by zero"):
+        get_amount_in_array(np.array([1, reserve]), reserve, reserve)
+    with pytest.raises(ValueError, match="ds-math-sub-underflow"):
+        get_amount_in_array(np.array([1, reserve + 1]), reserve, reserve)
+
+
+# products over uint256 revert like SafeMathUniswap instead of growing python ints
+def test_overflow():
+    with pytest.raises(ValueError, match="ds-math-mul-overflow"):
+        get_amount_out(2**128, 2**128, 2**128)
+    with pytest.raises(ValueError, match="ds-math-mul-overflow"):
+        get_amount_out_array(np.array([1, 2**128]), 2**128, 2**128)
+    with pytest.raises(ValueError, match="ds-math-mul-overflow"):
+        get_amount_in(2**127, 2**128, 2**128)
+    with pytest.raises(ValueError, match="ds-math-mul-overflow"):
+        get_amount_in_array(np.array([1, 2**127]), 2**128, 2**128)
+    with pytest.raises(ValueError, match="ds-math-add-overflow"):
+        get_amount_out(1, UINT256_MAX // 1000, 1)
+
+    # right below the limit there's no revert
+    assert get_amount_out(1, 1, UINT256_MAX // 997) == UINT256_MAX // 997 * 997 // 1997
+
+
+# the vectorized functions give the scalar results, with int64 and with python ints
+@pytest.mark.parametrize("largest", [10**6, INT64_CUTOFF, INT64_CUTOFF + 1, 10**30])
+def test_arrays_match_scalars(largest):
+    reserve_in = largest
+    reserve_out = largest * 2 // 3
+    amounts = np.array([1, 2, 997, largest // 1000, largest // 3, largest])
+    expected_dtype = np.int64 if largest <= INT64_CUTOFF else object
+
+    amounts_out = get_amount_out_array(amounts, reserve_in, reserve_out)
+    assert amounts_out.dtype == expected_dtype
+    assert [int(out) for out in amounts_out] == [
+        get_amount_out(int(amount), reserve_in, reserve_out) for amount in amounts
+    ]
+
+    wanted = amounts[amounts < reserve_out]
+    amounts_in = get_amount_in_array(wanted, reserve_in, reserve_out)
+    assert amounts_in.dtype == expected_dtype
+    assert [int(amount_in) for amount_in in amounts_in] == [
+        get_amount_in(int(amount), reserve_in, reserve_out) for amount in wanted
+    ]
+
+    # reserves broadcast as arrays too
+    reserves = np.array([reserve_in, reserve_in // 2 + 1])
+    assert [int(out) for out in get_amount_out_array(1, reserves, reserve_out)] == [
+        get_amount_out(1, int(reserve), reserve_out) for reserve in reserves
+    ]
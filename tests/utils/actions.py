@@ -1,6 +1,7 @@
 import pytest
 from brownie import chain, Contract, AggregatorMock, accounts
 from utils import checks, utils
+from scripts.token_funding import fund
 
 # This file is reserved for standard actions like deposits
 def user_deposit(user, vault, token, amount):
@@ -82,12 +83,8 @@ def generate_profit(
     profitA = providerA.estimatedTotalAssets() * amount_percentage
     profitB = providerB.estimatedTotalAssets() * amount_percentage
 
-    tokenA.transfer(
-        joint, profitA, {"from": tokenA_whale, "gas": 6_000_000, "gas_price": 0}
-    )
-    tokenB.transfer(
-        joint, profitB, {"from": tokenB_whale, "gas": 6_000_000, "gas_price": 0}
-    )
+    fund(tokenA, joint, profitA, tokenA_whale)
+    fund(tokenB, joint, profitB, tokenB_whale)
     chain.mine(1, timedelta=86_400 * 5)
 
     return profitA, profitB
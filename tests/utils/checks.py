@@ -1,6 +1,8 @@
 import brownie
 from brownie import interface
 import pytest
+from scripts.joint_lens import read_joint_status
+from scripts.joint_snapshot import read_strategy_state
 
 # This file is reserved for standard checks
 def check_vault_empty(vault):
@@ -8,14 +10,18 @@ def check_vault_empty(vault):
     assert vault.totalSupply() == 0
 
 
+# checks read everything they assert at one block: joints in one JointLens call (scripts/joint_lens.py),
+# strategies in one multicall (scripts/joint_snapshot.py)
 def epoch_started(providerA, providerB, joint, amountA, amountB):
-    assert pytest.approx(providerA.estimatedTotalAssets(), rel=2e-3) == amountA
+    state = read_joint_status(joint)
+    assert state.success
+    assert pytest.approx(state.estimatedTotalAssetsA, rel=2e-3) == amountA
     # Less precision toa ccount for hedgil cost!
-    assert pytest.approx(providerB.estimatedTotalAssets(), rel=5e-2) == amountB
+    assert pytest.approx(state.estimatedTotalAssetsB, rel=5e-2) == amountB
 
-    assert joint.balanceOfA() == 0
-    assert joint.balanceOfB() == 0
-    assert joint.balanceOfStake() > 0
+    assert state.balanceOfA == 0
+    assert state.balanceOfB == 0
+    assert state.balanceOfStake > 0
 
     # assert joint.activeHedgeID() != 0
     # assert joint.activeCallID() != 0
@@ -23,41 +29,47 @@ def epoch_started(providerA, providerB, joint, amountA, amountB):
 
 
 def non_hedged_epoch_started(providerA, providerB, joint, amountA, amountB):
-    assert pytest.approx(providerA.estimatedTotalAssets(), rel=1e-5) == amountA
-    assert pytest.approx(providerB.estimatedTotalAssets(), rel=1e-5) == amountB
+    state = read_joint_status(joint)
+    assert state.success
+    assert pytest.approx(state.estimatedTotalAssetsA, rel=1e-5) == amountA
+    assert pytest.approx(state.estimatedTotalAssetsB, rel=1e-5) == amountB
 
-    assert joint.balanceOfA() == 0
-    assert joint.balanceOfB() == 0
-    assert joint.balanceOfStake() > 0
+    assert state.balanceOfA == 0
+    assert state.balanceOfB == 0
+    assert state.balanceOfStake > 0
 
 
 def epoch_ended(providerA, providerB, joint):
-    assert joint.balanceOfA() == 0
-    assert joint.balanceOfB() == 0
+    state = read_joint_status(joint)
+    assert state.success
+    assert state.balanceOfA == 0
+    assert state.balanceOfB == 0
     # assert joint.activeHedgeID() == 0
     # assert joint.activeCallID() == 0
     # assert joint.activePutID() == 0
-    assert joint.balanceOfStake() == 0
-    assert joint.balanceOfPair() == 0
+    assert state.balanceOfStake == 0
+    assert state.balanceOfPair == 0
 
 
 def non_hedged_epoch_ended(providerA, providerB, joint):
-    assert joint.balanceOfA() == 0
-    assert joint.balanceOfB() == 0
-    assert joint.balanceOfStake() == 0
-    assert joint.balanceOfPair() == 0
+    state = read_joint_status(joint)
+    assert state.success
+    assert state.balanceOfA == 0
+    assert state.balanceOfB == 0
+    assert state.balanceOfStake == 0
+    assert state.balanceOfPair == 0
 
 
 def check_strategy_empty(strategy):
-    assert strategy.estimatedTotalAssets() == 0
-    vault = interface.VaultAPI(strategy.vault())
-    assert vault.strategies(strategy).dict()["totalDebt"] == 0
+    state = read_strategy_state(strategy)
+    assert state.estimatedTotalAssets == 0
+    assert state.totalDebt == 0
 
 
 def check_revoked_strategy(vault, strategy):
-    status = vault.strategies(strategy).dict()
-    assert status.debtRatio == 0
-    assert status.totalDebt == 0
+    state = read_strategy_state(strategy, vault)
+    assert state.debtRatio == 0
+    assert state.totalDebt == 0
 
 
 def check_harvest_profit(tx, profit_amount):
@@ -70,10 +82,10 @@ def check_harvest_loss(tx, loss_amount):
 
 def check_accounting(vault, strategy, totalGain, totalLoss, totalDebt):
     # inputs have to be manually calculated then checked
-    status = vault.strategies(strategy).dict()
-    assert status["totalGain"] == totalGain
-    assert status["totalLoss"] == totalLoss
-    assert status["totalDebt"] == totalDebt
+    state = read_strategy_state(strategy, vault)
+    assert state.totalGain == totalGain
+    assert state.totalLoss == totalLoss
+    assert state.totalDebt == totalDebt
     return
 
 def check_run_test(test_type, hedge_type):
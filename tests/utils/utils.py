@@ -1,5 +1,8 @@
 import brownie
+import requests
 from brownie import interface, chain, accounts, web3, network, Contract
+from scripts.contract_cache import cached_reads, store_reads
+from scripts.multicall import run_plan
 
 
 def sync_price(joint):
@@ -15,71 +18,180 @@ def sync_price(joint):
     imp.relay(["FTM"], [ftm_price], [chain.time()], [4281375], {"from": relayer})
 
 
+# Status dumps are recorded with the block they refer to and only read (one multicall, token
+# metadata from the contract cache) and printed when the test fails, or right away with
+# `brownie test --joint-trace` (see conftest.py). Passing tests don't pay for them.
+JOINT_TRACE = False
+_status_dumps = []
+
+
+def _status(plan):
+    dump = (web3.eth.block_number, plan)
+    if JOINT_TRACE:
+        print("\n".join(_materialize(dump)))
+    else:
+        _status_dumps.append(dump)
+
+
+def _materialize(dump):
+    block, plan = dump
+    try:
+        return run_plan(plan, block)
+    except Exception as e:
+        return [f"Status at block {block} unavailable: {e!r}"]
+
+
+def discard_status_dumps():
+    _status_dumps.clear()
+
+
+def pop_status_dumps():
+    # reads and renders the pending dumps of the current test
+    dumps = list(_status_dumps)
+    _status_dumps.clear()
+    return [line for dump in dumps for line in _materialize(dump)]
+
+
+def _with_metadata(contract_fields, calls):
+    # read plan step: (cached fields of each contract, results of calls)
+    cached = [cached_reads(contract, fields) for contract, fields in contract_fields]
+    fixed_calls = [call for _, contract_calls in cached for call in contract_calls]
+    results = yield fixed_calls + calls
+    offset = 0
+    metadata = []
+    for (contract, _), (values, contract_calls) in zip(contract_fields, cached):
+        metadata.append(
+            store_reads(
+                contract,
+                values,
+                contract_calls,
+                results[offset : offset + len(contract_calls)],
+            )
+        )
+        offset += len(contract_calls)
+    return metadata, results[offset:]
+
+
 def print_hedge_status(joint, tokenA, tokenB):
-    callID = joint.activeCallID()
-    putID = joint.activePutID()
+    # the options are read and checked now, for the costs returned, only their dump is deferred
+    callID, putID, callInfo, putInfo = run_plan(
+        _hedge_options_plan(joint), web3.eth.block_number
+    )
+    assert (callID != 0) & (putID != 0)
+    costCall = (callInfo[5] + callInfo[6]) / 0.8
+    costPut = (putInfo[5] + putInfo[6]) / 0.8
+    _status(
+        _hedge_status_plan(
+            joint, tokenA, tokenB, chain.time(), callID, putID, callInfo, putInfo
+        )
+    )
+    return (costCall, costPut)
+
+
+def _hedge_options_plan(joint):
     callProvider = Contract("0xb9ed94c6d594b2517c4296e24A8c517FF133fb6d")
     putProvider = Contract("0x790e96E7452c3c2200bbCAA58a468256d482DD8b")
-    callInfo = callProvider.options(callID)
-    putInfo = putProvider.options(putID)
-    assert (joint.activeCallID() != 0) & (joint.activePutID() != 0)
-    (callPayout, putPayout) = joint.getHedgeProfit()
-    print(f"Bought two options:")
-    print(f"CALL #{callID}")
-    print(f"\tStrike {callInfo[1]/1e8}")
-    print(f"\tAmount {callInfo[2]/1e18}")
-    print(f"\tTTM {(callInfo[4]-chain.time())/3600}h")
+    callID, putID = yield [(joint.activeCallID,), (joint.activePutID,)]
+    if callID == 0 or putID == 0:
+        return callID, putID, None, None
+    callInfo, putInfo = yield [
+        (callProvider.options, callID),
+        (putProvider.options, putID),
+    ]
+    return callID, putID, callInfo, putInfo
+
+
+def _hedge_status_plan(joint, tokenA, tokenB, now, callID, putID, callInfo, putInfo):
+    (a, b), ((callPayout, putPayout),) = yield from _with_metadata(
+        [(tokenA, ["symbol"]), (tokenB, ["symbol"])],
+        [(joint.getHedgeProfit,)],
+    )
     costCall = (callInfo[5] + callInfo[6]) / 0.8
-    print(f"\tCost {(callInfo[5]+callInfo[6])/0.8/1e18} {tokenA.symbol()}")
-    print(f"\tPayout: {callPayout/1e18} {tokenA.symbol()}")
-    print(f"PUT #{putID}")
-    print(f"\tStrike {putInfo[1]/1e8}")
-    print(f"\tAmount {putInfo[2]/1e18}")
-    print(f"\tTTM {(putInfo[4]-chain.time())/3600}h")
     costPut = (putInfo[5] + putInfo[6]) / 0.8
-    print(f"\tCost {costPut/1e6} {tokenB.symbol()}")
-    print(f"\tPayout: {putPayout/1e6} {tokenB.symbol()}")
-    return (costCall, costPut)
+    return [
+        f"Bought two options:",
+        f"CALL #{callID}",
+        f"\tStrike {callInfo[1]/1e8}",
+        f"\tAmount {callInfo[2]/1e18}",
+        f"\tTTM {(callInfo[4]-now)/3600}h",
+        f"\tCost {costCall/1e18} {a['symbol']}",
+        f"\tPayout: {callPayout/1e18} {a['symbol']}",
+        f"PUT #{putID}",
+        f"\tStrike {putInfo[1]/1e8}",
+        f"\tAmount {putInfo[2]/1e18}",
+        f"\tTTM {(putInfo[4]-now)/3600}h",
+        f"\tCost {costPut/1e6} {b['symbol']}",
+        f"\tPayout: {putPayout/1e6} {b['symbol']}",
+    ]
 
 
 def print_hedgil_status(joint, hedgil, tokenA, tokenB):
-    print("############ HEDGIL V2 STATUS ############")
+    _status(_hedgil_status_plan(joint, hedgil, tokenA, tokenB))
 
-    hedgil_id = joint.activeHedgeID()
-    hedgil_position = hedgil.getHedgilByID(hedgil_id)
 
+def _hedgil_status_plan(joint, hedgil, tokenA, tokenB):
+    (a, b), (hedgil_id, current_price) = yield from _with_metadata(
+        [(tokenA, ["symbol"]), (tokenB, ["symbol"])],
+        [(joint.activeHedgeID,), (hedgil.getCurrentPrice, tokenA)],
+    )
+    hedgil_position, current_payout, ttm = yield [
+        (hedgil.getHedgilByID, hedgil_id),
+        (hedgil.getCurrentPayout, hedgil_id),
+        (hedgil.getTimeToMaturity, hedgil_id),
+    ]
+    pair = f"{a['symbol']} / {b['symbol']}"
     strike = hedgil_position["strike"]
-    print(f"Strike price: {strike} {tokenA.symbol()} / {tokenB.symbol()}")
-    current_price = hedgil.getCurrentPrice(tokenA)
-    print(f"Current price: {current_price} {tokenA.symbol()} / {tokenB.symbol()}")
-    price_movement = current_price / strike - 1
-    print(f"Price has moved {100 * price_movement} %")
     max_price_change = hedgil_position["maxPriceChange"] / 1e4
-    print(f"Max price movement covered is {max_price_change * 100} %")
-    current_payout = hedgil.getCurrentPayout(hedgil_id)
-    print(f"Current hedgil payout is: {current_payout} {tokenB.symbol()}")
-    ttm = hedgil.getTimeToMaturity(hedgil_id)
-    print(f"Remaining time to maturity is {ttm} seconds, or {ttm / 60 / 60} hours")
-
-    print("######################################")
+    return [
+        "############ HEDGIL V2 STATUS ############",
+        f"Strike price: {strike} {pair}",
+        f"Current price: {current_price} {pair}",
+        f"Price has moved {100 * (current_price / strike - 1) if strike else 0} %",
+        f"Max price movement covered is {max_price_change * 100} %",
+        f"Current hedgil payout is: {current_payout} {b['symbol']}",
+        f"Remaining time to maturity is {ttm} seconds, or {ttm / 60 / 60} hours",
+        "######################################",
+    ]
 
 
 def vault_status(vault):
-    print(f"--- Vault {vault.name()} ---")
-    print(f"API: {vault.apiVersion()}")
-    print(f"TotalAssets: {to_units(vault, vault.totalAssets())}")
-    print(f"PricePerShare: {to_units(vault, vault.pricePerShare())}")
-    print(f"TotalSupply: {to_units(vault, vault.totalSupply())}")
+    _status(_vault_status_plan(vault))
+
+
+def _vault_status_plan(vault):
+    (fixed,), (total_assets, price_per_share, total_supply) = yield from _with_metadata(
+        [(vault, ["name", "apiVersion", "decimals"])],
+        [(vault.totalAssets,), (vault.pricePerShare,), (vault.totalSupply,)],
+    )
+    unit = 10 ** fixed["decimals"]
+    return [
+        f"--- Vault {fixed['name']} ---",
+        f"API: {fixed['apiVersion']}",
+        f"TotalAssets: {total_assets / unit}",
+        f"PricePerShare: {price_per_share / unit}",
+        f"TotalSupply: {total_supply / unit}",
+    ]
 
 
 def strategy_status(vault, strategy):
-    status = vault.strategies(strategy).dict()
-    print(f"--- Strategy {strategy.name()} ---")
-    print(f"Performance fee {status['performanceFee']}")
-    print(f"Debt Ratio {status['debtRatio']}")
-    print(f"Total Debt {to_units(vault, status['totalDebt'])}")
-    print(f"Total Gain {to_units(vault, status['totalGain'])}")
-    print(f"Total Loss {to_units(vault, status['totalLoss'])}")
+    _status(_strategy_status_plan(vault, strategy))
+
+
+def _strategy_status_plan(vault, strategy):
+    (vault_fixed, strategy_fixed), (status,) = yield from _with_metadata(
+        [(vault, ["decimals"]), (strategy, ["name"])],
+        [(vault.strategies, strategy)],
+    )
+    status = status.dict()
+    unit = 10 ** vault_fixed["decimals"]
+    return [
+        f"--- Strategy {strategy_fixed['name']} ---",
+        f"Performance fee {status['performanceFee']}",
+        f"Debt Ratio {status['debtRatio']}",
+        f"Total Debt {status['totalDebt'] / unit}",
+        f"Total Gain {status['totalGain'] / unit}",
+        f"Total Loss {status['totalLoss'] / unit}",
+    ]
 
 
 def to_units(token, amount):
@@ -96,48 +208,84 @@ def sleep(seconds=6 * 60 * 60):
     chain.mine(1)
 
 
-def sleep_mine(seconds=13.15):
-    start = chain.time()
-    blocks = int(seconds / 13.15)
+BLOCK_TIME = 13.15
+# evm_mine calls per http request on nodes without a batched mining method
+MINE_BATCH = 1_000
+
+
+def mine_blocks(blocks, interval=0):
+    # mines `blocks` blocks `interval` seconds apart in as few requests as the node allows
+    if blocks <= 0:
+        return
+    client = web3.clientVersion.lower()
     if network.show_active() == "tenderly":
-        method = "evm_increaseBlocks"
-        print(f"Block number: {web3.eth.block_number}")
-        params = blocks
-        web3.manager.request_blocking(method, [params])
-        print(f"Block number: {web3.eth.block_number}")
+        web3.manager.request_blocking("evm_increaseBlocks", [blocks])
+    elif client.startswith("anvil"):
+        web3.manager.request_blocking("anvil_mine", [hex(blocks), hex(interval)])
+    elif client.startswith("hardhat"):
+        web3.manager.request_blocking("hardhat_mine", [hex(blocks), hex(interval)])
+    elif client.startswith("ganache/v7"):
+        web3.manager.request_blocking("evm_mine", [{"blocks": blocks}])
+    elif hasattr(web3.provider, "endpoint_uri"):
+        # ganache 6 has no batched mining method but takes json-rpc batches
+        for start in range(0, blocks, MINE_BATCH):
+            batch = [
+                {"jsonrpc": "2.0", "id": i, "method": "evm_mine", "params": []}
+                for i in range(start, min(start + MINE_BATCH, blocks))
+            ]
+            response = requests.post(web3.provider.endpoint_uri, json=batch)
+            response.raise_for_status()
+            errors = [r["error"] for r in response.json() if "error" in r]
+            if errors:
+                raise ValueError(errors[0])
     else:
         chain.mine(blocks)
 
-    end = chain.time()
-    print(f"Mined {blocks} blocks during {end-start} seconds")
-    chain.sleep(seconds - (end - start))
+
+def sleep_mine(seconds=BLOCK_TIME):
+    # advances `seconds` mining a block every BLOCK_TIME seconds
+    start = web3.eth.get_block("latest").timestamp
+    blocks = int(seconds / BLOCK_TIME)
+    start_block = web3.eth.block_number
+    mine_blocks(blocks, int(BLOCK_TIME))
+
+    elapsed = web3.eth.get_block("latest").timestamp - start
+    print(
+        f"Mined {web3.eth.block_number - start_block} blocks during {elapsed} seconds"
+    )
+    # the remaining time goes to the last block, this also resyncs brownie's chain state
+    # (time offset and snapshot) after the raw mining requests
+    chain.sleep(max(int(seconds) - elapsed, 0))
     chain.mine(1)
 
 
 def print_joint_status(joint, tokenA, tokenB, lp_token, rewards):
-    token0 = lp_token.token0()
-    (balA, balB) = joint.balanceOfTokensInLP()
-    (res0, res1, _) = lp_token.getReserves()
+    _status(_joint_status_plan(joint, tokenA, tokenB, lp_token))
 
-    resA = res0
-    resB = res1
 
-    if token0 == tokenB:
-        resA = res1
-        resB = res0
-    print("############ JOINT STATUS ############")
-    print(
-        f"Invested tokens in pool: {balA} {tokenA.symbol()} and {balB} {tokenB.symbol()}"
-    )
-    print(
-        f"Existing reserves in pool: {resA} {tokenA.symbol()} and {resB} {tokenB.symbol()}"
-    )
-    print(
-        f"Ratio of joint to pool: {balA / resA} {tokenA.symbol()} and {balB / resB} {tokenB.symbol()}"
+def _joint_status_plan(joint, tokenA, tokenB, lp_token):
+    (a, b, lp), results = yield from _with_metadata(
+        [(tokenA, ["symbol"]), (tokenB, ["symbol"]), (lp_token, ["symbol", "token0"])],
+        [
+            (joint.balanceOfTokensInLP,),
+            (lp_token.getReserves,),
+            (joint.balanceOfStake,),
+            (joint.balanceOfReward,),
+            (joint.pendingReward,),
+        ],
     )
-    print(f"Staked LP tokens: {joint.balanceOfStake()} {lp_token.symbol()}")
-    print(f"Total rewards gained: {joint.balanceOfReward() + joint.pendingReward()}")
-    print("######################################")
+    (balA, balB), (res0, res1, _), staked, reward_balance, pending_reward = results
+    resA, resB = (res1, res0) if lp["token0"] == tokenB else (res0, res1)
+    symbolA, symbolB = a["symbol"], b["symbol"]
+    return [
+        "############ JOINT STATUS ############",
+        f"Invested tokens in pool: {balA} {symbolA} and {balB} {symbolB}",
+        f"Existing reserves in pool: {resA} {symbolA} and {resB} {symbolB}",
+        f"Ratio of joint to pool: {balA / resA} {symbolA} and {balB / resB} {symbolB}",
+        f"Staked LP tokens: {staked} {lp['symbol']}",
+        f"Total rewards gained: {reward_balance + pending_reward}",
+        "######################################",
+    ]
 
 
 def swap_tokens_value(router, tokenIn, tokenOut, amountIn):